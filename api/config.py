@@ -14,6 +14,11 @@ API_VERSION: str = "1.0.0"
 MAX_FILE_SIZE_MB: int = 10
 ALLOWED_CONTENT_TYPES: set[str] = {"image/jpeg", "image/png"}
 
+# ── Raw tensor input ──────────────────────────────────────────
+# Pre-resized 224x224x3 uint8 RGB pixels, optionally compressed
+RAW_TENSOR_CONTENT_TYPE: str = "application/octet-stream"
+RAW_TENSOR_ENCODINGS: set[str] = {"identity", "zstd", "lz4"}
+
 # ── CORS ──────────────────────────────────────────────────────
 # Comma-separated origins, or "*" for development
 CORS_ORIGINS: list[str] = [
@@ -27,6 +32,47 @@ PREDICT_RATE_LIMIT_PER_MINUTE: int = int(
     os.environ.get("PREDICT_RATE_LIMIT_PER_MINUTE", "30")
 )
 
+# ── CPU threading ─────────────────────────────────────────────
+# Worker processes sharing this host's CPUs (same variable gunicorn reads)
+INFERENCE_WORKERS: int = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# PyTorch thread pools per worker; 0 = derive from the CPU budget
+TORCH_NUM_THREADS: int = int(os.environ.get("TORCH_NUM_THREADS", "0"))
+TORCH_INTEROP_THREADS: int = int(os.environ.get("TORCH_INTEROP_THREADS", "0"))
+# Pin each gunicorn worker to a disjoint slice of CPUs
+INFERENCE_PIN_CPUS: bool = (
+    os.environ.get("INFERENCE_PIN_CPUS", "false").lower() == "true"
+)
+
+# ── Model preloading ──────────────────────────────────────────
+# Load the model once in the gunicorn master so forked workers share the
+# weights copy-on-write instead of each loading their own copy
+PRELOAD_MODEL: bool = os.environ.get("PRELOAD_MODEL", "false").lower() == "true"
+
+# ── Inference admission control ────────────────────────────────
+# Concurrent forward passes per worker; extra requests wait in a queue
+INFERENCE_MAX_CONCURRENCY: int = int(
+    os.environ.get("INFERENCE_MAX_CONCURRENCY", "1")
+)
+# Reject with 503 + Retry-After when estimated queue wait + inference time
+# would exceed this budget, instead of queueing until gunicorn's timeout
+INFERENCE_DEADLINE_MS: int = int(
+    os.environ.get("INFERENCE_DEADLINE_MS", "10000")
+)
+# Deadline for batch/background predictions (X-Request-Priority: batch)
+INFERENCE_BATCH_DEADLINE_MS: int = int(
+    os.environ.get("INFERENCE_BATCH_DEADLINE_MS", "110000")
+)
+# Queued work older than this is served first regardless of lane priority
+INFERENCE_STARVATION_MS: int = int(
+    os.environ.get("INFERENCE_STARVATION_MS", "2000")
+)
+
+# ── Disease library caching ───────────────────────────────────
+# Reference data only changes on deploy; clients revalidate with If-None-Match
+DISEASES_CACHE_MAX_AGE: int = int(
+    os.environ.get("DISEASES_CACHE_MAX_AGE", "3600")
+)
+
 # ── Twilio WhatsApp configuration ─────────────────────────────
 TWILIO_ACCOUNT_SID: str = os.environ.get("TWILIO_ACCOUNT_SID", "")
 TWILIO_AUTH_TOKEN: str = os.environ.get("TWILIO_AUTH_TOKEN", "")
@@ -45,3 +91,7 @@ WHATSAPP_ENABLE_SIGNATURE_VALIDATION: bool = (
 WHATSAPP_IMAGE_DOWNLOAD_TIMEOUT: int = int(
     os.environ.get("WHATSAPP_IMAGE_DOWNLOAD_TIMEOUT", "10")
 )
+# Twilio abandons webhooks after 15 s; budget measured from webhook arrival
+WHATSAPP_DEADLINE_MS: int = int(
+    os.environ.get("WHATSAPP_DEADLINE_MS", "12000")
+)
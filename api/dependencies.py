@@ -3,6 +3,7 @@ import logging
 
 from fastapi import HTTPException, Request, status
 
+from api.services.admission import AdmissionController
 from src.inference.predictor import DiseasePredictor
 
 logger = logging.getLogger("api.dependencies")
@@ -20,6 +21,11 @@ def get_predictor(request: Request) -> DiseasePredictor:
     return predictor
 
 
+def get_admission_controller(request: Request) -> AdmissionController:
+    """Retrieve the per-worker inference AdmissionController created at startup."""
+    return request.app.state.admission
+
+
 async def validate_twilio_signature(request: Request) -> dict:
     """Validate the X-Twilio-Signature header and return parsed form data.
 
@@ -11,6 +11,10 @@ class InvalidImageError(Exception):
     """Raised when the uploaded file cannot be opened as an image."""
 
 
+class InvalidTensorError(Exception):
+    """Raised when a raw tensor payload has the wrong size or cannot be decompressed."""
+
+
 class FileTooLargeError(Exception):
     """Raised when the uploaded file exceeds the maximum allowed size."""
 
@@ -22,7 +26,21 @@ class FileTooLargeError(Exception):
         )
 
 
-def _error_response(status_code: int, error_code: str, detail: str) -> JSONResponse:
+class ServiceOverloadedError(Exception):
+    """Raised when inference is saturated and a request cannot meet its deadline."""
+
+    def __init__(self, retry_after_s: int):
+        self.retry_after_s = retry_after_s
+        super().__init__(f"Inference saturated; retry after {retry_after_s}s")
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a queued request's deadline passes before it reaches the model."""
+
+
+def _error_response(
+    status_code: int, error_code: str, detail: str, headers: dict[str, str] | None = None
+) -> JSONResponse:
     """Build a consistent JSON error envelope."""
     return JSONResponse(
         status_code=status_code,
@@ -31,6 +49,7 @@ def _error_response(status_code: int, error_code: str, detail: str) -> JSONRespo
             "error_code": error_code,
             "detail": detail,
         },
+        headers=headers,
     )
 
 
@@ -47,6 +66,15 @@ def register_exception_handlers(app: FastAPI):
             "Please upload a valid JPEG or PNG file.",
         )
 
+    @app.exception_handler(InvalidTensorError)
+    async def invalid_tensor_handler(request: Request, exc: InvalidTensorError):
+        logger.warning("Invalid tensor upload on %s: %s", request.url.path, exc)
+        return _error_response(
+            status.HTTP_400_BAD_REQUEST,
+            "INVALID_TENSOR",
+            str(exc),
+        )
+
     @app.exception_handler(FileTooLargeError)
     async def file_too_large_handler(request: Request, exc: FileTooLargeError):
         logger.warning("Oversized file upload: %s", exc)
@@ -56,3 +84,25 @@ def register_exception_handlers(app: FastAPI):
             f"File size ({exc.actual_mb:.1f} MB) exceeds the maximum "
             f"allowed size ({exc.max_mb:.1f} MB).",
         )
+
+    @app.exception_handler(ServiceOverloadedError)
+    async def service_overloaded_handler(request: Request, exc: ServiceOverloadedError):
+        logger.warning("Shedding load on %s: %s", request.url.path, exc)
+        return _error_response(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "SERVICE_OVERLOADED",
+            "The service is busy analysing other images. "
+            f"Please retry in {exc.retry_after_s} seconds.",
+            headers={"Retry-After": str(exc.retry_after_s)},
+        )
+
+    @app.exception_handler(DeadlineExceededError)
+    async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+        logger.warning("Deadline exceeded while queued on %s", request.url.path)
+        return _error_response(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            "DEADLINE_EXCEEDED",
+            "The request waited too long for the model and was dropped. "
+            "Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
@@ -3,9 +3,11 @@ Crop Disease Classification API
 
 Usage:
   Development : uvicorn api.main:app --reload
-  Production  : gunicorn api.main:app -k uvicorn.workers.UvicornWorker
+  Production  : gunicorn -c gunicorn.conf.py api.main:app
+                (PRELOAD_MODEL=true loads the model once in the master)
   Docker      : docker compose up
 """
+import gc
 import logging
 import sys
 import time
@@ -20,10 +22,18 @@ from fastapi.responses import JSONResponse
 # Add project root to sys.path so `from src.*` imports work
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from api.config import API_VERSION, CORS_ORIGINS  # noqa: E402
+from api.config import (  # noqa: E402
+    API_VERSION,
+    CORS_ORIGINS,
+    INFERENCE_WORKERS,
+    TORCH_INTEROP_THREADS,
+    TORCH_NUM_THREADS,
+)
 from api.exceptions import register_exception_handlers  # noqa: E402
 from api.routers import diseases, health, prediction, whatsapp  # noqa: E402
+from api.services.admission import AdmissionController  # noqa: E402
 from src.inference.predictor import DiseasePredictor  # noqa: E402
+from src.inference.runtime import configure_cpu, current_cpu_config  # noqa: E402
 
 # ── Logging ──────────────────────────────────────────────────────
 logging.basicConfig(
@@ -34,23 +44,68 @@ logging.basicConfig(
 logger = logging.getLogger("api")
 
 
+# ── Preloading ───────────────────────────────────────────────────
+_preloaded_predictor: DiseasePredictor | None = None
+
+
+def preload_predictor() -> DiseasePredictor:
+    """Build the predictor in the gunicorn master, before workers fork.
+
+    Called from ``gunicorn.conf.py`` when ``PRELOAD_MODEL`` is set. Workers
+    inherit the weights copy-on-write, and each worker's ``lifespan`` reuses
+    this instance instead of loading its own. The master never runs a
+    forward pass: PyTorch's OpenMP pool is not fork-safe once started, so
+    loading happens single-threaded and thread pools are sized per worker in
+    ``post_fork``. ``gc.freeze()`` keeps the collector from writing to the
+    inherited objects' headers, which would otherwise un-share their pages.
+    """
+    global _preloaded_predictor
+    import torch
+
+    start = time.perf_counter()
+    torch.set_num_threads(1)
+    _preloaded_predictor = DiseasePredictor()
+    gc.freeze()
+    logger.info(
+        "Preloaded model in master in %.0f ms: %d classes, checkpoint=%s",
+        (time.perf_counter() - start) * 1000,
+        _preloaded_predictor.num_classes,
+        _preloaded_predictor.model_path,
+    )
+    return _preloaded_predictor
+
+
 # ── Lifespan ─────────────────────────────────────────────────────
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load and verify ML model at startup; release at shutdown."""
     logger.info("Starting Crop Disease Classification API v%s ...", API_VERSION)
+    start = time.perf_counter()
+    # gunicorn.conf.py configures threads (and pinning) in post_fork;
+    # fall back to an even split when run under plain uvicorn.
+    app.state.cpu_config = current_cpu_config() or configure_cpu(
+        workers=INFERENCE_WORKERS,
+        threads=TORCH_NUM_THREADS or None,
+        interop_threads=TORCH_INTEROP_THREADS or None,
+    )
     try:
-        predictor = DiseasePredictor()
+        predictor = _preloaded_predictor or DiseasePredictor()
         logger.info(
-            "Model loaded: %d classes, checkpoint=%s",
+            "Model %s: %d classes, checkpoint=%s",
+            "inherited from master" if _preloaded_predictor else "loaded",
             predictor.num_classes,
             predictor.model_path,
         )
         app.state.predictor = predictor
+        # Worker-local: the scheduler's asyncio primitives must be created in
+        # the worker's own event loop, never inherited across fork.
+        app.state.admission = AdmissionController()
     except Exception:
         logger.critical("Failed to load model — aborting startup", exc_info=True)
         raise
 
+    logger.info("Worker ready in %.0f ms", (time.perf_counter() - start) * 1000)
+
     yield
 
     logger.info("Shutting down — releasing model resources ...")
@@ -111,6 +166,7 @@ app.add_middleware(
     allow_origins=CORS_ORIGINS,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID"],
 )
 
 
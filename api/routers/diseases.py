@@ -1,6 +1,14 @@
-"""Disease library endpoints — reference data for all supported classes."""
-from fastapi import APIRouter, HTTPException, Query, status
+"""Disease library endpoints — reference data for all supported classes.
 
+The library only changes on deploy, so every response body is serialized
+once at import time and served as pre-built bytes with a strong ETag.
+"""
+import hashlib
+from typing import NamedTuple
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from api.config import DISEASES_CACHE_MAX_AGE
 from api.schemas.disease import DiseaseDetailResponse, DiseaseListResponse
 from api.schemas.error import ErrorResponse
 from src.data.disease_info import DISEASE_DETAILS
@@ -8,6 +16,59 @@ from src.data.disease_info import DISEASE_DETAILS
 router = APIRouter(tags=["Disease Library"])
 
 
+# ── Precomputed responses ─────────────────────────────────────
+class _CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _cache(model: DiseaseDetailResponse | DiseaseListResponse) -> _CachedBody:
+    body = model.model_dump_json().encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return _CachedBody(body, etag)
+
+
+def _list_response(crop: str | None) -> DiseaseListResponse:
+    diseases = [
+        DiseaseDetailResponse(name=name, **details)
+        for name, details in DISEASE_DETAILS.items()
+        if crop is None or details["crop"].lower() == crop
+    ]
+    return DiseaseListResponse(count=len(diseases), diseases=diseases)
+
+
+_DETAIL_CACHE: dict[str, _CachedBody] = {
+    name: _cache(DiseaseDetailResponse(name=name, **details))
+    for name, details in DISEASE_DETAILS.items()
+}
+# Keyed by lower-cased crop name; None is the unfiltered list and "" any
+# crop that matches nothing (the list is empty either way).
+_LIST_CACHE: dict[str | None, _CachedBody] = {
+    crop: _cache(_list_response(crop))
+    for crop in [None, ""] + sorted({d["crop"].lower() for d in DISEASE_DETAILS.values()})
+}
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _cached_response(request: Request, cached: _CachedBody) -> Response:
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={DISEASES_CACHE_MAX_AGE}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
 @router.get(
     "/diseases",
     response_model=DiseaseListResponse,
@@ -15,21 +76,19 @@ router = APIRouter(tags=["Disease Library"])
     description=(
         "Returns all 15 supported crop disease classes with full details "
         "including symptoms, treatment, and prevention strategies. "
-        "Optionally filter by crop name."
+        "Optionally filter by crop name. Responses carry an `ETag`; send it "
+        "back in `If-None-Match` to get `304 Not Modified`."
     ),
+    responses={304: {"description": "Client copy is still current"}},
 )
 def list_diseases(
+    request: Request,
     crop: str | None = Query(
         None, description="Filter by crop name (Corn, Potato, Tomato)"
     ),
 ):
-    diseases = []
-    for name, details in DISEASE_DETAILS.items():
-        if crop and details["crop"].lower() != crop.lower():
-            continue
-        diseases.append(DiseaseDetailResponse(name=name, **details))
-
-    return DiseaseListResponse(count=len(diseases), diseases=diseases)
+    key = crop.lower() if crop else None
+    return _cached_response(request, _LIST_CACHE.get(key, _LIST_CACHE[""]))
 
 
 @router.get(
@@ -38,15 +97,16 @@ def list_diseases(
     summary="Get disease details",
     description="Returns detailed information for a specific disease class.",
     responses={
+        304: {"description": "Client copy is still current"},
         404: {
             "model": ErrorResponse,
             "description": "Disease not found in supported classes",
-        }
+        },
     },
 )
-def get_disease(disease_name: str):
-    details = DISEASE_DETAILS.get(disease_name)
-    if not details:
+def get_disease(request: Request, disease_name: str):
+    cached = _DETAIL_CACHE.get(disease_name)
+    if not cached:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=(
@@ -54,4 +114,4 @@ def get_disease(disease_name: str):
                 "Use GET /api/v1/diseases to see all available classes."
             ),
         )
-    return DiseaseDetailResponse(name=disease_name, **details)
+    return _cached_response(request, cached)
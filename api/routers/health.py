@@ -1,11 +1,12 @@
 """Health check endpoints — liveness, readiness, and detailed status."""
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 
 from api.config import API_VERSION
-from api.dependencies import get_predictor
-from api.schemas.health import HealthResponse
+from api.dependencies import get_admission_controller, get_predictor
+from api.schemas.health import CpuConfigResponse, HealthResponse, InferenceStatsResponse
+from api.services.admission import AdmissionController
 from src.inference.predictor import DiseasePredictor
 
 router = APIRouter(tags=["Health"])
@@ -24,13 +25,28 @@ def liveness():
     "/health",
     response_model=HealthResponse,
     summary="Readiness check",
-    description="Returns API health status, model readiness, and version info.",
+    description="Returns API health status, model readiness, CPU thread layout, and version info.",
 )
-def health_check(predictor: DiseasePredictor = Depends(get_predictor)):
+def health_check(request: Request, predictor: DiseasePredictor = Depends(get_predictor)):
+    cpu_config = getattr(request.app.state, "cpu_config", None)
     return HealthResponse(
         status="healthy",
         version=API_VERSION,
         model_loaded=predictor.model is not None,
         model_classes=predictor.num_classes,
+        cpu=CpuConfigResponse(**cpu_config.as_dict()) if cpu_config else None,
         timestamp=datetime.now(timezone.utc),
     )
+
+
+@router.get(
+    "/health/inference",
+    response_model=InferenceStatsResponse,
+    summary="Inference scheduler stats",
+    description=(
+        "Per-lane queue depth, shed/dropped counts, and rolling queue-wait and "
+        "end-to-end latency percentiles for this worker."
+    ),
+)
+def inference_stats(admission: AdmissionController = Depends(get_admission_controller)):
+    return InferenceStatsResponse(**admission.stats())
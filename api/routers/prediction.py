@@ -3,14 +3,24 @@ import logging
 import time
 from io import BytesIO
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
+import numpy as np
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, UploadFile, status
 from PIL import Image, UnidentifiedImageError
 
-from api.config import ALLOWED_CONTENT_TYPES, MAX_FILE_SIZE_MB, PREDICT_RATE_LIMIT_PER_MINUTE
-from api.dependencies import get_predictor
-from api.exceptions import FileTooLargeError, InvalidImageError
+from api.config import (
+    ALLOWED_CONTENT_TYPES,
+    MAX_FILE_SIZE_MB,
+    PREDICT_RATE_LIMIT_PER_MINUTE,
+    RAW_TENSOR_CONTENT_TYPE,
+    RAW_TENSOR_ENCODINGS,
+)
+from api.dependencies import get_admission_controller, get_predictor
+from api.exceptions import FileTooLargeError, InvalidImageError, InvalidTensorError
 from api.schemas.error import ErrorResponse
 from api.schemas.prediction import PredictionResponse, TopKPrediction
+from api.services.admission import AdmissionController
+from api.services.scheduler import Lane
+from src.config import IMG_SIZE
 from src.data.disease_info import DISEASE_DETAILS
 from src.inference.predictor import DiseasePredictor
 
@@ -43,6 +53,93 @@ def _check_rate_limit(client_ip: str) -> None:
     _predict_requests[client_ip] = timestamps
 
 
+# ── Priority lanes ─────────────────────────────────────────────
+_PRIORITY_LANES = {"interactive": Lane.INTERACTIVE, "batch": Lane.BATCH}
+
+
+def _resolve_lane(priority: str | None) -> Lane:
+    """Map the optional X-Request-Priority header onto a scheduler lane."""
+    if priority is None:
+        return Lane.INTERACTIVE
+    lane = _PRIORITY_LANES.get(priority.strip().lower())
+    if lane is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Unsupported X-Request-Priority '{priority}'. "
+                f"Allowed: {', '.join(_PRIORITY_LANES)}"
+            ),
+        )
+    return lane
+
+
+def _build_response(result: dict, inference_ms: float) -> PredictionResponse:
+    """Map a predictor result dict onto the public response schema."""
+    disease_name = result["top_class"]
+    details = DISEASE_DETAILS.get(disease_name, {})
+
+    logger.info(
+        "Prediction: %s (%.1f%%) in %.0f ms",
+        disease_name,
+        result["confidence"] * 100,
+        inference_ms,
+    )
+
+    return PredictionResponse(
+        success=True,
+        prediction=disease_name,
+        confidence=result["confidence"],
+        crop=details.get("crop", disease_name.split(":")[0].strip()),
+        severity=details.get("severity", "Unknown"),
+        treatment=result["recommendation"],
+        top_k=[
+            TopKPrediction(class_name=cls, confidence=prob)
+            for cls, prob in result["top_k_probs"].items()
+        ],
+    )
+
+
+# ── Raw tensor decoding ──────────────────────────────────────
+_RAW_TENSOR_BYTES = IMG_SIZE * IMG_SIZE * 3
+
+
+def _decode_raw_tensor(body: bytes, encoding: str) -> np.ndarray:
+    """Decompress (if needed) and reshape a raw RGB payload without PIL.
+
+    Decompression is capped at the expected tensor size so a malicious
+    payload cannot expand into an arbitrarily large buffer.
+    """
+    if encoding == "zstd":
+        import zstandard
+
+        # Stream-read rather than decompress(): a frame header can declare an
+        # arbitrary content size, which decompress() would allocate up front.
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+                body = reader.read(_RAW_TENSOR_BYTES + 1)
+        except zstandard.ZstdError as exc:
+            raise InvalidTensorError(f"Could not decompress zstd payload: {exc}")
+    elif encoding == "lz4":
+        import lz4.frame
+
+        decompressor = lz4.frame.LZ4FrameDecompressor()
+        try:
+            body = decompressor.decompress(body, max_length=_RAW_TENSOR_BYTES + 1)
+        except RuntimeError as exc:
+            raise InvalidTensorError(f"Could not decompress lz4 payload: {exc}")
+        if not decompressor.eof:
+            raise InvalidTensorError(
+                f"Decompressed payload exceeds {_RAW_TENSOR_BYTES} bytes"
+            )
+
+    if len(body) != _RAW_TENSOR_BYTES:
+        raise InvalidTensorError(
+            f"Expected {_RAW_TENSOR_BYTES} bytes ({IMG_SIZE}x{IMG_SIZE}x3 uint8 RGB), "
+            f"got {len(body)}"
+        )
+    return np.frombuffer(bytearray(body), dtype=np.uint8).reshape(IMG_SIZE, IMG_SIZE, 3)
+
+
 @router.post(
     "/predict",
     response_model=PredictionResponse,
@@ -57,7 +154,7 @@ def _check_rate_limit(client_ip: str) -> None:
         413: {"model": ErrorResponse, "description": "File exceeds 10 MB limit"},
         422: {"model": ErrorResponse, "description": "Unsupported file type"},
         429: {"model": ErrorResponse, "description": "Rate limit exceeded"},
-        503: {"model": ErrorResponse, "description": "Model not loaded"},
+        503: {"model": ErrorResponse, "description": "Model not loaded or inference saturated"},
     },
 )
 async def predict_disease(
@@ -67,10 +164,19 @@ async def predict_disease(
         5, ge=1, le=15, description="Number of top predictions to return"
     ),
     predictor: DiseasePredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission_controller),
+    priority: str | None = Header(
+        None,
+        alias="X-Request-Priority",
+        description="Scheduling lane: `interactive` (default) or `batch` for background jobs",
+    ),
 ):
-    # ── Rate limit ────────────────────────────────────────────────
+    # ── Rate limit and load shedding ──────────────────────────────
     client_ip = request.client.host if request.client else "unknown"
     _check_rate_limit(client_ip)
+    lane = _resolve_lane(priority)
+    deadline = admission.deadline_for(lane)
+    admission.check(lane, deadline)
 
     # ── Validate content type ────────────────────────────────────
     content_type = file.content_type or "unknown"
@@ -99,28 +205,107 @@ async def predict_disease(
 
     # ── Run prediction ───────────────────────────────────────────
     start = time.perf_counter()
-    result = predictor.predict(image, top_k=top_k)
+    result = await admission.run(
+        predictor.predict, image, top_k=top_k, lane=lane, deadline=deadline, admitted=True
+    )
     inference_ms = (time.perf_counter() - start) * 1000
 
-    disease_name = result["top_class"]
-    details = DISEASE_DETAILS.get(disease_name, {})
+    return _build_response(result, inference_ms)
 
-    logger.info(
-        "Prediction: %s (%.1f%%) in %.0f ms",
-        disease_name,
-        result["confidence"] * 100,
-        inference_ms,
-    )
 
-    return PredictionResponse(
-        success=True,
-        prediction=disease_name,
-        confidence=result["confidence"],
-        crop=details.get("crop", disease_name.split(":")[0].strip()),
-        severity=details.get("severity", "Unknown"),
-        treatment=result["recommendation"],
-        top_k=[
-            TopKPrediction(class_name=cls, confidence=prob)
-            for cls, prob in result["top_k_probs"].items()
-        ],
+@router.post(
+    "/predict/raw",
+    response_model=PredictionResponse,
+    summary="Predict crop disease from pre-resized pixels",
+    description=(
+        f"Send the leaf image as raw {IMG_SIZE}x{IMG_SIZE}x3 uint8 RGB pixels "
+        "(row-major, HWC) with `Content-Type: application/octet-stream`. "
+        "Set `Content-Encoding: zstd` or `lz4` to send a compressed payload. "
+        "Intended for clients that already resize on-device; the server skips "
+        "image decoding and resizing."
+    ),
+    responses={
+        400: {"model": ErrorResponse, "description": "Malformed or wrong-sized tensor"},
+        413: {"model": ErrorResponse, "description": "Payload exceeds 10 MB limit"},
+        415: {"model": ErrorResponse, "description": "Unsupported Content-Encoding"},
+        422: {"model": ErrorResponse, "description": "Unsupported content type"},
+        429: {"model": ErrorResponse, "description": "Rate limit exceeded"},
+        503: {"model": ErrorResponse, "description": "Model not loaded or inference saturated"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                RAW_TENSOR_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}}
+            },
+        }
+    },
+)
+async def predict_disease_raw(
+    request: Request,
+    top_k: int = Query(
+        5, ge=1, le=15, description="Number of top predictions to return"
+    ),
+    predictor: DiseasePredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission_controller),
+    priority: str | None = Header(
+        None,
+        alias="X-Request-Priority",
+        description="Scheduling lane: `interactive` (default) or `batch` for background jobs",
+    ),
+):
+    # ── Rate limit and load shedding ──────────────────────────────
+    client_ip = request.client.host if request.client else "unknown"
+    _check_rate_limit(client_ip)
+    lane = _resolve_lane(priority)
+    deadline = admission.deadline_for(lane)
+    admission.check(lane, deadline)
+
+    # ── Validate content type and encoding ───────────────────────
+    content_type = request.headers.get("content-type", "unknown").split(";")[0].strip()
+    if content_type != RAW_TENSOR_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Unsupported content type '{content_type}'. "
+                f"Expected: {RAW_TENSOR_CONTENT_TYPE}"
+            ),
+        )
+
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding not in RAW_TENSOR_ENCODINGS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=(
+                f"Unsupported Content-Encoding '{encoding}'. "
+                f"Allowed: {', '.join(sorted(RAW_TENSOR_ENCODINGS))}"
+            ),
+        )
+
+    # ── Read and validate payload size (async) ────────────────────
+    body = await request.body()
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    if len(body) > max_bytes:
+        raise FileTooLargeError(len(body), max_bytes)
+
+    try:
+        pixels = _decode_raw_tensor(body, encoding)
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Encoding '{encoding}' is not available on this server.",
+        )
+
+    # ── Run prediction ───────────────────────────────────────────
+    start = time.perf_counter()
+    result = await admission.run(
+        predictor.predict_pixels,
+        pixels,
+        top_k=top_k,
+        lane=lane,
+        deadline=deadline,
+        admitted=True,
     )
+    inference_ms = (time.perf_counter() - start) * 1000
+
+    return _build_response(result, inference_ms)
@@ -5,8 +5,10 @@ import time
 from fastapi import APIRouter, Depends, Response
 
 from api.config import WHATSAPP_LOW_CONFIDENCE_THRESHOLD
-from api.dependencies import get_predictor, validate_twilio_signature
+from api.dependencies import get_admission_controller, get_predictor, validate_twilio_signature
+from api.exceptions import DeadlineExceededError, ServiceOverloadedError
 from api.schemas.whatsapp import (
+    ERROR_BUSY_MSG,
     ERROR_DOWNLOAD_MSG,
     ERROR_GENERIC_MSG,
     ERROR_INVALID_IMAGE_MSG,
@@ -18,6 +20,8 @@ from api.schemas.whatsapp import (
     SUPPORTED_CROPS_MSG,
     TwilioWebhookData,
 )
+from api.services.admission import AdmissionController
+from api.services.scheduler import Lane
 from api.services.whatsapp_service import RateLimiter, WhatsAppService
 from src.data.disease_info import DISEASE_DETAILS
 from src.inference.predictor import DiseasePredictor
@@ -40,7 +44,11 @@ service = WhatsAppService()
 async def whatsapp_webhook(
     form_data: dict = Depends(validate_twilio_signature),
     predictor: DiseasePredictor = Depends(get_predictor),
+    admission: AdmissionController = Depends(get_admission_controller),
 ):
+    # The Twilio reply budget starts when the webhook arrives, so the
+    # media download counts against the inference deadline.
+    deadline = admission.deadline_for(Lane.WHATSAPP)
     try:
         webhook = TwilioWebhookData(**form_data)
 
@@ -66,6 +74,12 @@ async def whatsapp_webhook(
             return service.create_twiml_response(PROMPT_SEND_PHOTO_MSG)
 
         # ── Image prediction flow ─────────────────────────────
+        # Shed load before spending time on the download
+        try:
+            admission.check(Lane.WHATSAPP, deadline)
+        except ServiceOverloadedError:
+            return service.create_twiml_response(ERROR_BUSY_MSG)
+
         # Download image from Twilio
         try:
             image = await service.download_image(webhook.media_url_0)
@@ -76,8 +90,14 @@ async def whatsapp_webhook(
         # Run prediction
         try:
             start = time.perf_counter()
-            result = predictor.predict(image, top_k=3)
+            result = await admission.run(
+                predictor.predict, image, top_k=3, lane=Lane.WHATSAPP, deadline=deadline,
+                admitted=True,
+            )
             inference_ms = (time.perf_counter() - start) * 1000
+        except (ServiceOverloadedError, DeadlineExceededError):
+            logger.warning("Inference saturated for ...%s", webhook.from_number[-4:])
+            return service.create_twiml_response(ERROR_BUSY_MSG)
         except Exception:
             logger.error("Inference failed for ...%s", webhook.from_number[-4:], exc_info=True)
             return service.create_twiml_response(ERROR_INVALID_IMAGE_MSG)
@@ -1,5 +1,5 @@
 from api.schemas.error import ErrorResponse
-from api.schemas.health import HealthResponse
+from api.schemas.health import CpuConfigResponse, HealthResponse, InferenceStatsResponse, LaneStatsResponse
 from api.schemas.prediction import PredictionResponse, TopKPrediction
 from api.schemas.disease import DiseaseDetailResponse, DiseaseListResponse
 from api.schemas.whatsapp import TwilioWebhookData
@@ -4,6 +4,19 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 
 
+class CpuConfigResponse(BaseModel):
+    """PyTorch thread layout chosen for this worker at startup."""
+
+    host_cpus: int = Field(..., examples=[8])
+    affinity_cpus: int = Field(..., examples=[8])
+    cgroup_quota_cpus: float | None = Field(None, examples=[4.0])
+    cpu_budget: int = Field(..., examples=[4])
+    workers: int = Field(..., examples=[2])
+    intra_op_threads: int = Field(..., examples=[2])
+    inter_op_threads: int = Field(..., examples=[1])
+    pinned_cpus: list[int] | None = Field(None, examples=[[0, 1]])
+
+
 class HealthResponse(BaseModel):
     """API health status and model readiness."""
 
@@ -11,6 +24,7 @@ class HealthResponse(BaseModel):
     version: str = Field(..., examples=["1.0.0"])
     model_loaded: bool = Field(..., examples=[True])
     model_classes: int = Field(..., examples=[15])
+    cpu: CpuConfigResponse | None = None
     timestamp: datetime
 
     model_config = {
@@ -21,8 +35,41 @@ class HealthResponse(BaseModel):
                     "version": "1.0.0",
                     "model_loaded": True,
                     "model_classes": 15,
+                    "cpu": {
+                        "host_cpus": 8,
+                        "affinity_cpus": 8,
+                        "cgroup_quota_cpus": 4.0,
+                        "cpu_budget": 4,
+                        "workers": 2,
+                        "intra_op_threads": 2,
+                        "inter_op_threads": 1,
+                        "pinned_cpus": None,
+                    },
                     "timestamp": "2026-02-24T10:30:00Z",
                 }
             ]
         }
     }
+
+
+class LaneStatsResponse(BaseModel):
+    """Queue depth, counters, and rolling latency percentiles for one priority lane."""
+
+    queued: int = Field(..., examples=[0])
+    completed: int = Field(..., examples=[128])
+    dropped: int = Field(..., description="Expired before reaching the model", examples=[0])
+    rejected: int = Field(..., description="Shed at admission", examples=[2])
+    queue_wait_p50_ms: float | None = Field(None, examples=[0.4])
+    queue_wait_p95_ms: float | None = Field(None, examples=[85.0])
+    latency_p50_ms: float | None = Field(None, examples=[42.0])
+    latency_p95_ms: float | None = Field(None, examples=[130.0])
+    latency_p99_ms: float | None = Field(None, examples=[210.0])
+
+
+class InferenceStatsResponse(BaseModel):
+    """Inference scheduler state for this worker."""
+
+    max_concurrency: int = Field(..., examples=[1])
+    in_flight: int = Field(..., examples=[3])
+    estimated_latency_ms: float = Field(..., examples=[45.2])
+    lanes: dict[str, LaneStatsResponse]
@@ -87,6 +87,13 @@ ERROR_GENERIC_MSG = (
     "Please try again. If the problem continues, try sending a different photo."
 )
 
+ERROR_BUSY_MSG = (
+    "\u23f3 We are analysing a lot of photos right now.\n"
+    "\n"
+    "Please send your photo again in a minute. "
+    "Sorry for the wait!"
+)
+
 PROMPT_SEND_PHOTO_MSG = (
     "\U0001f4f8 Send me a photo of a Corn, Potato, or Tomato leaf "
     "to get a disease diagnosis.\n"
@@ -0,0 +1,129 @@
+"""Inference admission control — reject early instead of queueing until timeout."""
+import logging
+import math
+import time
+from collections import deque
+
+from api.config import (
+    INFERENCE_BATCH_DEADLINE_MS,
+    INFERENCE_DEADLINE_MS,
+    INFERENCE_MAX_CONCURRENCY,
+    INFERENCE_STARVATION_MS,
+    WHATSAPP_DEADLINE_MS,
+)
+from api.exceptions import ServiceOverloadedError
+from api.services.scheduler import InferenceScheduler, Lane
+
+logger = logging.getLogger("api.admission")
+
+# Assumed per-request inference time until real latencies have been observed
+_DEFAULT_LATENCY_MS = 100.0
+
+# Default latency budget per lane, measured from when the request arrived
+LANE_DEADLINES_MS: dict[Lane, float] = {
+    Lane.INTERACTIVE: INFERENCE_DEADLINE_MS,
+    Lane.WHATSAPP: WHATSAPP_DEADLINE_MS,
+    Lane.BATCH: INFERENCE_BATCH_DEADLINE_MS,
+}
+
+
+class AdmissionController:
+    """Bounds concurrent inference and sheds requests that would miss their deadline.
+
+    Inference runs in the threadpool so the event loop stays responsive.
+    Queue wait is estimated from the number of requests that would be
+    served ahead (see InferenceScheduler) and the mean of recent
+    inference latencies.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        starvation_ms: float | None = None,
+        latency_window: int = 50,
+    ):
+        self.max_concurrency = max_concurrency or INFERENCE_MAX_CONCURRENCY
+        self.scheduler = InferenceScheduler(
+            self.max_concurrency, starvation_ms or INFERENCE_STARVATION_MS
+        )
+        self._latencies_ms: deque[float] = deque(maxlen=latency_window)
+
+    @property
+    def in_flight(self) -> int:
+        return self.scheduler.running + sum(self.scheduler.queued(lane) for lane in Lane)
+
+    def estimated_latency_ms(self) -> float:
+        if not self._latencies_ms:
+            return _DEFAULT_LATENCY_MS
+        return sum(self._latencies_ms) / len(self._latencies_ms)
+
+    def estimated_wait_ms(self, lane: Lane = Lane.INTERACTIVE) -> float:
+        """Expected queue wait for a request arriving now in ``lane``."""
+        ahead = self.scheduler.ahead_of(lane) - self.max_concurrency + 1
+        if ahead <= 0:
+            return 0.0
+        return math.ceil(ahead / self.max_concurrency) * self.estimated_latency_ms()
+
+    def deadline_for(self, lane: Lane, arrived_at: float | None = None) -> float:
+        """Absolute ``time.perf_counter()`` deadline for a request in ``lane``."""
+        start = arrived_at if arrived_at is not None else time.perf_counter()
+        return start + LANE_DEADLINES_MS[lane] / 1000
+
+    def check(self, lane: Lane = Lane.INTERACTIVE, deadline: float | None = None) -> None:
+        """Raise ServiceOverloadedError if a new request cannot meet its deadline."""
+        if deadline is None:
+            deadline = self.deadline_for(lane)
+        budget_ms = (deadline - time.perf_counter()) * 1000
+        wait_ms = self.estimated_wait_ms(lane)
+        if wait_ms + self.estimated_latency_ms() > budget_ms:
+            self.scheduler.stats[lane].rejected += 1
+            retry_after_s = max(1, math.ceil(wait_ms / 1000))
+            logger.warning(
+                "Rejecting %s request: %d in flight, est. wait %.0f ms > budget %.0f ms",
+                lane.name,
+                self.in_flight,
+                wait_ms,
+                budget_ms,
+            )
+            raise ServiceOverloadedError(retry_after_s)
+
+    async def run(
+        self,
+        fn,
+        *args,
+        lane: Lane = Lane.INTERACTIVE,
+        deadline: float | None = None,
+        admitted: bool = False,
+        **kwargs,
+    ):
+        """Admit, queue in ``lane``, and run ``fn`` in the threadpool.
+
+        Pass ``admitted=True`` when the caller already ran ``check`` (to shed
+        load before reading the upload), so the request is admitted once.
+        """
+        if deadline is None:
+            deadline = self.deadline_for(lane)
+        if not admitted:
+            self.check(lane, deadline)
+        return await self.scheduler.run(lane, deadline, self._timed, fn, *args, **kwargs)
+
+    def _timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "estimated_latency_ms": self.estimated_latency_ms(),
+            "lanes": {
+                lane.name.lower(): {
+                    "queued": self.scheduler.queued(lane),
+                    **self.scheduler.stats[lane].summary(),
+                }
+                for lane in Lane
+            },
+        }
@@ -0,0 +1,154 @@
+"""Priority-lane inference scheduler with per-request deadlines."""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+from starlette.concurrency import run_in_threadpool
+
+from api.exceptions import DeadlineExceededError
+
+logger = logging.getLogger("api.scheduler")
+
+
+class Lane(IntEnum):
+    """Priority classes for inference work (lower value = higher priority)."""
+
+    INTERACTIVE = 0
+    WHATSAPP = 1
+    BATCH = 2
+
+
+def _percentile(values, q: float) -> float | None:
+    """Nearest-rank percentile; None for an empty window."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+@dataclass
+class LaneStats:
+    """Rolling latency window and counters for one lane."""
+
+    completed: int = 0
+    dropped: int = 0
+    rejected: int = 0
+    queue_wait_ms: deque = field(default_factory=lambda: deque(maxlen=200))
+    latency_ms: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def summary(self) -> dict:
+        return {
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "queue_wait_p50_ms": _percentile(self.queue_wait_ms, 50),
+            "queue_wait_p95_ms": _percentile(self.queue_wait_ms, 95),
+            "latency_p50_ms": _percentile(self.latency_ms, 50),
+            "latency_p95_ms": _percentile(self.latency_ms, 95),
+            "latency_p99_ms": _percentile(self.latency_ms, 99),
+        }
+
+
+@dataclass(eq=False)
+class _Ticket:
+    lane: Lane
+    deadline: float
+    enqueued_at: float
+    granted: asyncio.Future
+
+
+class InferenceScheduler:
+    """Hands out inference slots by lane priority, dropping expired work.
+
+    Slots go to the highest-priority non-empty lane, except that a lane
+    whose oldest request has waited longer than ``starvation_ms`` is served
+    first, so batch work still progresses under sustained interactive load.
+    A request whose deadline passes while queued is failed with
+    DeadlineExceededError before it reaches the model.
+    """
+
+    def __init__(self, max_concurrency: int, starvation_ms: float):
+        self.max_concurrency = max_concurrency
+        self.starvation_ms = starvation_ms
+        self.running = 0
+        self.stats = {lane: LaneStats() for lane in Lane}
+        self._queues: dict[Lane, deque[_Ticket]] = {lane: deque() for lane in Lane}
+
+    def queued(self, lane: Lane) -> int:
+        return len(self._queues[lane])
+
+    def ahead_of(self, lane: Lane) -> int:
+        """Running requests plus those queued in lanes that would be served first."""
+        return self.running + sum(
+            len(q) for other, q in self._queues.items() if other <= lane
+        )
+
+    async def run(self, lane: Lane, deadline: float, fn, *args, **kwargs):
+        """Queue ``fn`` in ``lane`` and run it in the threadpool once granted a slot.
+
+        ``deadline`` is an absolute ``time.perf_counter()`` value.
+        """
+        ticket = _Ticket(lane, deadline, time.perf_counter(), asyncio.get_running_loop().create_future())
+        self._queues[lane].append(ticket)
+        self._dispatch()
+
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            # Client went away: give back the slot, or leave the queue
+            if ticket.granted.cancelled():
+                try:
+                    self._queues[lane].remove(ticket)
+                except ValueError:
+                    pass
+            elif ticket.granted.exception() is None:
+                self._release()
+            raise
+
+        started = time.perf_counter()
+        try:
+            return await run_in_threadpool(fn, *args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            stats = self.stats[lane]
+            stats.completed += 1
+            stats.queue_wait_ms.append((started - ticket.enqueued_at) * 1000)
+            stats.latency_ms.append((finished - ticket.enqueued_at) * 1000)
+            self._release()
+
+    def _release(self) -> None:
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            if ticket.granted.cancelled():
+                continue
+            if time.perf_counter() > ticket.deadline:
+                self.stats[ticket.lane].dropped += 1
+                logger.warning("Dropping expired %s request before inference", ticket.lane.name)
+                ticket.granted.set_exception(DeadlineExceededError())
+                continue
+            self.running += 1
+            ticket.granted.set_result(None)
+
+    def _next_ticket(self) -> _Ticket | None:
+        heads = [q[0] for q in self._queues.values() if q]
+        if not heads:
+            return None
+
+        now = time.perf_counter()
+        starved = [t for t in heads if (now - t.enqueued_at) * 1000 >= self.starvation_ms]
+        if starved:
+            chosen = min(starved, key=lambda t: t.enqueued_at)
+        else:
+            chosen = min(heads, key=lambda t: t.lane)
+        return self._queues[chosen.lane].popleft()
@@ -0,0 +1,62 @@
+"""
+Gunicorn configuration for the Crop Disease Classification API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py api.main:app
+
+Worker count comes from WEB_CONCURRENCY (default 2). Each worker sizes its
+PyTorch thread pools to its share of the CPU budget right after fork,
+before the app (and torch) does any work.
+
+With PRELOAD_MODEL=true the app and model are loaded once in the master and
+workers share the weights copy-on-write (see api.main.preload_predictor).
+"""
+import os
+import sys
+from pathlib import Path
+
+# Make `api.*` / `src.*` importable from hooks regardless of the launch directory
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from api.config import PRELOAD_MODEL  # noqa: E402
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+graceful_timeout = 30
+accesslog = "-"
+preload_app = PRELOAD_MODEL
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before workers fork."""
+    if PRELOAD_MODEL:
+        from api.main import preload_predictor
+
+        preload_predictor()
+
+
+def pre_fork(server, worker):
+    """Give the new worker the lowest CPU slot no live worker holds (runs in the master).
+
+    ``server.WORKERS`` holds the live workers: a dead one is removed before
+    its replacement forks, so its slot is free again and the replacement is
+    pinned to the cores the dead worker left idle.
+    """
+    taken = {getattr(w, "cpu_slot", None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    """Configure PyTorch threads (and optional CPU pinning) for this worker."""
+    from api.config import INFERENCE_PIN_CPUS, TORCH_INTEROP_THREADS, TORCH_NUM_THREADS
+    from src.inference.runtime import configure_cpu
+
+    configure_cpu(
+        workers=workers,
+        threads=TORCH_NUM_THREADS or None,
+        interop_threads=TORCH_INTEROP_THREADS or None,
+        pin=INFERENCE_PIN_CPUS,
+        worker_index=worker.cpu_slot % workers,  # assigned in pre_fork
+    )
@@ -0,0 +1,106 @@
+"""
+Benchmark inference throughput and latency for worker x thread layouts.
+
+Each configuration launches W worker processes, each with T PyTorch
+intra-op threads, that run batch-1 forward passes back to back for a fixed
+duration, mimicking W gunicorn workers serving concurrent requests.
+Random weights are used: latency does not depend on the trained values.
+
+Usage:
+    cd crop-prediction
+    python scripts/benchmark_cpu_threads.py --workers 1 2 4 --threads 1 2 4 --duration 10
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+
+
+def _worker(worker_index, workers, threads, duration, pin, barrier, queue):
+    import torch
+
+    from src.config import IMG_SIZE
+    from src.inference.runtime import configure_cpu
+    from src.models.classifier import build_model
+
+    configure_cpu(workers=workers, threads=threads, interop_threads=1,
+                  pin=pin, worker_index=worker_index)
+    model, _, _ = build_model(num_classes=15, device=torch.device("cpu"), pretrained=False)
+    model.eval()
+    sample = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+
+    with torch.inference_mode():
+        for _ in range(5):
+            model(sample)
+
+        # Start all workers together so they genuinely compete for cores
+        barrier.wait()
+        latencies = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            t0 = time.perf_counter_ns()
+            model(sample)
+            latencies.append((time.perf_counter_ns() - t0) / 1e6)
+    queue.put(latencies)
+
+
+def run_config(workers, threads, duration, pin):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    barrier = ctx.Barrier(workers)
+    procs = [
+        ctx.Process(target=_worker, args=(i, workers, threads, duration, pin, barrier, queue))
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    latencies = np.concatenate([queue.get() for _ in procs])
+    for p in procs:
+        p.join()
+
+    return {
+        "workers": workers,
+        "threads": threads,
+        "throughput_ips": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per configuration")
+    parser.add_argument("--pin", action="store_true", help="Pin workers to disjoint CPU sets")
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    from src.inference.runtime import plan_cpu_config
+    print(f"CPU budget: {plan_cpu_config().cpu_budget} cores\n")
+    print(f"{'workers':>7} {'threads':>7} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    rows = []
+    for workers in args.workers:
+        for threads in args.threads:
+            row = run_config(workers, threads, args.duration, args.pin)
+            rows.append(row)
+            print(f"{workers:>7} {threads:>7} {row['throughput_ips']:>8.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+        print(f"\nSaved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure CPU data-parallel training scaling for 1/2/4/8 processes.
+
+Each process count trains the Phase 2 (fine-tuning) configuration with
+DistributedDataParallel on the gloo backend, reading the pre-decoded shard
+cache so JPEG decoding does not mask the scaling. Cores are split evenly
+between processes. Reports global images/sec, speed-up and scaling
+efficiency against the single-process run.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/benchmark_data_parallel.py
+    python scripts/benchmark_data_parallel.py --processes 1 2 4 --samples 1024 --epochs 2
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+from torch.utils.data import Subset
+from torchvision import transforms
+
+from src.config import BATCH_SIZE, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, METRICS_DIR, SHARD_CACHE_DIR
+from src.data.shard_cache import ShardDataset
+from src.training.distributed import measure_scaling
+
+TENSOR_TRANSFORM = transforms.Compose([
+    transforms.ConvertImageDtype(torch.float32),
+    transforms.Resize((IMG_SIZE, IMG_SIZE), antialias=True),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+
+
+class ShardSubset:
+    """Picklable dataset factory: the first ``samples`` shard images for training."""
+
+    def __init__(self, cache_dir, samples):
+        self.cache_dir = cache_dir
+        self.samples = samples
+
+    def __call__(self):
+        dataset = ShardDataset(self.cache_dir, transform=TENSOR_TRANSFORM, output="tensor")
+        train = Subset(dataset, range(min(self.samples, len(dataset))))
+        return train, Subset(dataset, range(0)), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=2048, help="Training images per epoch")
+    parser.add_argument("--epochs", type=int, default=1, help="Timed epochs (after one warm-up)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Global batch size")
+    parser.add_argument("--threads", type=int, help="Threads per process (default: cores / processes)")
+    parser.add_argument("--output", type=Path, default=METRICS_DIR / "data_parallel_scaling.json")
+    args = parser.parse_args()
+
+    num_classes = len(ShardDataset(args.cache_dir).classes)
+    print(f"Scaling on {os.cpu_count()} cores, {args.samples} images/epoch, "
+          f"global batch {args.batch_size}")
+    results = measure_scaling(ShardSubset(args.cache_dir, args.samples), num_classes,
+                              world_sizes=args.processes, batch_size=args.batch_size,
+                              epochs=args.epochs, threads=args.threads)
+
+    print(f"\n{'processes':>9} {'img/s':>8} {'speedup':>8} {'efficiency':>10}")
+    for r in results:
+        print(f"{r['processes']:>9} {r['images_per_sec']:>8.1f} {r['speedup']:>7.2f}x "
+              f"{r['efficiency']:>9.0%}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({"cpu_count": os.cpu_count(), "samples": args.samples,
+                                       "batch_size": args.batch_size, "results": results}, indent=2))
+    print(f"\nSaved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
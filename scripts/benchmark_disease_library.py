@@ -0,0 +1,120 @@
+"""
+Benchmark throughput of the disease library endpoints.
+
+Compares the precomputed/ETag responses served by api/routers/diseases.py
+("after") against the previous implementation that rebuilt Pydantic models
+and re-serialized them on every call ("before"). Both run in-process
+through the ASGI stack, so the numbers exclude network and server workers.
+
+Usage:
+    cd crop-prediction
+    python scripts/benchmark_disease_library.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx
+from fastapi import FastAPI, Query
+
+from api.routers import diseases
+from api.schemas.disease import DiseaseDetailResponse, DiseaseListResponse
+from src.data.disease_info import DISEASE_DETAILS
+
+ENDPOINTS = {
+    "list": "/api/v1/diseases",
+    "list_crop": "/api/v1/diseases?crop=Tomato",
+    "detail": "/api/v1/diseases/Tomato: Early Blight",
+}
+
+
+def _legacy_app() -> FastAPI:
+    """The pre-cache handlers, rebuilt here so both variants can be timed side by side."""
+    app = FastAPI()
+
+    @app.get("/api/v1/diseases", response_model=DiseaseListResponse)
+    def list_diseases(crop: str | None = Query(None)):
+        items = []
+        for name, details in DISEASE_DETAILS.items():
+            if crop and details["crop"].lower() != crop.lower():
+                continue
+            items.append(DiseaseDetailResponse(name=name, **details))
+        return DiseaseListResponse(count=len(items), diseases=items)
+
+    @app.get("/api/v1/diseases/{disease_name}", response_model=DiseaseDetailResponse)
+    def get_disease(disease_name: str):
+        return DiseaseDetailResponse(name=disease_name, **DISEASE_DETAILS[disease_name])
+
+    return app
+
+
+def _cached_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(diseases.router, prefix="/api/v1")
+    return app
+
+
+async def _measure(app: FastAPI, url: str, n: int, revalidate: bool) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(url)
+        headers = {}
+        if revalidate and "etag" in first.headers:
+            headers["If-None-Match"] = first.headers["etag"]
+
+        start = time.perf_counter()
+        for _ in range(n):
+            r = await client.get(url, headers=headers)
+            assert r.status_code in (200, 304), r.status_code
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_sec": n / elapsed,
+        "mean_ms": elapsed / n * 1000,
+        "status": r.status_code,
+        "body_bytes": len(first.content),
+    }
+
+
+async def run(n: int) -> dict:
+    legacy, cached = _legacy_app(), _cached_app()
+    report = {}
+    for name, url in ENDPOINTS.items():
+        before = await _measure(legacy, url, n, revalidate=False)
+        after = await _measure(cached, url, n, revalidate=False)
+        after_304 = await _measure(cached, url, n, revalidate=True)
+        report[name] = {
+            "before": before,
+            "after": after,
+            "after_304": after_304,
+            "speedup": after["requests_per_sec"] / before["requests_per_sec"],
+        }
+        print(f"  {name:<10} before {before['requests_per_sec']:>8.0f} req/s | "
+              f"after {after['requests_per_sec']:>8.0f} req/s | "
+              f"304 {after_304['requests_per_sec']:>8.0f} req/s "
+              f"({report[name]['speedup']:.1f}x)")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint variant")
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    print(f"Benchmarking disease library ({args.requests} requests per variant) ...")
+    report = asyncio.run(run(args.requests))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
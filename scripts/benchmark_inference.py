@@ -0,0 +1,55 @@
+"""
+Run the CPU inference benchmark matrix and save it for the dashboard.
+
+Sweeps backend (PyTorch eager, ONNX Runtime, TFLite), batch size, thread
+count and input source (synthetic tensor vs JPEG decode + preprocess).
+Exported backends are used when exports/ contains them (run
+scripts/export_model.py first) and their runtime is installed; otherwise
+they are reported as skipped.
+
+Usage:
+    cd crop-prediction
+    python scripts/benchmark_inference.py
+    python scripts/benchmark_inference.py --backends torch tflite --batch-sizes 1 \\
+        --threads 1 2 4 --images data/processed --iterations 100
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import BENCHMARK_PATH
+from src.evaluation.benchmark import BACKENDS, INPUT_SOURCES, run_benchmark_matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--inputs", nargs="+", choices=INPUT_SOURCES, default=list(INPUT_SOURCES))
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--model", type=Path, help="PyTorch checkpoint (default: checkpoints/best_model.pth)")
+    parser.add_argument("--images", type=Path, help="JPEG directory for the jpeg input (default: data/processed)")
+    parser.add_argument("--output", type=Path, default=BENCHMARK_PATH)
+    args = parser.parse_args()
+
+    run_benchmark_matrix(
+        backends=args.backends,
+        batch_sizes=args.batch_sizes,
+        threads=args.threads,
+        inputs=args.inputs,
+        warmup=args.warmup,
+        iterations=args.iterations,
+        model_path=args.model,
+        image_dir=args.images,
+        output_path=args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Build (or incrementally update) the dataset manifest for the selected classes.
+
+Scans the 15 SELECTED_CLASSES directories under DATA_DIR in parallel and
+records path, class, size, mtime and sha1 of every image in
+data/manifest.json. Re-runs only hash new or changed files. The manifest
+replaces copying the classes into data/processed: ManifestDataset,
+class_counts, stratified_split, the data plots and
+build_shard_cache.py --from-manifest all read it instead of the filesystem.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_manifest.py
+    python scripts/build_manifest.py --rebuild --workers 16
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import DATA_DIR, MANIFEST_PATH
+from src.data.manifest import build_manifest, class_counts, stratified_split
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, default=DATA_DIR)
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, help="Scan/hash threads (default: Python's)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-hash every file")
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.source, manifest_path=args.manifest, workers=args.workers,
+                              rebuild=args.rebuild)
+    train_indices, val_indices = stratified_split(manifest)
+    print(f"\n{'class':<28} {'images':>7}")
+    for name, count in class_counts(manifest).items():
+        print(f"{name:<28} {count:>7}")
+    print(f"\nStratified 80/20 split: {len(train_indices)} train, {len(val_indices)} val")
+
+
+if __name__ == "__main__":
+    main()
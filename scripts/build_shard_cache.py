@@ -0,0 +1,97 @@
+"""
+Build (or incrementally update) the pre-decoded image shard cache.
+
+Decodes every image under data/processed once, resizes it to SHARD_IMG_SIZE
+and stores uint8 pixels in memory-mapped shards under data/shards. Re-runs
+only decode new or changed files; rows left stale by changed or deleted
+files are reported and compacted away once they pass SHARD_MAX_STALE of
+the cache (--max-stale). With --from-manifest the images listed in
+data/manifest.json are read straight from DATA_DIR instead, so nothing has
+to be copied into data/processed first. With --benchmark, data-pipeline
+samples/sec is measured for JPEG decoding (ImageFolder) and for the shards,
+using the same train- and val-style transforms.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/build_shard_cache.py --benchmark --workers 0 4 --samples 2000
+    python scripts/build_shard_cache.py --from-manifest
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from torch.utils.data import DataLoader, Subset
+from torchvision import datasets, transforms
+
+from src.config import (
+    BATCH_SIZE, FILTERED_DIR, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, SHARD_CACHE_DIR,
+    SHARD_IMG_SIZE, SHARD_MAX_STALE,
+)
+from src.data.manifest import ManifestDataset, ensure_manifest
+from src.data.shard_cache import ShardDataset, build_shard_cache
+
+# Mirrors the training augmentation (flips, rotation, zoom, colour jitter)
+TRAIN_TRANSFORM = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.RandomHorizontalFlip(),
+    transforms.RandomRotation(20),
+    transforms.RandomAffine(0, scale=(0.8, 1.2)),
+    transforms.ColorJitter(brightness=0.1, contrast=0.1),
+    transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+VAL_TRANSFORM = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+
+
+def samples_per_second(dataset, workers, samples):
+    subset = Subset(dataset, range(min(samples, len(dataset))))
+    loader = DataLoader(subset, batch_size=BATCH_SIZE, shuffle=False, num_workers=workers)
+    start = time.perf_counter()
+    count = sum(images.size(0) for images, _ in loader)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, default=FILTERED_DIR)
+    parser.add_argument("--from-manifest", action="store_true",
+                        help="Read the files listed in the manifest instead of --source")
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--size", type=int, default=SHARD_IMG_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="Discard existing shards first")
+    parser.add_argument("--max-stale", type=float, default=SHARD_MAX_STALE,
+                        help="Stale-row fraction that triggers compaction (0 = always compact)")
+    parser.add_argument("--benchmark", action="store_true", help="Report samples/sec before and after")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4], help="DataLoader workers")
+    parser.add_argument("--samples", type=int, default=2000, help="Images per benchmark pass")
+    args = parser.parse_args()
+
+    manifest = ensure_manifest() if args.from_manifest else None
+    build_shard_cache(args.source, args.cache_dir, args.size, rebuild=args.rebuild, manifest=manifest,
+                      max_stale=args.max_stale)
+    if not args.benchmark:
+        return
+
+    print(f"\n{'pipeline':<8} {'workers':>7} {'JPEG img/s':>11} {'shard img/s':>12} {'speedup':>8}")
+    for name, transform in (("train", TRAIN_TRANSFORM), ("val", VAL_TRANSFORM)):
+        jpeg = ManifestDataset(manifest=manifest, transform=transform) if manifest \
+            else datasets.ImageFolder(str(args.source), transform=transform)
+        shards = ShardDataset(args.cache_dir, transform=transform)
+        for workers in args.workers:
+            before = samples_per_second(jpeg, workers, args.samples)
+            after = samples_per_second(shards, workers, args.samples)
+            print(f"{name:<8} {workers:>7} {before:>11.0f} {after:>12.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Pack the dataset into sequential tar shards for streaming from slow or remote storage.
+
+Writes the stratified 80/20 split of data/manifest.json (or a seeded
+random_split of --source) into data/tar_shards/train and data/tar_shards/val:
+TAR_SHARD_SAMPLES images per shard-NNNNNN.tar, original JPEG bytes plus a
+.cls label member per image, WebDataset layout. TarShardDataset reads them
+front to back with shard- and buffer-level shuffling, split across DDP
+ranks and DataLoader workers, in place of ImageFolder. With --benchmark,
+shuffled samples/sec is measured for ImageFolder random access and for the
+tar stream, with the same transform.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_tar_shards.py
+    python scripts/build_tar_shards.py --source data/processed --shard-samples 500
+    python scripts/build_tar_shards.py --benchmark --workers 0 4 --samples 2000
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+from torch.utils.data import DataLoader
+from torchvision import datasets, transforms
+
+from src.config import (
+    BATCH_SIZE, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, SEED, TAR_SHARD_DIR, TAR_SHARD_SAMPLES,
+)
+from src.data.manifest import ManifestDataset, ensure_manifest, stratified_split
+from src.data.tar_shards import TarShardDataset, write_tar_shards
+
+TRANSFORM = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+
+
+def split_samples(source):
+    """(classes, train samples, val samples) from the manifest or an ImageFolder root."""
+    if source is None:
+        manifest = ensure_manifest()
+        dataset = ManifestDataset(manifest=manifest)
+        train_indices, val_indices = stratified_split(manifest)
+    else:
+        dataset = datasets.ImageFolder(str(source))
+        order = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(SEED)).tolist()
+        n_val = len(dataset) // 5
+        train_indices, val_indices = order[n_val:], order[:n_val]
+    samples = dataset.samples
+    return (dataset.classes, [samples[i] for i in train_indices],
+            [samples[i] for i in val_indices])
+
+
+def samples_per_second(loader, samples):
+    start = time.perf_counter()
+    count = 0
+    for images, _ in itertools.islice(loader, (samples + BATCH_SIZE - 1) // BATCH_SIZE):
+        count += images.size(0)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, help="ImageFolder root (default: the manifest)")
+    parser.add_argument("--out-dir", type=Path, default=TAR_SHARD_DIR)
+    parser.add_argument("--shard-samples", type=int, default=TAR_SHARD_SAMPLES)
+    parser.add_argument("--benchmark", action="store_true", help="Report samples/sec before and after")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4], help="DataLoader workers")
+    parser.add_argument("--samples", type=int, default=2000, help="Images per benchmark pass")
+    args = parser.parse_args()
+
+    classes, train_samples, val_samples = split_samples(args.source)
+    for split, samples in (("train", train_samples), ("val", val_samples)):
+        write_tar_shards(samples, classes, args.out_dir / split, args.shard_samples)
+    if not args.benchmark:
+        return
+
+    folder = ManifestDataset(transform=TRANSFORM) if args.source is None \
+        else datasets.ImageFolder(str(args.source), transform=TRANSFORM)
+    stream = TarShardDataset(args.out_dir / "train", transform=TRANSFORM, shuffle=True)
+    print(f"\n{'workers':>7} {'ImageFolder img/s':>18} {'tar img/s':>10} {'speedup':>8}")
+    for workers in args.workers:
+        before = samples_per_second(DataLoader(
+            folder, batch_size=BATCH_SIZE, shuffle=True, num_workers=workers,
+            generator=torch.Generator().manual_seed(SEED)), args.samples)
+        after = samples_per_second(DataLoader(
+            stream, batch_size=BATCH_SIZE, num_workers=workers), args.samples)
+        print(f"{workers:>7} {before:>18.0f} {after:>10.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Build the uint8 validation tensor cache and measure per-epoch validation time.
+
+Decodes, resizes and normalizes the validation split once (stratified 80/20
+split of data/manifest.json, or a seeded random_split of --source) and
+stores the pixels as a uint8 memmap under data/val_cache. It is rebuilt
+automatically when the image list or the preprocessing changes.
+train_model(val_cache=True) and collect_predictions read the same cache.
+With --benchmark, one validation pass (data only, and evaluate() with
+MobileNetV2) is timed over JPEG decoding and over the cache.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_val_cache.py
+    python scripts/build_val_cache.py --benchmark --workers 0 4
+    python scripts/build_val_cache.py --source data/processed --in-memory --benchmark
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Subset, random_split
+from torchvision import datasets, transforms
+
+from src.config import BATCH_SIZE, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, SEED, VAL_CACHE_DIR
+from src.data.manifest import ManifestDataset, ensure_manifest, stratified_split
+from src.data.val_cache import ValTensorCache
+from src.models.classifier import build_model
+from src.training.trainer import evaluate
+from src.training.loaders import pick_device
+
+VAL_TRANSFORM = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+
+
+def val_dataset(source):
+    if source is None:
+        manifest = ensure_manifest()
+        _, val_indices = stratified_split(manifest)
+        return Subset(ManifestDataset(manifest=manifest, transform=VAL_TRANSFORM), val_indices)
+    dataset = datasets.ImageFolder(str(source), transform=VAL_TRANSFORM)
+    n_val = len(dataset) // 5
+    _, val_set = random_split(dataset, [len(dataset) - n_val, n_val],
+                              generator=torch.Generator().manual_seed(SEED))
+    return val_set
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--source", type=Path, help="ImageFolder root (default: the manifest)")
+    parser.add_argument("--cache-dir", type=Path, default=VAL_CACHE_DIR)
+    parser.add_argument("--in-memory", action="store_true", help="Load the cache into RAM")
+    parser.add_argument("--benchmark", action="store_true", help="Time a validation pass before and after")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 4], help="DataLoader workers")
+    args = parser.parse_args()
+
+    dataset = val_dataset(args.source)
+    cache = ValTensorCache.build(dataset, args.cache_dir, batch_size=BATCH_SIZE,
+                                 num_workers=max(args.workers), in_memory=args.in_memory)
+    print(f"Validation cache: {cache.num_images} images, "
+          f"{cache.images.nbytes / 2**20:.0f} MiB ({cache.kind}) -> {args.cache_dir}")
+    if not args.benchmark:
+        return
+
+    device = pick_device()
+    model, _, _ = build_model(len(dataset.dataset.classes), device, pretrained=False)
+    criterion = nn.CrossEntropyLoss()
+    cached = cache.loader(BATCH_SIZE)
+    evaluate(model, cached, criterion, device)  # untimed warm-up
+    cached_data = timed(lambda: sum(images.size(0) for images, _ in cached))
+    cached_eval = timed(lambda: evaluate(model, cached, criterion, device))
+
+    print(f"\n{'loader':<12} {'workers':>7} {'data s':>7} {'evaluate s':>11} {'speedup':>8}")
+    print(f"{'cache':<12} {'-':>7} {cached_data:>7.2f} {cached_eval:>11.2f} {'':>8}")
+    for workers in args.workers:
+        loader = DataLoader(dataset, batch_size=BATCH_SIZE, num_workers=workers,
+                            pin_memory=device.type == "cuda")
+        data = timed(lambda: sum(images.size(0) for images, _ in loader))
+        eval_s = timed(lambda: evaluate(model, loader, criterion, device))
+        print(f"{'JPEG':<12} {workers:>7} {data:>7.2f} {eval_s:>11.2f} {eval_s / cached_eval:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
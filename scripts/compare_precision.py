@@ -0,0 +1,85 @@
+"""
+Compare training throughput and accuracy across precision modes.
+
+Runs the two-phase training pipeline once per mode from the same seed and
+data split (pre-decoded shards + BatchAugment, so the data pipeline is not
+the bottleneck) and reports mean training images/sec and best validation
+accuracy relative to the fp32 run. Modes are fp32, bf16 or fp16, with an
+optional "-cl" suffix for channels-last. Checkpoints go to a temporary
+directory; checkpoints/best_model.pth is left untouched.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/compare_precision.py
+    python scripts/compare_precision.py --modes fp32 fp32-cl bf16-cl --samples 1000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+
+from src.config import METRICS_DIR, SEED, SHARD_CACHE_DIR
+from src.data.batch_augment import BatchAugment
+from src.models.classifier import build_model
+from src.training.loaders import pick_device, shard_splits, split_loaders
+from src.training.trainer import train_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=["fp32", "fp32-cl", "bf16", "bf16-cl"])
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=2000, help="Images used (0 = all)")
+    parser.add_argument("--no-pretrained", action="store_true", help="Random init (offline)")
+    parser.add_argument("--output", type=Path, default=METRICS_DIR / "precision_comparison.json")
+    args = parser.parse_args()
+
+    device = pick_device()
+    classes, train_set, val_set = shard_splits(args.cache_dir, args.samples)
+    num_classes = len(classes)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            precision, _, layout = mode.partition("-")
+            print(f"\n=== {mode} on {device} ===")
+            torch.manual_seed(SEED)
+            train_loader, val_loader = split_loaders(train_set, val_set, device)
+            model, _, _ = build_model(num_classes, device, pretrained=not args.no_pretrained)
+            history, best_val_acc, _ = train_model(
+                model, train_loader, val_loader, None, device,
+                train_batch_transform=BatchAugment(), val_batch_transform=BatchAugment(augment=False),
+                precision=precision, channels_last=layout == "cl",
+                checkpoint_path=Path(tmp) / f"{mode}.pth",
+            )
+            rates = history["train_images_per_sec"]
+            results.append({
+                "mode": mode, "precision": history["precision"],
+                "channels_last": history["channels_last"], "epochs": len(rates),
+                "train_images_per_sec": sum(rates) / len(rates), "best_val_acc": best_val_acc,
+            })
+
+    baseline = next((r for r in results if r["mode"] == "fp32"), results[0])
+    print(f"\n{'mode':<10} {'epochs':>6} {'img/s':>8} {'speedup':>8} {'best val':>9} {'Δ acc':>7}")
+    for r in results:
+        r["speedup"] = r["train_images_per_sec"] / baseline["train_images_per_sec"]
+        r["val_acc_delta"] = r["best_val_acc"] - baseline["best_val_acc"]
+        print(f"{r['mode']:<10} {r['epochs']:>6} {r['train_images_per_sec']:>8.1f} "
+              f"{r['speedup']:>7.2f}x {r['best_val_acc']:>9.4f} {r['val_acc_delta']:>+7.4f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({"device": str(device), "baseline": baseline["mode"],
+                                       "results": results}, indent=2))
+    print(f"\nSaved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
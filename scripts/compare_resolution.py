@@ -0,0 +1,101 @@
+"""
+Compare wall-clock time to a target accuracy with and without progressive resolution.
+
+Runs the two-phase training pipeline once per Phase 2 resolution schedule
+from the same seed and data split (pre-decoded shards + BatchAugment) and
+reports the cumulative training + validation time until validation
+accuracy first reaches the target, against the fixed-224 baseline. If the
+baseline never reaches the target (e.g. on a small subset), its best
+validation accuracy is used as the target instead. Checkpoints go to a
+temporary directory; checkpoints/best_model.pth is left untouched.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/compare_resolution.py
+    python scripts/compare_resolution.py --schedules 224 128,176,224 160,224 --scale-batch
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+
+from src.config import METRICS_DIR, SEED, SHARD_CACHE_DIR
+from src.data.batch_augment import BatchAugment
+from src.models.classifier import build_model
+from src.training.resolution import time_to_accuracy
+from src.training.loaders import pick_device, shard_splits, split_loaders
+from src.training.trainer import train_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--schedules", nargs="+", default=["224", "128,176,224"],
+                        help="Comma-separated Phase 2 sizes per run; the first is the baseline")
+    parser.add_argument("--scale-batch", action="store_true",
+                        help="Grow the batch at smaller sizes to keep memory constant")
+    parser.add_argument("--target", type=float, default=0.978, help="Validation accuracy to reach")
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=2000, help="Images used (0 = all)")
+    parser.add_argument("--no-pretrained", action="store_true", help="Random init (offline)")
+    parser.add_argument("--output", type=Path, default=METRICS_DIR / "resolution_comparison.json")
+    args = parser.parse_args()
+
+    device = pick_device()
+    classes, train_set, val_set = shard_splits(args.cache_dir, args.samples)
+    num_classes = len(classes)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.schedules:
+            schedule = tuple(int(size) for size in name.split(","))
+            print(f"\n=== {name} on {device} ===")
+            torch.manual_seed(SEED)
+            train_loader, val_loader = split_loaders(train_set, val_set, device)
+            model, _, _ = build_model(num_classes, device, pretrained=not args.no_pretrained)
+            history, best_val_acc, _ = train_model(
+                model, train_loader, val_loader, None, device,
+                train_batch_transform=BatchAugment(), val_batch_transform=BatchAugment(augment=False),
+                resolution_schedule=schedule if len(schedule) > 1 else None,
+                scale_batch=args.scale_batch, checkpoint_path=Path(tmp) / f"{len(runs)}.pth",
+            )
+            runs.append({"schedule": name, "history": history, "best_val_acc": best_val_acc})
+
+    baseline = runs[0]
+    target = args.target
+    if time_to_accuracy(baseline["history"], target) is None:
+        target = baseline["best_val_acc"]
+        print(f"\nBaseline never reached {args.target:.4f}; using its best, {target:.4f}")
+
+    results = []
+    base_time = time_to_accuracy(baseline["history"], target)
+    print(f"\n{'schedule':<14} {'epochs':>6} {'total s':>8} {'to target':>10} {'speedup':>8} {'best val':>9}")
+    for run in runs:
+        history = run["history"]
+        seconds = time_to_accuracy(history, target)
+        r = {
+            "schedule": run["schedule"], "epochs": len(history["val_acc"]),
+            "total_seconds": sum(history["epoch_s"]), "seconds_to_target": seconds,
+            "speedup": base_time / seconds if seconds else None, "best_val_acc": run["best_val_acc"],
+        }
+        results.append(r)
+        to_target = f"{seconds:>9.0f}s" if seconds is not None else f"{'—':>10}"
+        speedup = f"{r['speedup']:>7.2f}x" if r["speedup"] else f"{'—':>8}"
+        print(f"{r['schedule']:<14} {r['epochs']:>6} {r['total_seconds']:>7.0f}s {to_target} "
+              f"{speedup} {r['best_val_acc']:>9.4f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({"device": str(device), "target": target,
+                                       "scale_batch": args.scale_batch, "results": results}, indent=2))
+    print(f"\nSaved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
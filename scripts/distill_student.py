@@ -0,0 +1,131 @@
+"""
+Distill the trained MobileNetV2 into a smaller student model for low-end phones.
+
+Uses checkpoints/best_model.pth as a frozen teacher and trains a student
+(STUDENT_ARCH: mobilenet_v3_small, or mobilenet_v2_050 for MobileNetV2 at
+width 0.5) with the two-phase pipeline on a blend of the teacher's
+temperature-softened predictions and the hard labels. Data comes from the
+pre-decoded shard cache with BatchAugment and a seeded 80/20 split. The
+student is saved to checkpoints/student_model.pth, which loads in
+DiseasePredictor and scripts/export_model.py --checkpoint. The report puts
+teacher and student side by side: validation accuracy, parameters,
+checkpoint size and batch-1 CPU latency.
+
+Note: the split is drawn from the shard cache, so the teacher may have
+trained on some of these validation images; compare students against each
+other, and the teacher's figure as an upper reference.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/distill_student.py
+    python scripts/distill_student.py --arch mobilenet_v2_050 --temperature 3 --alpha 0.5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+import torch.nn as nn
+
+from src.config import (
+    DISTILL_ALPHA, DISTILL_REPORT_PATH, DISTILL_TEMPERATURE, IMG_SIZE, MODEL_PATH, SEED,
+    SHARD_CACHE_DIR, STUDENT_ARCH, STUDENT_MODEL_PATH,
+)
+from src.data.batch_augment import BatchAugment
+from src.models.classifier import ARCHITECTURES, build_model, infer_arch, load_checkpoint_model
+from src.training.distill import distill
+from src.training.loaders import pick_device, shard_splits, split_loaders
+from src.training.trainer import evaluate
+
+
+def cpu_latency_ms(model, threads, warmup=10, iterations=50):
+    """Median batch-1 CPU latency in ms at ``threads`` intra-op threads."""
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    model = model.to("cpu").eval()
+    image = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    timings = []
+    with torch.inference_mode():
+        for i in range(warmup + iterations):
+            start = time.perf_counter()
+            model(image)
+            if i >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+    torch.set_num_threads(previous)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--arch", choices=sorted(ARCHITECTURES), default=STUDENT_ARCH)
+    parser.add_argument("--teacher", type=Path, default=MODEL_PATH)
+    parser.add_argument("--temperature", type=float, default=DISTILL_TEMPERATURE)
+    parser.add_argument("--alpha", type=float, default=DISTILL_ALPHA,
+                        help="Weight of the soft-target loss")
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=0, help="Images used (0 = all)")
+    parser.add_argument("--threads", type=int, default=1, help="CPU threads for the latency test")
+    parser.add_argument("--no-pretrained", action="store_true", help="Random-init student (offline)")
+    parser.add_argument("--checkpoint", type=Path, default=STUDENT_MODEL_PATH)
+    parser.add_argument("--output", type=Path, default=DISTILL_REPORT_PATH)
+    args = parser.parse_args()
+
+    device = pick_device()
+    classes, train_set, val_set = shard_splits(args.cache_dir, args.samples)
+    num_classes = len(classes)
+    train_loader, val_loader = split_loaders(train_set, val_set, device)
+    val_transform = BatchAugment(augment=False)
+
+    teacher = load_checkpoint_model(args.teacher, device)
+    torch.manual_seed(SEED)
+    pretrained = not args.no_pretrained and ARCHITECTURES[args.arch][2] is not None
+    student, _, _ = build_model(num_classes, device, pretrained=pretrained, arch=args.arch)
+    # Without ImageNet weights a frozen backbone has nothing to offer: fine-tune all blocks
+    hparams = None if pretrained else {"unfreeze_blocks": len(student.features)}
+    print(f"\nDistilling {args.teacher.name} into {args.arch} "
+          f"(T={args.temperature}, alpha={args.alpha}) on {device}")
+    distill(student, teacher, train_loader, val_loader, None, device,
+            temperature=args.temperature, alpha=args.alpha, hparams=hparams,
+            train_batch_transform=BatchAugment(), val_batch_transform=val_transform,
+            checkpoint_path=args.checkpoint, state_path=None)
+
+    print("\nEvaluating teacher and student ...")
+    criterion = nn.CrossEntropyLoss()
+    results = []
+    for name, path in (("teacher", args.teacher), ("student", args.checkpoint)):
+        model = load_checkpoint_model(path, device)
+        _, val_acc = evaluate(model, val_loader, criterion, device, val_transform)
+        results.append({
+            "model": name, "arch": infer_arch(model.state_dict()), "checkpoint": str(path),
+            "val_acc": val_acc, "params": sum(p.numel() for p in model.parameters()),
+            "size_mb": path.stat().st_size / (1024 * 1024),
+            "cpu_latency_ms": cpu_latency_ms(model, args.threads),
+        })
+
+    teacher_row = results[0]
+    print(f"\n{'model':<8} {'arch':<18} {'val acc':>8} {'params':>10} {'size MB':>8} "
+          f"{'CPU ms':>7} {'speedup':>8}")
+    for r in results:
+        r["speedup"] = teacher_row["cpu_latency_ms"] / r["cpu_latency_ms"]
+        print(f"{r['model']:<8} {r['arch']:<18} {r['val_acc']:>8.4f} {r['params']:>10,} "
+              f"{r['size_mb']:>8.1f} {r['cpu_latency_ms']:>7.1f} {r['speedup']:>7.2f}x")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "student_arch": args.arch, "temperature": args.temperature, "alpha": args.alpha,
+        "latency_threads": args.threads, "results": results,
+    }, indent=2))
+    print(f"\nSaved: {args.output}")
+    print(f"Export for mobile: python scripts/export_model.py --checkpoint {args.checkpoint}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,15 @@ Usage:
     cd crop-prediction
     pip install torch torchvision onnx==1.16.2 onnx2tf tensorflow
     python scripts/export_model.py
+    python scripts/export_model.py --checkpoint checkpoints/student_model.pth   # distilled student
 
 Output:
     exports/crop_disease_classifier.tflite          (canonical export)
+    exports/crop_disease_classifier.onnx            (intermediate, kept for benchmarking)
     mobile/assets/model/crop_disease_classifier.tflite  (copy for Metro bundling)
 """
 
+import argparse
 import sys
 import shutil
 import tempfile
@@ -25,22 +28,19 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import torch
-from src.models.classifier import build_model
+from src.models.classifier import load_checkpoint_model
 from src.config import MODEL_PATH, IMG_SIZE
 
 EXPORTS_DIR = PROJECT_ROOT / "exports"
 TFLITE_PATH = EXPORTS_DIR / "crop_disease_classifier.tflite"
+ONNX_PATH = EXPORTS_DIR / "crop_disease_classifier.onnx"
 MOBILE_MODEL_DIR = PROJECT_ROOT / "mobile" / "assets" / "model"
 
 
-def export():
+def export(checkpoint_path=MODEL_PATH):
     print("Loading trained model ...")
-    model, _, _ = build_model(num_classes=15, device=torch.device("cpu"))
-    model.load_state_dict(
-        torch.load(str(MODEL_PATH), map_location="cpu", weights_only=True)
-    )
-    model.eval()
-    print(f"  Checkpoint: {MODEL_PATH}")
+    model = load_checkpoint_model(checkpoint_path)
+    print(f"  Checkpoint: {checkpoint_path} ({type(model).__name__})")
 
     EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -60,7 +60,8 @@ def export():
             dynamo=False,
         )
         onnx_size = onnx_path.stat().st_size / (1024 * 1024)
-        print(f"  ONNX: {onnx_path} ({onnx_size:.1f} MB)")
+        shutil.copy2(str(onnx_path), str(ONNX_PATH))
+        print(f"  ONNX: {ONNX_PATH} ({onnx_size:.1f} MB)")
 
         # Step 2: ONNX → TFLite (via onnx2tf)
         print("\nStep 2: Converting ONNX → TFLite (via onnx2tf) ...")
@@ -131,4 +132,7 @@ def export():
 
 
 if __name__ == "__main__":
-    export()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checkpoint", type=Path, default=MODEL_PATH,
+                        help="Teacher or distilled student checkpoint to export")
+    export(parser.parse_args().checkpoint)
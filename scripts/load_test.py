@@ -0,0 +1,377 @@
+"""
+Load-test the API and report throughput, latency percentiles and error rates.
+
+Drives a mix of /predict, /diseases and WhatsApp webhook requests from N
+concurrent clients for a fixed duration. By default the app runs in-process
+(httpx ASGITransport, lifespan included); pass --url to target a running
+server instead. WhatsApp media is served by a stub HTTP server started by
+this script, so no Twilio account is needed. Prediction images are real
+JPEGs: files from --images if given, otherwise synthetic leaf-sized photos
+encoded at several resolutions.
+
+In-process runs raise the per-IP and per-number rate limits so they do not
+dominate the results; start a remote server with the same settings, e.g.
+PREDICT_RATE_LIMIT_PER_MINUTE=1000000, and with its TWILIO_AUTH_TOKEN
+passed as --twilio-auth-token (or signature validation disabled).
+
+Usage:
+    cd crop-prediction
+    python scripts/load_test.py --concurrency 8 --duration 30
+    python scripts/load_test.py --mix predict=0.5,diseases=0.4,whatsapp=0.1 \\
+        --images data/processed --slo predict=500,diseases=20 --output load.json
+    python scripts/load_test.py --url http://localhost:8000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from io import BytesIO
+from pathlib import Path
+from xml.etree import ElementTree
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx
+import numpy as np
+from PIL import Image
+
+ENDPOINTS = ("predict", "diseases", "whatsapp")
+IN_PROCESS_URL = "http://testserver"
+LOAD_TEST_AUTH_TOKEN = "load-test-token"
+
+
+# ── Inputs ───────────────────────────────────────────────────────
+
+def parse_pairs(text, cast=float):
+    """Parse ``"predict=0.6,diseases=0.3"`` into a dict, validating names."""
+    pairs = {}
+    for item in filter(None, text.split(",")):
+        name, _, value = item.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (choose from {ENDPOINTS})")
+        pairs[name] = cast(value)
+    return pairs
+
+
+def synthetic_jpeg(width, height, rng):
+    """A smooth, photo-like JPEG: upscaled colour noise compresses like a real leaf photo."""
+    base = rng.integers(0, 256, (max(height // 32, 2), max(width // 32, 2), 3), dtype=np.uint8)
+    image = Image.fromarray(base).resize((width, height), Image.BICUBIC)
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def load_images(images_dir, sizes, count, seed):
+    """Return ``count`` JPEG payloads from ``images_dir`` or synthesised at ``sizes``."""
+    rng = np.random.default_rng(seed)
+    if images_dir:
+        paths = sorted(
+            p for p in Path(images_dir).rglob("*") if p.suffix.lower() in {".jpg", ".jpeg"}
+        )
+        if not paths:
+            raise SystemExit(f"No JPEG files found under {images_dir}")
+        chosen = rng.choice(len(paths), size=min(count, len(paths)), replace=False)
+        return [paths[i].read_bytes() for i in sorted(chosen)]
+    return [synthetic_jpeg(*sizes[i % len(sizes)], rng) for i in range(count)]
+
+
+class MediaServer:
+    """Stub for Twilio's media host: serves the test JPEGs at /media/<index>."""
+
+    def __init__(self, images):
+        images_ref = images
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    body = images_ref[int(self.path.rsplit("/", 1)[-1])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url_for(self, index):
+        return f"{self.base_url}/media/{index}"
+
+
+# ── Requests ─────────────────────────────────────────────────────
+
+def _whatsapp_error_labels():
+    from api.schemas import whatsapp as messages
+
+    # The webhook always answers 200 with TwiML; failures are told apart by reply text
+    return {
+        messages.ERROR_BUSY_MSG: "busy",
+        messages.ERROR_DOWNLOAD_MSG: "download_failed",
+        messages.ERROR_INVALID_IMAGE_MSG: "invalid_image",
+        messages.ERROR_RATE_LIMITED_MSG: "rate_limited",
+        messages.ERROR_GENERIC_MSG: "generic_error",
+        messages.ERROR_NON_IMAGE_MSG: "non_image",
+    }
+
+
+class LoadContext:
+    """Shared state for the client workers: payloads, disease names, signing."""
+
+    def __init__(self, base_url, images, media, disease_names, auth_token, seed):
+        self.base_url = base_url
+        self.images = images
+        self.media = media
+        self.disease_names = disease_names
+        self.error_labels = _whatsapp_error_labels()
+        self.rng = random.Random(seed)
+        self.validator = None
+        if auth_token:
+            from twilio.request_validator import RequestValidator
+
+            self.validator = RequestValidator(auth_token)
+
+    async def predict(self, client):
+        image = self.rng.choice(self.images)
+        response = await client.post(
+            "/api/v1/predict",
+            params={"top_k": 3},
+            files={"file": ("leaf.jpg", image, "image/jpeg")},
+        )
+        return response.status_code, None if response.is_success else str(response.status_code)
+
+    async def diseases(self, client):
+        if self.rng.random() < 0.5:
+            response = await client.get(
+                "/api/v1/diseases", params={"crop": self.rng.choice(["Corn", "Potato", "Tomato"])}
+            )
+        else:
+            response = await client.get(f"/api/v1/diseases/{self.rng.choice(self.disease_names)}")
+        return response.status_code, None if response.is_success else str(response.status_code)
+
+    async def whatsapp(self, client):
+        url = f"{self.base_url}/api/v1/whatsapp/webhook"
+        params = {
+            "MessageSid": f"SM{self.rng.getrandbits(64):032x}",
+            "AccountSid": "AC" + "0" * 32,
+            # A fresh sender per message keeps the per-number limiter out of the way
+            "From": f"whatsapp:+1555{self.rng.randrange(10**7):07d}",
+            "To": "whatsapp:+14155238886",
+            "Body": "",
+            "NumMedia": "1",
+            "MediaUrl0": self.media.url_for(self.rng.randrange(len(self.images))),
+            "MediaContentType0": "image/jpeg",
+        }
+        headers = {}
+        if self.validator:
+            headers["X-Twilio-Signature"] = self.validator.compute_signature(url, params)
+        response = await client.post(url, data=params, headers=headers)
+        if not response.is_success:
+            return response.status_code, str(response.status_code)
+        message = ElementTree.fromstring(response.content).findtext("Message") or ""
+        return response.status_code, self.error_labels.get(message)
+
+
+async def _client_worker(client, ctx, mix, start, end, records, rng):
+    kinds, weights = zip(*mix.items())
+    while (sent_at := time.perf_counter()) < end:
+        kind = rng.choices(kinds, weights)[0]
+        try:
+            status, error = await getattr(ctx, kind)(client)
+        except httpx.HTTPError as exc:
+            status, error = None, type(exc).__name__
+        records.append((kind, sent_at - start, (time.perf_counter() - sent_at) * 1000, status, error))
+
+
+async def run_load(client, ctx, mix, concurrency, duration, warmup, seed):
+    records = []
+    start = time.perf_counter()
+    end = start + warmup + duration
+    await asyncio.gather(*(
+        _client_worker(client, ctx, mix, start, end, records, random.Random(seed + i))
+        for i in range(concurrency)
+    ))
+    return [r for r in records if r[1] >= warmup]
+
+
+# ── Report ───────────────────────────────────────────────────────
+
+def _latency_summary(latencies):
+    if not latencies:
+        return None
+    return {
+        "mean": float(np.mean(latencies)),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(np.max(latencies)),
+    }
+
+
+def _summarize(records, duration, slo_ms=None):
+    errors = Counter(r[4] for r in records if r[4] is not None)
+    latencies = [r[2] for r in records if r[4] is None]
+    summary = {
+        "requests": len(records),
+        "throughput_rps": len(records) / duration,
+        "goodput_rps": len(latencies) / duration,
+        "error_rate": sum(errors.values()) / len(records) if records else 0.0,
+        "errors": dict(errors),
+        "status_codes": dict(Counter(str(r[3]) for r in records)),
+        "latency_ms": _latency_summary(latencies),
+    }
+    if slo_ms is not None:
+        summary["slo_p95_ms"] = slo_ms
+        summary["slo_met"] = bool(latencies) and summary["latency_ms"]["p95"] <= slo_ms
+    return summary
+
+
+def build_report(records, config, duration, slo):
+    by_kind = defaultdict(list)
+    for record in records:
+        by_kind[record[0]].append(record)
+    report = {
+        "config": config,
+        "overall": _summarize(records, duration),
+        "endpoints": {
+            kind: _summarize(by_kind[kind], duration, slo.get(kind))
+            for kind in ENDPOINTS if kind in by_kind
+        },
+    }
+    report["slo_met"] = all(e.get("slo_met", True) for e in report["endpoints"].values())
+    return report
+
+
+def print_report(report):
+    print(f"\n{'endpoint':<10} {'reqs':>6} {'req/s':>7} {'err %':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  SLO")
+    rows = {**report["endpoints"], "overall": report["overall"]}
+    for name, row in rows.items():
+        lat = row["latency_ms"] or {"p50": float("nan"), "p95": float("nan"), "p99": float("nan")}
+        slo = ""
+        if "slo_met" in row:
+            slo = f"{'PASS' if row['slo_met'] else 'FAIL'} (p95 <= {row['slo_p95_ms']:g} ms)"
+        print(f"{name:<10} {row['requests']:>6} {row['throughput_rps']:>7.1f} "
+              f"{row['error_rate'] * 100:>6.1f} {lat['p50']:>8.1f} {lat['p95']:>8.1f} "
+              f"{lat['p99']:>8.1f}  {slo}")
+        if row["errors"]:
+            print(f"{'':<10} errors: {row['errors']}")
+
+
+# ── Entry point ──────────────────────────────────────────────────
+
+async def _run(args, images):
+    mix = {k: v for k, v in args.mix.items() if v > 0}
+    config = {
+        "mode": "remote" if args.url else "in-process",
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "mix": mix,
+        "images": {
+            "source": str(args.images) if args.images else "synthetic",
+            "count": len(images),
+            "sizes_kb": sorted(round(len(i) / 1024, 1) for i in images),
+        },
+    }
+
+    with MediaServer(images) as media:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+            lifespan = None
+        else:
+            from api.main import app
+
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url=IN_PROCESS_URL, timeout=args.timeout
+            )
+            lifespan = app.router.lifespan_context(app)
+
+        async with client:
+            if lifespan is not None:
+                await lifespan.__aenter__()
+            try:
+                listing = await client.get("/api/v1/diseases")
+                listing.raise_for_status()
+                disease_names = [d["name"] for d in listing.json()["diseases"]]
+                ctx = LoadContext(
+                    args.url or IN_PROCESS_URL, images, media, disease_names,
+                    args.twilio_auth_token, args.seed,
+                )
+                print(f"Running {args.concurrency} clients for {args.warmup:g}s warm-up "
+                      f"+ {args.duration:g}s, mix {mix} ...")
+                records = await run_load(
+                    client, ctx, mix, args.concurrency, args.duration, args.warmup, args.seed
+                )
+            finally:
+                if lifespan is not None:
+                    await lifespan.__aexit__(None, None, None)
+
+    return build_report(records, config, args.duration, args.slo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds excluded from the report")
+    parser.add_argument("--mix", type=parse_pairs, default="predict=0.6,diseases=0.3,whatsapp=0.1",
+                        help="Request mix weights, e.g. predict=0.6,diseases=0.3,whatsapp=0.1")
+    parser.add_argument("--images", type=Path, help="Directory of JPEGs (default: synthetic images)")
+    parser.add_argument("--num-images", type=int, default=32, help="Distinct images to cycle through")
+    parser.add_argument("--sizes", type=lambda s: [tuple(map(int, x.split("x"))) for x in s.split(",")],
+                        default="256x256,640x480,1280x960,2048x1536",
+                        help="Synthetic image sizes (WxH, comma-separated)")
+    parser.add_argument("--slo", type=parse_pairs, default={},
+                        help="p95 latency targets in ms, e.g. predict=500,diseases=20")
+    parser.add_argument("--twilio-auth-token", default=os.environ.get("TWILIO_AUTH_TOKEN"),
+                        help="Sign webhook requests with this token (remote mode)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    if not args.url:
+        # api.config reads these at import time, so set them before importing the app
+        for name in ("PREDICT_RATE_LIMIT_PER_MINUTE", "WHATSAPP_RATE_LIMIT_PER_MINUTE"):
+            os.environ[name] = "1000000"
+        os.environ["TWILIO_AUTH_TOKEN"] = args.twilio_auth_token = LOAD_TEST_AUTH_TOKEN
+        os.environ.pop("TWILIO_WEBHOOK_URL", None)
+
+    images = load_images(args.images, args.sizes, args.num_images, args.seed)
+    report = asyncio.run(_run(args, images))
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nSaved: {args.output}")
+    sys.exit(0 if report["slo_met"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Measure per-worker memory and time-to-ready with and without model preloading.
+
+Starts gunicorn (gunicorn.conf.py) once with PRELOAD_MODEL=false and once
+with PRELOAD_MODEL=true, waits until every worker has logged that it is
+ready, optionally sends a few predictions to reach steady state, then reads
+RSS, PSS and USS for the master and each worker from /proc/<pid>/smaps_rollup.
+PSS splits shared pages between the processes mapping them, so the sum of
+PSS is the real memory cost of the deployment; RSS double-counts shared
+weights. Linux only; requires a trained checkpoint in checkpoints/.
+
+Usage:
+    cd crop-prediction
+    python scripts/measure_worker_memory.py --workers 4 --requests 20
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+READY_PATTERN = re.compile(r"Worker ready in (\d+) ms")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid):
+    """PIDs whose parent is ``pid`` (the gunicorn workers)."""
+    children = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Field 4 (ppid) follows the parenthesised command name
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry.name))
+    return sorted(children)
+
+
+def memory_mb(pid):
+    """RSS, PSS and USS (private pages) of ``pid`` in MB."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0]) / 1024
+    return {
+        "rss_mb": fields["Rss"],
+        "pss_mb": fields["Pss"],
+        "uss_mb": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def _warm_up(port, requests):
+    import httpx
+    import numpy as np
+
+    from src.config import IMG_SIZE
+
+    pixels = np.random.default_rng(0).integers(0, 256, (IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+    with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        for _ in range(requests):
+            client.post(
+                "/api/v1/predict/raw",
+                content=pixels.tobytes(),
+                headers={"Content-Type": "application/octet-stream"},
+            ).raise_for_status()
+
+
+def run_config(preload, workers, requests, timeout):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PRELOAD_MODEL": str(preload).lower(),
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        "PREDICT_RATE_LIMIT_PER_MINUTE": "100000",
+    }
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api.main:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True,
+    )
+
+    ready_ms = []
+    all_ready = threading.Event()
+
+    def _read_logs():
+        for line in proc.stderr:
+            match = READY_PATTERN.search(line)
+            if match:
+                ready_ms.append(int(match.group(1)))
+                if len(ready_ms) == workers:
+                    all_ready.set()
+
+    threading.Thread(target=_read_logs, daemon=True).start()
+    try:
+        if not all_ready.wait(timeout):
+            raise RuntimeError(f"Only {len(ready_ms)}/{workers} workers ready after {timeout:.0f}s")
+        time_to_ready = time.perf_counter() - start
+        if requests:
+            _warm_up(port, requests)
+
+        worker_pids = _children(proc.pid)
+        per_worker = [memory_mb(pid) for pid in worker_pids]
+        master = memory_mb(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+    def _total(key):
+        return master[key] + sum(w[key] for w in per_worker)
+
+    return {
+        "preload": preload,
+        "workers": workers,
+        "requests": requests,
+        "time_to_ready_s": time_to_ready,
+        "worker_startup_ms": sorted(ready_ms),
+        "master": master,
+        "per_worker": per_worker,
+        "total_rss_mb": _total("rss_mb"),
+        "total_pss_mb": _total("pss_mb"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=0,
+                        help="Predictions to send before measuring (steady state)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for workers")
+    parser.add_argument("--output", type=Path, help="Optional path for the JSON report")
+    args = parser.parse_args()
+
+    print(f"{'preload':>7} {'ready s':>8} {'worker PSS':>11} {'worker USS':>11} "
+          f"{'total PSS':>10} {'total RSS':>10}")
+    rows = []
+    for preload in (False, True):
+        row = run_config(preload, args.workers, args.requests, args.timeout)
+        rows.append(row)
+        mean_pss = sum(w["pss_mb"] for w in row["per_worker"]) / len(row["per_worker"])
+        mean_uss = sum(w["uss_mb"] for w in row["per_worker"]) / len(row["per_worker"])
+        print(f"{str(preload):>7} {row['time_to_ready_s']:>8.2f} {mean_pss:>9.0f}MB "
+              f"{mean_uss:>9.0f}MB {row['total_pss_mb']:>8.0f}MB {row['total_rss_mb']:>8.0f}MB")
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+        print(f"\nSaved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
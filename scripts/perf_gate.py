@@ -0,0 +1,138 @@
+"""
+Record benchmark runs and gate on statistically significant regressions.
+
+`record` runs the CPU benchmark matrix several times (each configuration in
+a fresh process per repeat) and appends every repeat to
+outputs/metrics/benchmark_history.jsonl, keyed by git commit, checkpoint
+hash and environment fingerprint. `compare` contrasts two sets of runs with
+per-metric confidence intervals and exits 1 when latency, throughput or
+memory regressed beyond the threshold. `list` shows what has been recorded.
+
+Usage:
+    cd crop-prediction
+    python scripts/perf_gate.py record --repeats 5 --label main
+    python scripts/perf_gate.py compare --baseline main            # vs latest run
+    python scripts/perf_gate.py compare --baseline 1a2b3c --candidate 4d5e6f --threshold 0.1
+    python scripts/perf_gate.py list
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import BENCHMARK_HISTORY_PATH
+from src.evaluation.benchmark import BACKENDS, INPUT_SOURCES, run_benchmark_matrix
+from src.evaluation.perf_history import METRICS, append_runs, compare, load_history, select
+
+
+def cmd_record(args):
+    reports = []
+    for repeat in range(args.repeats):
+        print(f"\nRepeat {repeat + 1}/{args.repeats}")
+        reports.append(run_benchmark_matrix(
+            backends=args.backends, batch_sizes=args.batch_sizes, threads=args.threads,
+            inputs=args.inputs, warmup=args.warmup, iterations=args.iterations,
+            model_path=args.model, output_path=None,
+        ))
+    append_runs(reports, label=args.label, model_path=args.model, history_path=args.history)
+
+
+def cmd_list(args):
+    runs = {}
+    for record in load_history(args.history):
+        runs.setdefault(record["run_id"], {**record, "repeats": 0})["repeats"] += 1
+    print(f"{'run_id':<12}  {'timestamp':<25} {'label':<10} {'commit':<9} "
+          f"{'checkpoint':<10} {'env':<16} repeats")
+    for run in runs.values():
+        commit = (run["git_commit"] or "-")[:8] + ("*" if run["git_dirty"] else "")
+        print(f"{run['run_id']:<12}  {run['timestamp']:<25} {run['label'] or '-':<10} "
+              f"{commit:<9} {(run['checkpoint_sha256'] or '-')[:10]:<10} "
+              f"{run['env_fingerprint']:<16} {run['repeats']}")
+
+
+def cmd_compare(args):
+    history = load_history(args.history)
+    if not history:
+        sys.exit(f"No benchmark history at {args.history}; run `record` first")
+
+    candidate = select(history, args.candidate) if args.candidate else [
+        r for r in history if r["run_id"] == history[-1]["run_id"]
+    ]
+    baseline = [r for r in select(history, args.baseline) if r not in candidate]
+    if not baseline or not candidate:
+        sys.exit("Baseline or candidate selection matched no runs")
+
+    # Numbers from different machines or library versions are not comparable
+    envs = {r["env_fingerprint"] for r in baseline + candidate}
+    if len(envs) > 1 and not args.allow_env_mismatch:
+        target = candidate[-1]["env_fingerprint"]
+        baseline = [r for r in baseline if r["env_fingerprint"] == target]
+        candidate = [r for r in candidate if r["env_fingerprint"] == target]
+        print(f"Restricting to environment {target} (pass --allow-env-mismatch to mix)")
+        if not baseline:
+            sys.exit("No baseline runs recorded in the candidate's environment")
+
+    rows = [r for r in compare(baseline, candidate, args.threshold, args.confidence)
+            if r["metric"] in args.metrics]
+    print(f"\nBaseline: {len(baseline)} run(s)  Candidate: {len(candidate)} run(s)  "
+          f"threshold ±{args.threshold:.0%}  confidence {args.confidence:.0%}\n")
+    print(f"{'backend':<7} {'input':<9} {'batch':>5} {'thr':>3} {'metric':<15} "
+          f"{'baseline':>10} {'candidate':>10} {'change':>8} {'CI':>18}  verdict")
+    for r in rows:
+        ci = f"[{r['ci_pct'][0]:+.1f}, {r['ci_pct'][1]:+.1f}]%" if "ci_pct" in r else ""
+        change = f"{r['change_pct']:+.1f}%" if "change_pct" in r else ""
+        print(f"{r['backend']:<7} {r['input']:<9} {r['batch_size']:>5} {r['threads']:>3} "
+              f"{r['metric']:<15} {r['baseline_mean'] or 0:>10.1f} {r['candidate_mean'] or 0:>10.1f} "
+              f"{change:>8} {ci:>18}  {r['verdict']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+        print(f"\nSaved: {args.output}")
+
+    regressions = [r for r in rows if r["verdict"] == "regression"]
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} significant regression(s)")
+        sys.exit(1)
+    print("\nPASS: no significant regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", type=Path, default=BENCHMARK_HISTORY_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="Run the benchmark matrix and append to history")
+    record.add_argument("--repeats", type=int, default=5, help="Independent runs (>= 2 to compare)")
+    record.add_argument("--label", help="Name to select these runs by, e.g. 'main'")
+    record.add_argument("--backends", nargs="+", choices=BACKENDS, default=["torch"])
+    record.add_argument("--batch-sizes", type=int, nargs="+", default=[1])
+    record.add_argument("--threads", type=int, nargs="+", default=[1])
+    record.add_argument("--inputs", nargs="+", choices=INPUT_SOURCES, default=list(INPUT_SOURCES))
+    record.add_argument("--warmup", type=int, default=10)
+    record.add_argument("--iterations", type=int, default=50)
+    record.add_argument("--model", type=Path, help="PyTorch checkpoint (default: checkpoints/best_model.pth)")
+    record.set_defaults(func=cmd_record)
+
+    comp = sub.add_parser("compare", help="Flag significant regressions between two sets of runs")
+    comp.add_argument("--baseline", required=True, help="run_id, label, or commit/checkpoint hash prefix")
+    comp.add_argument("--candidate", help="Same forms as --baseline (default: the latest run)")
+    comp.add_argument("--threshold", type=float, default=0.05, help="Relative change to tolerate")
+    comp.add_argument("--confidence", type=float, default=0.95)
+    comp.add_argument("--metrics", nargs="+", choices=list(METRICS), default=list(METRICS))
+    comp.add_argument("--allow-env-mismatch", action="store_true")
+    comp.add_argument("--output", type=Path, help="Optional path for the JSON comparison")
+    comp.set_defaults(func=cmd_compare)
+
+    ls = sub.add_parser("list", help="Show recorded runs")
+    ls.set_defaults(func=cmd_list)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
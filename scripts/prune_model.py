@@ -0,0 +1,97 @@
+"""
+Prune MobileNetV2 channels down to a FLOP or latency budget, with fine-tune recovery.
+
+Loads checkpoints/best_model.pth and repeatedly removes the hidden channels
+of the inverted-residual blocks whose depthwise BatchNorm scale (gamma) is
+smallest, fine-tuning for a couple of epochs after every step, until the
+model fits the budget. Data comes from the pre-decoded shard cache with
+BatchAugment. The result is a dense, narrower network saved to
+checkpoints/pruned_model.pth plus pruned_model.json to rebuild it; it loads
+in DiseasePredictor and exports with scripts/export_model.py --checkpoint.
+
+Validation uses the stratified split of data/manifest.json that the model
+was held out on, so the accuracy each fine-tune is picked by, and every
+figure in the report, is on images the model never trained on. This needs
+a shard cache listing the manifest's images (build_shard_cache.py
+--from-manifest). Otherwise a seeded random 20% is used and the script says
+so: the model may have trained on some of those images, so the accuracies
+are inflated; compare steps with each other, not with the training run.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py --from-manifest
+    python scripts/prune_model.py --target-flops 0.5
+    python scripts/prune_model.py --target-latency-ms 8 --step 0.05 --finetune-epochs 3
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+
+from src.config import (
+    MODEL_PATH, PRUNE_FINETUNE_EPOCHS, PRUNE_STEP_RATIO, PRUNED_MODEL_PATH, PRUNING_REPORT_PATH,
+    SEED, SHARD_CACHE_DIR,
+)
+from src.data.batch_augment import BatchAugment
+from src.models.classifier import load_checkpoint_model
+from src.training.loaders import pick_device, shard_splits, split_loaders
+from src.training.prune import prune_to_budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--target-flops", type=float,
+                        help="Multiply-accumulates, or a fraction (<= 1) of the original")
+    parser.add_argument("--target-latency-ms", type=float, help="Batch-1 CPU latency budget")
+    parser.add_argument("--threads", type=int, default=1, help="CPU threads for latency")
+    parser.add_argument("--step", type=float, default=PRUNE_STEP_RATIO,
+                        help="Share of hidden channels removed per step")
+    parser.add_argument("--finetune-epochs", type=int, default=PRUNE_FINETUNE_EPOCHS)
+    parser.add_argument("--max-steps", type=int, default=20)
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=0, help="Images used (0 = all)")
+    parser.add_argument("--checkpoint", type=Path, default=PRUNED_MODEL_PATH)
+    parser.add_argument("--output", type=Path, default=PRUNING_REPORT_PATH)
+    args = parser.parse_args()
+    if args.target_flops is None and args.target_latency_ms is None:
+        parser.error("give --target-flops and/or --target-latency-ms")
+
+    device = pick_device()
+    _, train_set, val_set = shard_splits(args.cache_dir, args.samples, held_out=True)
+    train_loader, val_loader = split_loaders(train_set, val_set, device)
+
+    model = load_checkpoint_model(args.model, device)
+    torch.manual_seed(SEED)
+    rows = prune_to_budget(
+        model, train_loader, val_loader, device, target_flops=args.target_flops,
+        target_latency_ms=args.target_latency_ms, step_ratio=args.step,
+        finetune_epochs=args.finetune_epochs, train_batch_transform=BatchAugment(),
+        val_batch_transform=BatchAugment(augment=False), checkpoint_path=args.checkpoint,
+        max_steps=args.max_steps, latency_threads=args.threads,
+    )
+
+    base = rows[0]
+    print(f"\n{'step':>4} {'val acc':>8} {'MFLOPs':>8} {'flops':>6} {'params':>10} {'CPU ms':>7}")
+    for r in rows:
+        print(f"{r['step']:>4} {r['val_acc']:>8.4f} {r['flops'] / 1e6:>8.1f} "
+              f"{r['flops'] / base['flops']:>6.0%} {r['params']:>10,} {r['cpu_latency_ms']:>7.1f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "model": str(args.model), "checkpoint": str(args.checkpoint),
+        "target_flops": args.target_flops, "target_latency_ms": args.target_latency_ms,
+        "steps": rows,
+    }, indent=2))
+    print(f"\nSaved: {args.checkpoint} (+ {args.checkpoint.with_suffix('.json').name}), {args.output}")
+    print(f"Export for mobile: python scripts/export_model.py --checkpoint {args.checkpoint}")
+
+
+if __name__ == "__main__":
+    main()
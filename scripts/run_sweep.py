@@ -0,0 +1,104 @@
+"""
+Run a parallel hyperparameter sweep over the two-phase training pipeline.
+
+Trials sample learning rates, unfrozen blocks, batch size and dropout from
+a search space (src/training/sweep.py SEARCH_SPACE, or a JSON file), train
+in parallel worker processes with a fixed thread budget each, and are
+pruned early when their validation accuracy trails the median of the other
+trials at the same epoch. Data comes from the pre-decoded shard cache and
+Phase 1 from the shared frozen-feature cache, both built once. Every trial
+is appended to outputs/metrics/sweep_results.csv.
+
+Usage:
+    cd crop-prediction
+    python scripts/build_shard_cache.py
+    python scripts/run_sweep.py --trials 12 --parallel 3
+    python scripts/run_sweep.py --space space.json --grid --parallel 4 --threads 2
+"""
+
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+from torch.utils.data import Subset, random_split
+
+from src.config import SEED, SHARD_CACHE_DIR, SWEEP_RESULTS_PATH
+from src.data.batch_augment import BatchAugment
+from src.data.shard_cache import ShardDataset
+from src.training.sweep import SEARCH_SPACE, run_sweep, sample_trials
+
+
+class ShardSplit:
+    """Picklable dataset factory: seeded 80/20 split of the shard cache, class-balanced weights."""
+
+    def __init__(self, cache_dir, samples):
+        self.cache_dir = cache_dir
+        self.samples = samples
+
+    def __call__(self):
+        dataset = ShardDataset(self.cache_dir, output="tensor")
+        if self.samples:
+            order = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(SEED))
+            dataset = Subset(dataset, order[:self.samples].tolist())
+        n_val = len(dataset) // 5
+        train, val = random_split(dataset, [len(dataset) - n_val, n_val],
+                                  generator=torch.Generator().manual_seed(SEED))
+        targets = self._targets(train)
+        counts = Counter(targets)
+        weights = torch.tensor([1.0 / counts[t] for t in targets], dtype=torch.double)
+        return train, val, weights
+
+    @staticmethod
+    def _targets(subset):
+        indices, dataset = list(subset.indices), subset.dataset
+        while isinstance(dataset, Subset):  # resolve nested subsets down to the shard dataset
+            indices = [dataset.indices[i] for i in indices]
+            dataset = dataset.dataset
+        return [dataset.targets[i] for i in indices]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--space", type=Path, help="JSON search space (default: SEARCH_SPACE)")
+    parser.add_argument("--trials", type=int, default=12, help="Random trials to sample")
+    parser.add_argument("--grid", action="store_true", help="Run the full grid instead of sampling")
+    parser.add_argument("--parallel", type=int, default=2, help="Trials running at once")
+    parser.add_argument("--threads", type=int, help="Threads per trial (default: cores / parallel)")
+    parser.add_argument("--warmup-epochs", type=int, default=3, help="Epochs before pruning starts")
+    parser.add_argument("--cache-dir", type=Path, default=SHARD_CACHE_DIR)
+    parser.add_argument("--samples", type=int, default=0, help="Limit the dataset (0 = all)")
+    parser.add_argument("--no-feature-cache", action="store_true")
+    parser.add_argument("--no-pretrained", action="store_true", help="Random init (offline)")
+    parser.add_argument("--output", type=Path, default=SWEEP_RESULTS_PATH)
+    args = parser.parse_args()
+
+    space = SEARCH_SPACE
+    if args.space:
+        # JSON has no tuples: ["loguniform", lo, hi] style entries become range specs
+        space = {k: tuple(v) if v and isinstance(v[0], str) else v
+                 for k, v in json.loads(args.space.read_text()).items()}
+    trials = sample_trials(space, None if args.grid else args.trials)
+    num_classes = len(ShardDataset(args.cache_dir).classes)
+
+    rows = run_sweep(
+        ShardSplit(args.cache_dir, args.samples), num_classes, trials,
+        parallel=args.parallel, threads_per_trial=args.threads, pruner_warmup=args.warmup_epochs,
+        results_path=args.output, feature_cache=not args.no_feature_cache,
+        pretrained=not args.no_pretrained,
+        train_batch_transform=BatchAugment(), val_batch_transform=BatchAugment(augment=False),
+    )
+
+    print(f"\n{'trial':>5} {'status':<9} {'best val':>9}  params")
+    for row in rows:
+        params = {k: row[k] for k in space}
+        print(f"{row['trial']:>5} {row['status']:<9} {row['best_val_acc'] or 0:>9.4f}  {params}")
+
+
+if __name__ == "__main__":
+    main()
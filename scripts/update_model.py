@@ -0,0 +1,131 @@
+"""
+Incrementally update the trained model with newly labeled field images.
+
+Loads checkpoints/best_model.pth and fine-tunes only the classifier head
+(--train-blocks 1 also the last backbone block) on the new images plus a
+replay buffer of REPLAY_PER_CLASS old training images per class, instead of
+re-running the two-phase pipeline. Backbone features are cached under
+data/incremental: the new images are the only ones processed on every run,
+replay and validation features are reused while the backbone is unchanged.
+The update is written to the checkpoint (previous one kept as
+best_model.prev.pth) only if accuracy on the existing validation set drops
+by at most MAX_VAL_REGRESSION and no class by more than
+MAX_CLASS_REGRESSION.
+
+New images use the ImageFolder layout with the training class names as
+folder names (any subset of the classes). Old train/val data is the
+stratified split of data/manifest.json, or a seeded 80/20 random_split of
+--source.
+
+Usage:
+    cd crop-prediction
+    python scripts/update_model.py --new-images data/field/2026-10
+    python scripts/update_model.py --new-images data/field/2026-10 --train-blocks 1 --epochs 8
+    python scripts/update_model.py --new-images data/field/2026-10 --source data/processed --dry-run
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import torch
+from torch.utils.data import Subset, random_split
+from torchvision import datasets, transforms
+
+from src.config import (
+    BATCH_SIZE, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, INCREMENTAL_CACHE_DIR, INCREMENTAL_EPOCHS,
+    INCREMENTAL_REPORT_PATH, LEARNING_RATE_PHASE2, MAX_CLASS_REGRESSION, MAX_VAL_REGRESSION,
+    MODEL_PATH, REPLAY_PER_CLASS, SEED,
+)
+from src.data.manifest import ManifestDataset, ensure_manifest, stratified_split
+from src.models.classifier import load_checkpoint_model
+from src.training.incremental import incremental_update
+from src.training.loaders import pick_device
+
+# Deterministic preprocessing: cached features must not depend on a random augmentation
+TRANSFORM = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+])
+
+
+def old_splits(source):
+    """(classes, train dataset, val dataset) the current model was trained and validated on."""
+    if source is None:
+        manifest = ensure_manifest()
+        dataset = ManifestDataset(manifest=manifest, transform=TRANSFORM)
+        train_indices, val_indices = stratified_split(manifest)
+        return dataset.classes, Subset(dataset, train_indices), Subset(dataset, val_indices)
+    dataset = datasets.ImageFolder(str(source), transform=TRANSFORM)
+    n_val = len(dataset) // 5
+    train_set, val_set = random_split(dataset, [len(dataset) - n_val, n_val],
+                                      generator=torch.Generator().manual_seed(SEED))
+    return dataset.classes, train_set, val_set
+
+
+def new_images(path, classes):
+    """ImageFolder over ``path`` with its labels mapped onto the model's class indices."""
+    dataset = datasets.ImageFolder(str(path), transform=TRANSFORM)
+    unknown = sorted(set(dataset.classes) - set(classes))
+    if unknown:
+        raise SystemExit(f"Unknown class folders in {path}: {unknown}")
+    remap = [classes.index(name) for name in dataset.classes]
+    dataset.target_transform = remap.__getitem__
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--new-images", type=Path, required=True, help="ImageFolder of new images")
+    parser.add_argument("--source", type=Path, help="Old ImageFolder root (default: the manifest)")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--checkpoint", type=Path, help="Where to save (default: --model)")
+    parser.add_argument("--train-blocks", type=int, default=0,
+                        help="Last backbone blocks trained with the head")
+    parser.add_argument("--epochs", type=int, default=INCREMENTAL_EPOCHS)
+    parser.add_argument("--lr", type=float, default=LEARNING_RATE_PHASE2)
+    parser.add_argument("--replay-per-class", type=int, default=REPLAY_PER_CLASS)
+    parser.add_argument("--max-regression", type=float, default=MAX_VAL_REGRESSION)
+    parser.add_argument("--max-class-regression", type=float, default=MAX_CLASS_REGRESSION)
+    parser.add_argument("--workers", type=int, default=0, help="DataLoader workers for feature extraction")
+    parser.add_argument("--cache-dir", type=Path, default=INCREMENTAL_CACHE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="Run the guard but never save")
+    parser.add_argument("--output", type=Path, default=INCREMENTAL_REPORT_PATH)
+    args = parser.parse_args()
+
+    device = pick_device()
+    classes, train_set, val_set = old_splits(args.source)
+    new_set = new_images(args.new_images, classes)
+    model = load_checkpoint_model(args.model, device)
+    checkpoint = None if args.dry_run else args.checkpoint or args.model
+    torch.manual_seed(SEED)
+    report = incremental_update(
+        model, new_set, train_set, val_set, device, train_blocks=args.train_blocks,
+        epochs=args.epochs, lr=args.lr, replay_per_class=args.replay_per_class,
+        max_regression=args.max_regression, max_class_regression=args.max_class_regression,
+        checkpoint_path=checkpoint, cache_dir=args.cache_dir, batch_size=BATCH_SIZE,
+        num_workers=args.workers,
+    )
+    report.update(model=str(args.model), new_images_dir=str(args.new_images),
+                  worst_class=classes[report["worst_class"]], dry_run=args.dry_run)
+
+    new_acc = "n/a" if report["new_acc_after"] is None else \
+        f"{report['new_acc_before']:.4f} -> {report['new_acc_after']:.4f}"
+    print(f"\nExisting val acc: {report['val_acc_before']:.4f} -> {report['val_acc_after']:.4f}")
+    print(f"New-image holdout acc: {new_acc}")
+    print(f"Worst class drop: {report['worst_class_drop']:.4f} ({report['worst_class']})")
+    print(f"{'Accepted' if report['accepted'] else 'Rejected'} in {report['seconds']:.0f}s")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nSaved: {args.output}")
+    sys.exit(0 if report["accepted"] else 1)
+
+
+if __name__ == "__main__":
+    main()
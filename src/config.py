@@ -10,16 +10,34 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = PROJECT_ROOT / "data" / "raw" / "color"
 FILTERED_DIR = PROJECT_ROOT / "data" / "processed"
 CHECKPOINTS_DIR = PROJECT_ROOT / "checkpoints"
+FEATURE_CACHE_DIR = PROJECT_ROOT / "data" / "feature_cache"
+SHARD_CACHE_DIR = PROJECT_ROOT / "data" / "shards"
+VAL_CACHE_DIR = PROJECT_ROOT / "data" / "val_cache"
+TAR_SHARD_DIR = PROJECT_ROOT / "data" / "tar_shards"
+MANIFEST_PATH = PROJECT_ROOT / "data" / "manifest.json"
 PLOTS_DIR = PROJECT_ROOT / "outputs" / "plots"
 METRICS_DIR = PROJECT_ROOT / "outputs" / "metrics"
 
 MODEL_PATH = CHECKPOINTS_DIR / "best_model.pth"
+TRAINING_STATE_PATH = PROJECT_ROOT / "outputs" / "training_state.pth"  # resume only, never shipped
 CLASS_NAMES_PATH = METRICS_DIR / "class_names.json"
 RESULTS_PATH = METRICS_DIR / "results.json"
 SUMMARY_CSV_PATH = METRICS_DIR / "model_performance_summary.csv"
+BENCHMARK_PATH = METRICS_DIR / "benchmark_matrix.json"
+BENCHMARK_HISTORY_PATH = METRICS_DIR / "benchmark_history.jsonl"
+PROFILER_DIR = PROJECT_ROOT / "outputs" / "profiler"
+SWEEP_RESULTS_PATH = METRICS_DIR / "sweep_results.csv"
+STUDENT_MODEL_PATH = CHECKPOINTS_DIR / "student_model.pth"
+DISTILL_REPORT_PATH = METRICS_DIR / "distillation_report.json"
+PRUNED_MODEL_PATH = CHECKPOINTS_DIR / "pruned_model.pth"
+PRUNING_REPORT_PATH = METRICS_DIR / "pruning_report.json"
+INCREMENTAL_CACHE_DIR = PROJECT_ROOT / "data" / "incremental"
+INCREMENTAL_REPORT_PATH = METRICS_DIR / "incremental_report.json"
 
 # ── Hyperparameters ────────────────────────────────────────────
 IMG_SIZE = 224
+SHARD_IMG_SIZE = 256           # pre-resized cache size, leaves room for crops/rotation
+SHARD_MAX_STALE = 0.25         # compact the shard cache once this fraction of its rows is stale
 BATCH_SIZE = 32
 SEED = 42
 NUM_EPOCHS_PHASE1 = 5
@@ -28,6 +46,23 @@ LEARNING_RATE_PHASE1 = 1e-3
 LEARNING_RATE_PHASE2 = 1e-4
 PATIENCE = 3
 UNFREEZE_LAST_N_BLOCKS = 5
+FEATURE_CACHE_VIEWS = 1        # augmented passes cached per training image
+TAR_SHARD_SAMPLES = 1000       # images per tar shard (~15-20 MB of PlantVillage JPEGs)
+SHUFFLE_BUFFER = 1000          # streaming shuffle buffer of TarShardDataset, in images
+TRAIN_PRECISION = "fp32"       # "fp32", "bf16" or "fp16" (autocast)
+CHANNELS_LAST = False          # NHWC memory format for model and inputs
+RESOLUTION_SCHEDULE = None     # Phase 2 image sizes by stage, e.g. (128, 176, 224); None = IMG_SIZE
+STUDENT_ARCH = "mobilenet_v3_small"  # distillation student, see src/models/classifier.py
+DISTILL_TEMPERATURE = 4.0      # softmax temperature for teacher/student soft targets
+DISTILL_ALPHA = 0.7            # weight of the soft-target loss (1 - alpha on hard labels)
+PRUNE_STEP_RATIO = 0.1         # share of prunable hidden channels removed per pruning step
+PRUNE_FINETUNE_EPOCHS = 2      # recovery fine-tune epochs after each pruning step
+INCREMENTAL_EPOCHS = 5         # head fine-tune epochs of an incremental update
+REPLAY_PER_CLASS = 100         # old training images per class replayed in an incremental update
+MAX_VAL_REGRESSION = 0.005     # max drop in validation accuracy an incremental update may cause
+MAX_CLASS_REGRESSION = 0.02    # max drop in any single class's validation accuracy
+PROFILE_SYNC_EVERY = 25        # GPU steps between synchronised step-phase timings
+PROFILE_TRACE_WINDOW = (20, 5) # torch.profiler trace: steps to skip, steps to record
 
 # ── ImageNet normalisation ─────────────────────────────────────
 IMAGENET_MEAN = [0.485, 0.456, 0.406]
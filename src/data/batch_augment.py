@@ -0,0 +1,96 @@
+"""Batched, vectorized training augmentation on collated uint8 image tensors."""
+import math
+
+import torch
+import torch.nn.functional as F
+
+from src.config import IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, SEED
+
+
+class BatchAugment:
+    """Random flips, rotation, zoom/crop and colour jitter for a whole batch.
+
+    Takes a collated ``(B, 3, H, W)`` uint8 batch (e.g. from
+    ``ShardDataset(output="tensor")`` or ``PILToTensor()``) on any device and
+    returns normalized float images of ``out_size``. Flips, rotation, zoom
+    and translation compose into one affine matrix per sample, applied with
+    a single ``grid_sample`` that also performs the resize. All random
+    parameters come from a CPU generator seeded with ``seed``, so the
+    per-sample draws are reproducible for a given batch order regardless
+    of device or DataLoader worker count.
+
+    With ``augment=False`` only the resize and normalization run, for
+    validation batches.
+    """
+
+    def __init__(self, out_size=IMG_SIZE, hflip=0.5, vflip=0.5, rotation=20.0,
+                 scale=(0.8, 1.2), translate=0.1, brightness=0.1, contrast=0.1,
+                 augment=True, seed=SEED):
+        self.out_size = out_size
+        self.hflip = hflip
+        self.vflip = vflip
+        self.rotation = rotation
+        self.scale = scale
+        self.translate = translate
+        self.brightness = brightness
+        self.contrast = contrast
+        self.augment_enabled = augment
+        self.generator = torch.Generator()
+        self.reset(seed)
+
+    def reset(self, seed=SEED):
+        """Restart the random stream, e.g. per epoch or per cached view."""
+        self.generator.manual_seed(seed)
+
+    def _uniform(self, n, low, high):
+        return torch.rand(n, generator=self.generator) * (high - low) + low
+
+    def _affine(self, n):
+        angle = self._uniform(n, -self.rotation, self.rotation) * math.pi / 180
+        zoom = self._uniform(n, *self.scale)
+        flip_x = torch.where(torch.rand(n, generator=self.generator) < self.hflip, -1.0, 1.0)
+        flip_y = torch.where(torch.rand(n, generator=self.generator) < self.vflip, -1.0, 1.0)
+        shift = self._uniform(2 * n, -self.translate, self.translate).view(n, 2) * 2
+
+        # theta maps output coords to input coords: zoom > 1 samples a smaller
+        # region (crop in), and flips mirror the sampling grid
+        cos, sin = torch.cos(angle) / zoom, torch.sin(angle) / zoom
+        theta = torch.stack([
+            torch.stack([cos * flip_x, -sin * flip_y, shift[:, 0]], dim=1),
+            torch.stack([sin * flip_x, cos * flip_y, shift[:, 1]], dim=1),
+        ], dim=1)
+        return theta
+
+    def augment(self, images):
+        """Augmented (or just resized) images as float in [0, 1], before normalization."""
+        if images.dtype == torch.uint8:
+            images = images.float().div_(255)
+        n = images.size(0)
+        size = (n, images.size(1), self.out_size, self.out_size)
+
+        if not self.augment_enabled:
+            if images.shape[-2:] == (self.out_size, self.out_size):
+                return images
+            return F.interpolate(images, size=size[-2:], mode="bilinear",
+                                 align_corners=False, antialias=True)
+
+        theta = self._affine(n).to(images.device, images.dtype)
+        grid = F.affine_grid(theta, size, align_corners=False)
+        images = F.grid_sample(images, grid, mode="bilinear", padding_mode="zeros",
+                               align_corners=False)
+
+        bright = self._uniform(n, 1 - self.brightness, 1 + self.brightness)
+        contrast = self._uniform(n, 1 - self.contrast, 1 + self.contrast)
+        bright = bright.to(images.device, images.dtype).view(n, 1, 1, 1)
+        contrast = contrast.to(images.device, images.dtype).view(n, 1, 1, 1)
+        images = images * bright
+        # Contrast blends with each image's mean grey level, as ColorJitter does
+        grey = (0.299 * images[:, 0] + 0.587 * images[:, 1] + 0.114 * images[:, 2])
+        mean = grey.mean(dim=(1, 2)).view(n, 1, 1, 1)
+        return ((images - mean) * contrast + mean).clamp_(0, 1)
+
+    def __call__(self, images):
+        images = self.augment(images)
+        mean = torch.tensor(IMAGENET_MEAN, device=images.device, dtype=images.dtype).view(1, 3, 1, 1)
+        std = torch.tensor(IMAGENET_STD, device=images.device, dtype=images.dtype).view(1, 3, 1, 1)
+        return (images - mean) / std
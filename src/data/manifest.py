@@ -0,0 +1,177 @@
+"""Cached file manifest of the selected classes: a virtual dataset instead of copying files."""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+from torch.utils.data import Dataset
+from torchvision.datasets.folder import IMG_EXTENSIONS, default_loader, has_file_allowed_extension
+
+from src.config import DATA_DIR, DISPLAY_NAMES, MANIFEST_PATH, SEED, SELECTED_CLASSES
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scan_class(class_dir):
+    """(path, bytes, mtime_ns) for every image under ``class_dir``, including subdirectories."""
+    entries, stack = [], [class_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=True):
+                    stack.append(entry.path)
+                elif has_file_allowed_extension(entry.name, IMG_EXTENSIONS):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    # os.walk order: directory by directory, files sorted within each (as ImageFolder lists them)
+    return sorted(entries, key=lambda e: (os.path.dirname(e[0]), os.path.basename(e[0])))
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """The manifest dict at ``manifest_path``, or None if it has not been built."""
+    path = Path(manifest_path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_manifest(source_dir=DATA_DIR, classes=SELECTED_CLASSES, manifest_path=MANIFEST_PATH,
+                   workers=None, rebuild=False):
+    """Scan ``classes`` under ``source_dir`` into a manifest, in place of copying them.
+
+    Class directories are scanned in parallel. Files whose size and mtime
+    match the previous manifest keep their hash; only new or changed files
+    are read and hashed (sha1). Classes are numbered in sorted order and
+    files sorted within each class, exactly like ``ImageFolder`` over a
+    directory holding only these classes, so targets and split indices
+    match the copied ``data/processed`` pipeline. Returns the manifest dict.
+    """
+    source_dir, manifest_path = Path(source_dir), Path(manifest_path)
+    start = time.perf_counter()
+    classes = sorted(classes)
+    missing = [name for name in classes if not (source_dir / name).is_dir()]
+    if missing:
+        raise FileNotFoundError(f"Class directories not found under {source_dir}: {missing}")
+
+    previous = None if rebuild else load_manifest(manifest_path)
+    if previous is not None and previous["source_dir"] != str(source_dir):
+        previous = None
+    known = {s["path"]: s for s in previous["samples"]} if previous else {}
+
+    with ThreadPoolExecutor(workers) as pool:
+        scanned = list(pool.map(_scan_class, [source_dir / name for name in classes]))
+
+    samples, to_hash = [], []
+    for target, entries in enumerate(scanned):
+        for path, size, mtime_ns in entries:
+            rel = os.path.relpath(path, source_dir)
+            cached = known.get(rel)
+            sample = {"path": rel, "target": target, "bytes": size, "mtime_ns": mtime_ns,
+                      "sha1": cached["sha1"] if cached else None}
+            if not cached or cached["bytes"] != size or cached["mtime_ns"] != mtime_ns:
+                to_hash.append(sample)
+            samples.append(sample)
+
+    # Hashing is I/O-bound and hashlib releases the GIL, so threads scale here
+    with ThreadPoolExecutor(workers) as pool:
+        hashes = pool.map(lambda s: file_sha1(source_dir / s["path"]), to_hash)
+        for sample, sha1 in zip(to_hash, hashes):
+            sample["sha1"] = sha1
+
+    manifest = {"source_dir": str(source_dir), "classes": classes, "samples": samples}
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+    removed = len(set(known) - {s["path"] for s in samples})
+    print(f"Manifest: {len(samples)} images in {len(classes)} classes, {len(to_hash)} hashed, "
+          f"{removed} removed ({time.perf_counter() - start:.1f}s) -> {manifest_path}")
+    return manifest
+
+
+def ensure_manifest(manifest_path=MANIFEST_PATH, **kwargs):
+    """Load the manifest, building it on first use."""
+    return load_manifest(manifest_path) or build_manifest(manifest_path=manifest_path, **kwargs)
+
+
+def class_counts(manifest):
+    """Images per class keyed by display name, in class-index order."""
+    counts = [0] * len(manifest["classes"])
+    for sample in manifest["samples"]:
+        counts[sample["target"]] += 1
+    return {DISPLAY_NAMES.get(name, name): n for name, n in zip(manifest["classes"], counts)}
+
+
+def class_samples(manifest, class_name):
+    """Absolute paths of every image of ``class_name``, in manifest order."""
+    target = manifest["classes"].index(class_name)
+    root = Path(manifest["source_dir"])
+    return [root / s["path"] for s in manifest["samples"] if s["target"] == target]
+
+
+def stratified_split(manifest, val_fraction=0.2, seed=SEED):
+    """Seeded (train_indices, val_indices) holding ``val_fraction`` of every class out.
+
+    Indices refer to manifest order, so they apply to ``ManifestDataset``
+    and to a shard cache built from the same manifest alike.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    by_class = [[] for _ in manifest["classes"]]
+    for index, sample in enumerate(manifest["samples"]):
+        by_class[sample["target"]].append(index)
+    train_indices, val_indices = [], []
+    for indices in by_class:
+        order = torch.randperm(len(indices), generator=generator).tolist()
+        n_val = round(len(indices) * val_fraction)
+        val_indices += [indices[i] for i in order[:n_val]]
+        train_indices += [indices[i] for i in order[n_val:]]
+    return sorted(train_indices), sorted(val_indices)
+
+
+class ManifestDataset(Dataset):
+    """ImageFolder-compatible dataset over the files listed in a manifest.
+
+    Exposes ``classes``, ``class_to_idx``, ``samples``, ``targets`` and
+    ``imgs`` like ``ImageFolder`` and loads images straight from
+    ``DATA_DIR``: nothing is copied and no directory is scanned.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, transform=None, target_transform=None,
+                 loader=default_loader, manifest=None):
+        manifest = manifest or load_manifest(manifest_path)
+        if manifest is None:
+            raise FileNotFoundError(f"No manifest at {manifest_path}; run build_manifest first")
+        root = Path(manifest["source_dir"])
+        self.root = str(root)
+        self.transform = transform
+        self.target_transform = target_transform
+        self.loader = loader
+        self.classes = manifest["classes"]
+        self.class_to_idx = {name: i for i, name in enumerate(self.classes)}
+        self.samples = [(str(root / s["path"]), s["target"]) for s in manifest["samples"]]
+        self.imgs = self.samples
+        self.targets = [target for _, target in self.samples]
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        path, target = self.samples[index]
+        sample = self.loader(path)
+        if self.transform is not None:
+            sample = self.transform(sample)
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+        return sample, target
@@ -0,0 +1,255 @@
+"""Pre-decoded, pre-resized uint8 image shards with an incremental, hash-keyed index."""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+from torchvision.datasets.folder import IMG_EXTENSIONS, find_classes, make_dataset
+
+from src.config import FILTERED_DIR, SHARD_CACHE_DIR, SHARD_IMG_SIZE, SHARD_MAX_STALE
+from src.data.manifest import file_sha1
+
+INDEX_NAME = "index.json"
+SHARD_ROWS = 4096
+
+
+def _decode(path, size):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB").resize((size, size), Image.BILINEAR), dtype=np.uint8)
+
+
+def _shard_path(cache_dir, shard):
+    return Path(cache_dir) / f"shard_{shard:05d}.u8"
+
+
+def _load_index(cache_dir):
+    path = Path(cache_dir) / INDEX_NAME
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _compact(index, cache_dir, live_sha1s):
+    """Rewrite ``index``'s shards to hold only ``live_sha1s``, in that order, copying rows.
+
+    Rows are copied from the old shards, never re-decoded. The index file is
+    removed first, so an interrupted compaction leaves a cache that the next
+    build rebuilds instead of one that points at missing rows.
+    """
+    size = index["size"]
+    old_shards = [
+        np.memmap(_shard_path(cache_dir, i), dtype=np.uint8, mode="r", shape=(rows, size, size, 3))
+        for i, rows in enumerate(index["shards"])
+    ]
+    (Path(cache_dir) / INDEX_NAME).unlink(missing_ok=True)
+    shards, blobs = [], {}
+    for chunk_start in range(0, len(live_sha1s), SHARD_ROWS):
+        chunk = live_sha1s[chunk_start:chunk_start + SHARD_ROWS]
+        shard = len(shards)
+        array = np.memmap(_shard_path(cache_dir, shard).with_suffix(".tmp"), dtype=np.uint8,
+                          mode="w+", shape=(len(chunk), size, size, 3))
+        for row, sha1 in enumerate(chunk):
+            old_shard, old_row = index["blobs"][sha1]
+            array[row] = old_shards[old_shard][old_row]
+            blobs[sha1] = [shard, row]
+        array.flush()
+        del array
+        shards.append(len(chunk))
+    del old_shards
+    for old in Path(cache_dir).glob("shard_*.u8"):
+        old.unlink()
+    for shard in range(len(shards)):
+        os.replace(_shard_path(cache_dir, shard).with_suffix(".tmp"), _shard_path(cache_dir, shard))
+    index["shards"], index["blobs"] = shards, blobs
+
+
+def build_shard_cache(source_dir=FILTERED_DIR, cache_dir=SHARD_CACHE_DIR, size=SHARD_IMG_SIZE,
+                      workers=None, rebuild=False, manifest=None, max_stale=SHARD_MAX_STALE):
+    """Decode and resize every image under ``source_dir`` into uint8 shards.
+
+    Incremental: files whose size and mtime are unchanged skip hashing;
+    everything else is hashed (sha1) and only content not already in a
+    shard is decoded, into a new shard appended next to the existing ones.
+    Rows of changed or deleted files stay in their shards as stale rows;
+    once they exceed ``max_stale`` of all rows the live rows are copied
+    into fresh shards (in sample order) and the old ones deleted. Sample
+    order and labels match ``ImageFolder(source_dir)``, so indices from
+    ``random_split`` etc. stay valid when swapping datasets.
+
+    With ``manifest`` (see ``src.data.manifest``) its file list, classes and
+    hashes are used instead of scanning ``source_dir``, so order and labels
+    match ``ManifestDataset``. Returns the index dict.
+    """
+    if manifest is not None:
+        source_dir = manifest["source_dir"]
+    source_dir, cache_dir = Path(source_dir), Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    index = None if rebuild else _load_index(cache_dir)
+    if index is not None and index["size"] != size:
+        print(f"  Shard size changed ({index['size']} -> {size}); rebuilding")
+        index = None
+    if index is None:
+        for old in cache_dir.glob("shard_*.u8"):
+            old.unlink()
+        index = {"size": size, "shards": [], "blobs": {}, "files": {}}
+
+    old_files = index["files"]
+    if manifest is not None:
+        classes = manifest["classes"]
+        samples = [(str(source_dir / s["path"]), s["target"]) for s in manifest["samples"]]
+        identified = [(s["path"], s["sha1"], s["bytes"], s["mtime_ns"]) for s in manifest["samples"]]
+    else:
+        classes, class_to_idx = find_classes(str(source_dir))
+        samples = make_dataset(str(source_dir), class_to_idx, extensions=IMG_EXTENSIONS)
+
+        def _identify(sample):
+            path, _ = sample
+            rel = os.path.relpath(path, source_dir)
+            stat = os.stat(path)
+            cached = old_files.get(rel)
+            if cached and cached["bytes"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                return rel, cached["sha1"], stat.st_size, stat.st_mtime_ns
+            return rel, file_sha1(path), stat.st_size, stat.st_mtime_ns
+
+        with ThreadPoolExecutor(workers) as pool:
+            identified = list(pool.map(_identify, samples))
+
+    # Decode only content no shard holds yet (renamed/duplicate files reuse rows)
+    pending, seen = [], set()
+    for (path, _), (rel, sha1, _, _) in zip(samples, identified):
+        if sha1 not in index["blobs"] and sha1 not in seen:
+            pending.append((sha1, path))
+            seen.add(sha1)
+
+    for chunk_start in range(0, len(pending), SHARD_ROWS):
+        chunk = pending[chunk_start:chunk_start + SHARD_ROWS]
+        shard = len(index["shards"])
+        array = np.memmap(_shard_path(cache_dir, shard), dtype=np.uint8, mode="w+",
+                          shape=(len(chunk), size, size, 3))
+        # PIL releases the GIL while decoding, so threads scale here
+        with ThreadPoolExecutor(workers) as pool:
+            for row, pixels in enumerate(pool.map(lambda item: _decode(item[1], size), chunk)):
+                array[row] = pixels
+        array.flush()
+        del array
+        index["shards"].append(len(chunk))
+        for row, (sha1, _) in enumerate(chunk):
+            index["blobs"][sha1] = [shard, row]
+        print(f"  Wrote shard {shard}: {len(chunk)} images")
+
+    index["classes"] = classes
+    index["files"] = {
+        rel: {"sha1": sha1, "bytes": size_bytes, "mtime_ns": mtime_ns}
+        for rel, sha1, size_bytes, mtime_ns in identified
+    }
+    index["samples"] = [[rel, target] for (rel, *_), (_, target) in zip(identified, samples)]
+    index["source_dir"] = str(source_dir)
+
+    live_sha1s = list(dict.fromkeys(sha1 for _, sha1, _, _ in identified))
+    total_rows = sum(index["shards"])
+    stale_rows = total_rows - len(live_sha1s)
+    if stale_rows and stale_rows > max_stale * total_rows:
+        _compact(index, cache_dir, live_sha1s)
+        print(f"  Compacted: dropped {stale_rows} stale rows "
+              f"({stale_rows * size * size * 3 / 2**20:.0f} MB), {len(index['shards'])} shards")
+        stale_rows = 0
+
+    tmp_path = cache_dir / (INDEX_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, cache_dir / INDEX_NAME)
+
+    print(f"Shard cache: {len(samples)} images, {len(pending)} decoded, {stale_rows} stale rows "
+          f"({stale_rows * size * size * 3 / 2**20:.0f} MB) ({time.perf_counter() - start:.1f}s) "
+          f"-> {cache_dir}")
+    return index
+
+
+class ShardDataset(Dataset):
+    """ImageFolder-compatible dataset reading pre-decoded images from shards.
+
+    Exposes ``root``, ``classes``, ``class_to_idx``, ``samples``, ``targets``
+    and ``imgs`` like ``ImageFolder``. Items are zero-copy views into the
+    memory-mapped shards: ``output="pil"`` wraps them as PIL images so the
+    existing PIL transforms apply unchanged, ``output="tensor"`` returns a
+    uint8 CHW tensor for tensor transforms. Shards are opened lazily in each
+    DataLoader worker rather than pickled.
+    """
+
+    def __init__(self, cache_dir=SHARD_CACHE_DIR, transform=None, target_transform=None,
+                 output="pil"):
+        if output not in ("pil", "tensor"):
+            raise ValueError(f"output must be 'pil' or 'tensor', got {output!r}")
+        self.cache_dir = Path(cache_dir)
+        index = _load_index(self.cache_dir)
+        if index is None:
+            raise FileNotFoundError(f"No shard index in {self.cache_dir}; run build_shard_cache first")
+
+        self.transform = transform
+        self.target_transform = target_transform
+        self.output = output
+        self.size = index["size"]
+        self.classes = index["classes"]
+        self.class_to_idx = {name: i for i, name in enumerate(self.classes)}
+        root = Path(index["source_dir"])
+        self.root = str(root)
+        self.samples = [(str(root / rel), target) for rel, target in index["samples"]]
+        self.imgs = self.samples
+        self.targets = [target for _, target in self.samples]
+        self._shard_rows = index["shards"]
+        self._locations = np.array(
+            [index["blobs"][index["files"][rel]["sha1"]] for rel, _ in index["samples"]],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self._shards = None
+
+    @classmethod
+    def from_folder(cls, source_dir=FILTERED_DIR, cache_dir=SHARD_CACHE_DIR, size=SHARD_IMG_SIZE,
+                    **kwargs):
+        """Bring the cache up to date with ``source_dir``, then open it."""
+        build_shard_cache(source_dir, cache_dir, size)
+        return cls(cache_dir, **kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = None
+        return state
+
+    def _open(self):
+        # Copy-on-write mapping: zero-copy reads, and tensors may be written to safely
+        self._shards = [
+            np.memmap(_shard_path(self.cache_dir, i), dtype=np.uint8, mode="c",
+                      shape=(rows, self.size, self.size, 3))
+            for i, rows in enumerate(self._shard_rows)
+        ]
+
+    def __len__(self):
+        return len(self.samples)
+
+    def pixels(self, index):
+        """The cached HWC uint8 array for ``index`` (a view, not a copy)."""
+        if self._shards is None:
+            self._open()
+        shard, row = self._locations[index]
+        return self._shards[shard][row]
+
+    def __getitem__(self, index):
+        pixels = self.pixels(index)
+        if self.output == "pil":
+            sample = Image.fromarray(pixels)
+        else:
+            sample = torch.from_numpy(pixels).permute(2, 0, 1)
+        if self.transform is not None:
+            sample = self.transform(sample)
+        target = self.targets[index]
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+        return sample, target
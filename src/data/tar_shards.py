@@ -0,0 +1,200 @@
+"""Sequential tar shards: a streaming dataset format for large or network-mounted data."""
+import io
+import itertools
+import json
+import os
+import random
+import tarfile
+import time
+from pathlib import Path
+
+import torch.distributed as dist
+from PIL import Image
+from torch.utils.data import IterableDataset, get_worker_info
+
+from src.config import SEED, SHUFFLE_BUFFER, TAR_SHARD_DIR, TAR_SHARD_SAMPLES
+
+
+def _add_member(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = 0  # reproducible shards: same inputs, same bytes
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_tar_shards(samples, classes, out_dir=TAR_SHARD_DIR, shard_samples=TAR_SHARD_SAMPLES,
+                     seed=SEED):
+    """Pack ``(path, target)`` samples into ``shard-NNNNNN.tar`` files under ``out_dir``.
+
+    Samples are shuffled once (seeded) before packing so every shard mixes
+    classes; shard-level plus buffer shuffling at read time then only has
+    to decorrelate neighbours. Each sample is two members sharing a key,
+    ``<key>.<ext>`` with the original encoded bytes (no re-encoding) and
+    ``<key>.cls`` with the class index, as WebDataset lays them out. Each
+    shard is written to a temporary name and renamed when complete, and
+    ``index.json`` (classes, shard names and sample counts, targets in
+    shard order) is written last. Returns the index dict.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "index.json").unlink(missing_ok=True)  # invalid until fully written
+    for stale in out_dir.glob("shard-*.tar"):
+        stale.unlink()
+    order = list(range(len(samples)))
+    random.Random(seed).shuffle(order)
+
+    start = time.perf_counter()
+    shards, targets = [], []
+    for first in range(0, len(order), shard_samples):
+        name = f"shard-{len(shards):06d}.tar"
+        tmp_path = out_dir / (name + ".tmp")
+        chunk = order[first:first + shard_samples]
+        with tarfile.open(tmp_path, "w") as tar:
+            for index in chunk:
+                path, target = samples[index]
+                key = f"{index:09d}"
+                ext = Path(path).suffix.lower().lstrip(".") or "jpg"
+                _add_member(tar, f"{key}.{ext}", Path(path).read_bytes())
+                _add_member(tar, f"{key}.cls", str(int(target)).encode())
+                targets.append(int(target))
+        os.replace(tmp_path, out_dir / name)
+        shards.append({"name": name, "samples": len(chunk)})
+
+    index = {"classes": list(classes), "shards": shards, "targets": targets, "seed": seed}
+    (out_dir / "index.json").write_text(json.dumps(index))
+    print(f"Tar shards: {len(samples)} images in {len(shards)} shards "
+          f"({time.perf_counter() - start:.1f}s) -> {out_dir}")
+    return index
+
+
+def _read_samples(path):
+    """Yield ``(image_bytes, target)`` from one shard, reading it front to back."""
+    key, data, target = None, None, None
+    with tarfile.open(path, "r|*") as tar:  # stream mode: no seeks, network-mount friendly
+        for member in tar:
+            if not member.isfile():
+                continue
+            stem, _, ext = member.name.rpartition(".")
+            if stem != key:
+                if data is not None and target is not None:
+                    yield data, target
+                key, data, target = stem, None, None
+            payload = tar.extractfile(member).read()
+            if ext == "cls":
+                target = int(payload)
+            else:
+                data = payload
+    if data is not None and target is not None:
+        yield data, target
+
+
+class TarShardDataset(IterableDataset):
+    """Streaming, ImageFolder-compatible reader over shards from ``write_tar_shards``.
+
+    Exposes ``classes``, ``class_to_idx`` and ``targets`` like
+    ``ImageFolder`` and applies the same PIL ``transform``. Shards are
+    split across distributed ranks and then DataLoader workers, so each
+    shard is read by exactly one worker per epoch. With ``shuffle`` the
+    shard order is permuted every epoch (identically on every rank) and
+    samples pass through a ``buffer_size`` shuffle buffer. Call
+    ``set_epoch`` before each epoch for a fresh order; ``run_phase`` does
+    this for the training loader. Class-balanced ``WeightedRandomSampler``
+    sampling does not apply to a stream; use class-weighted loss instead.
+
+    Under DDP every rank must run the same number of batches, or the
+    gradient all-reduce deadlocks. With ``equalize`` (the default) each
+    worker's stream is cut to the shortest stream the same worker id has on
+    any rank this epoch, so uneven shards cost a few samples, not a hang.
+    Pass ``equalize=False`` for validation, which needs every sample once.
+    """
+
+    def __init__(self, shard_dir=TAR_SHARD_DIR, transform=None, target_transform=None,
+                 shuffle=False, buffer_size=SHUFFLE_BUFFER, seed=SEED, equalize=True):
+        self.shard_dir = Path(shard_dir)
+        index_path = self.shard_dir / "index.json"
+        if not index_path.exists():
+            raise FileNotFoundError(f"No shard index in {self.shard_dir}; run build_tar_shards first")
+        index = json.loads(index_path.read_text())
+        self.transform = transform
+        self.target_transform = target_transform
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.equalize = equalize
+        self.epoch = 0
+        self.world = None
+        self._world()
+        self.classes = index["classes"]
+        self.class_to_idx = {name: i for i, name in enumerate(self.classes)}
+        self.targets = index["targets"]
+        self.shards = index["shards"]
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self._world()
+
+    def set_rank(self, world_size, rank):
+        """Read this rank's share of the shards; ``distributed_loaders`` calls it."""
+        self.world = (world_size, rank)
+
+    def _world(self):
+        """(world_size, rank), captured in the main process: DataLoader workers have no process group."""
+        if self.world is None and dist.is_available() and dist.is_initialized():
+            self.world = (dist.get_world_size(), dist.get_rank())
+        return self.world or (1, 0)
+
+    def __len__(self):
+        """Samples this rank yields per epoch with one worker (an upper bound with several)."""
+        return self._plan(num_workers=1)[1]
+
+    def _plan(self, num_workers, worker_id=0):
+        """(shards, sample limit) of one worker of this rank for the current epoch.
+
+        Shards go round-robin to ranks, then to workers. The limit is the
+        smallest sample count that worker id gets on any rank (no limit
+        without ``equalize`` or DDP); every rank computes the same plan.
+        """
+        shards = list(self.shards)
+        if self.shuffle:
+            random.Random(self.seed + self.epoch).shuffle(shards)
+        world_size, rank = self._world()
+        if len(shards) < world_size:
+            raise ValueError(f"{len(shards)} shards cannot be split across {world_size} ranks")
+        per_rank = [shards[r::world_size][worker_id::num_workers] for r in range(world_size)]
+        counts = [sum(shard["samples"] for shard in assigned) for assigned in per_rank]
+        limit = min(counts) if self.equalize else counts[rank]
+        return per_rank[rank], limit
+
+    def _decode(self, data, target):
+        image = Image.open(io.BytesIO(data)).convert("RGB")
+        if self.transform is not None:
+            image = self.transform(image)
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+        return image, target
+
+    def __iter__(self):
+        worker = get_worker_info()
+        rank = self._world()[1]
+        worker_id = worker.id if worker is not None else 0
+        rng = random.Random(f"{self.seed}-{self.epoch}-{rank}-{worker_id}")
+        shards, limit = self._plan(worker.num_workers if worker is not None else 1, worker_id)
+        return itertools.islice(self._stream(shards, rng), limit)
+
+    def _stream(self, shards, rng):
+        buffer = []
+        for shard in shards:
+            for sample in _read_samples(self.shard_dir / shard["name"]):
+                if not self.shuffle:
+                    yield self._decode(*sample)
+                    continue
+                # Encoded bytes are buffered, so memory stays at ~buffer_size JPEGs
+                if len(buffer) < self.buffer_size:
+                    buffer.append(sample)
+                    continue
+                i = rng.randrange(len(buffer))
+                buffer[i], sample = sample, buffer[i]
+                yield self._decode(*sample)
+        rng.shuffle(buffer)
+        for sample in buffer:
+            yield self._decode(*sample)
@@ -0,0 +1,171 @@
+"""Validation tensor cache: decode and preprocess the validation set once, as uint8."""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, SequentialSampler
+
+from src.config import IMAGENET_MEAN, IMAGENET_STD, VAL_CACHE_DIR
+
+_MEAN = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+_STD = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+
+
+def base_dataset(dataset):
+    """Underlying dataset and the indices chosen from it, through nested ``Subset``s."""
+    indices = None
+    while hasattr(dataset, "indices"):  # torch.utils.data.Subset / random_split
+        chosen = list(dataset.indices)
+        indices = chosen if indices is None else [chosen[i] for i in indices]
+        dataset = dataset.dataset
+    return dataset, indices
+
+
+def _fingerprint(dataset):
+    """Cache key: image list (path, target, size, mtime) and the preprocessing config."""
+    digest = hashlib.sha1()
+    base, indices = base_dataset(dataset)
+    samples = getattr(base, "samples", None)
+    if samples is not None:
+        chosen = samples if indices is None else [samples[i] for i in indices]
+        rows = []
+        for path, target in chosen:
+            try:
+                stat = os.stat(path)
+                rows.append([str(path), int(target), stat.st_size, stat.st_mtime_ns])
+            except OSError:  # e.g. a shard cache whose source files were removed
+                rows.append([str(path), int(target)])
+        digest.update(json.dumps(rows).encode())
+    transform = getattr(dataset, "transform", None) or getattr(base, "transform", None)
+    output = getattr(base, "output", None)
+    size = getattr(base, "size", None)
+    digest.update(f"{len(dataset)}|{transform!r}|{output}|{size}".encode())
+    return digest.hexdigest()
+
+
+def _to_pixels(images):
+    """ImageNet-normalized float batch back to the uint8 pixels it was made from."""
+    return (images * _STD + _MEAN).mul_(255).round_().clamp_(0, 255).to(torch.uint8)
+
+
+class ValTensorCache:
+    """Preprocessed validation images on disk: ``images[index]`` as a uint8 CHW memmap.
+
+    A dataset whose transform ends in ``ToTensor`` + ImageNet ``Normalize``
+    (``kind="normalized"``) is stored as the pixels that produced it and
+    re-normalized on read; the round trip is exact to float rounding. A
+    dataset that already yields uint8 tensors (``ShardDataset(output="tensor")``,
+    ``kind="uint8"``) is stored as-is, for ``BatchAugment(augment=False)``.
+    """
+
+    def __init__(self, cache_dir, in_memory=False):
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.kind = self.meta["kind"]
+        self.num_images = self.meta["num_images"]
+        self.images = np.memmap(self.cache_dir / "images.u8", dtype=np.uint8, mode="r",
+                                shape=(self.num_images, *self.meta["shape"]))
+        if in_memory:
+            self.images = np.array(self.images)
+        self.labels = np.load(self.cache_dir / "labels.npy")
+
+    @classmethod
+    def build(cls, dataset, cache_dir=VAL_CACHE_DIR, batch_size=64, num_workers=0, in_memory=False):
+        """Preprocess (or reuse) every image of ``dataset`` into the cache.
+
+        The dataset's own (deterministic) transform runs once; the cache is
+        rebuilt whenever the image list, file sizes/mtimes or transform change.
+        """
+        cache_dir = Path(cache_dir)
+        key = _fingerprint(dataset)
+        meta_path = cache_dir / "meta.json"
+        if meta_path.exists() and json.loads(meta_path.read_text()).get("key") == key:
+            print(f"  Validation cache hit: {cache_dir}")
+            return cls(cache_dir, in_memory)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path.unlink(missing_ok=True)  # invalid until fully written
+        first, _ = dataset[0]
+        if first.dtype == torch.uint8:
+            kind = "uint8"
+        else:
+            kind = "normalized"
+            error = (_to_pixels(first[None]).float().div(255) - _MEAN) / _STD - first[None]
+            if error.abs().max() > 1e-2:
+                raise ValueError("Validation cache needs uint8 tensors or ImageNet-normalized "
+                                 "ToTensor output; this transform produces neither")
+        num_images = len(dataset)
+        images = np.memmap(cache_dir / "images.u8", dtype=np.uint8, mode="w+",
+                           shape=(num_images, *first.shape))
+        labels = np.empty(num_images, dtype=np.int64)
+        loader = DataLoader(dataset, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+
+        start, offset = time.perf_counter(), 0
+        for batch, targets in loader:
+            n = batch.size(0)
+            pixels = batch if kind == "uint8" else _to_pixels(batch)
+            images[offset:offset + n] = pixels.numpy()
+            labels[offset:offset + n] = targets.numpy()
+            offset += n
+        images.flush()
+        del images
+        np.save(cache_dir / "labels.npy", labels)
+        meta_path.write_text(json.dumps({
+            "key": key, "kind": kind, "num_images": num_images, "shape": list(first.shape),
+        }, indent=2))
+        print(f"  Cached {num_images} validation images ({time.perf_counter() - start:.0f}s) "
+              f"-> {cache_dir}")
+        return cls(cache_dir, in_memory)
+
+    def loader(self, batch_size, sampler=None):
+        return CachedTensorLoader(self, batch_size, sampler)
+
+
+class CachedTensorLoader:
+    """Loader-compatible iterable of ``(images, labels)`` batches from a ``ValTensorCache``.
+
+    Drop-in for the validation DataLoader in ``evaluate`` and
+    ``collect_predictions``: batches come out in dataset order (or
+    ``sampler`` order) with the dtype the original loader produced.
+    """
+
+    def __init__(self, cache, batch_size, sampler=None):
+        self.cache = cache
+        self.batch_size = batch_size
+        self.sampler = sampler
+
+    def __len__(self):
+        n = len(self.sampler) if self.sampler is not None else self.cache.num_images
+        return (n + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        if self.sampler is not None:
+            indices = np.fromiter(iter(self.sampler), dtype=np.int64)
+        else:
+            indices = np.arange(self.cache.num_images)
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            if (np.diff(batch) == 1).all():  # contiguous: one slice read, no gather
+                images = torch.from_numpy(np.array(self.cache.images[batch[0]:batch[-1] + 1]))
+            else:
+                images = torch.from_numpy(self.cache.images[batch])
+            if self.cache.kind == "normalized":
+                images = images.float().div_(255).sub_(_MEAN).div_(_STD)
+            yield images, torch.from_numpy(self.cache.labels[batch])
+
+
+def cached_val_loader(val_loader, cache_dir=VAL_CACHE_DIR, in_memory=False):
+    """Cache ``val_loader``'s dataset and return a loader over it with the same batch size."""
+    batch_size = val_loader.batch_size or 64
+    cache = ValTensorCache.build(val_loader.dataset, cache_dir, batch_size=batch_size,
+                                 num_workers=val_loader.num_workers, in_memory=in_memory)
+    sampler = getattr(val_loader, "sampler", None)
+    # A plain SequentialSampler is dataset order already; keep custom ones (e.g. a rank's stride)
+    if isinstance(sampler, SequentialSampler):
+        sampler = None
+    return cache.loader(batch_size, sampler=sampler)
@@ -1,3 +1,3 @@
 from src.evaluation.metrics import collect_predictions, print_classification_report
-from src.evaluation.benchmark import benchmark_inference
+from src.evaluation.benchmark import benchmark_inference, run_benchmark_matrix
 from src.evaluation.export import save_results
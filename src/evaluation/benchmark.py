@@ -1,27 +1,295 @@
-"""Inference speed benchmarking."""
+"""Inference speed benchmarking: single-number check and full backend matrix."""
+import io
+import itertools
+import json
+import multiprocessing as mp
+import platform
+import queue as queue_module
+import sys
 import time
+from pathlib import Path
 
 import numpy as np
 import torch
 
-from src.config import IMG_SIZE
+from src.config import (
+    BENCHMARK_PATH, FILTERED_DIR, IMAGENET_MEAN, IMAGENET_STD, IMG_SIZE, MODEL_PATH,
+    PROJECT_ROOT,
+)
 
+BACKENDS = ("torch", "onnx", "tflite")
+INPUT_SOURCES = ("synthetic", "jpeg")
+EXPORT_PATHS = {
+    "onnx": PROJECT_ROOT / "exports" / "crop_disease_classifier.onnx",
+    "tflite": PROJECT_ROOT / "exports" / "crop_disease_classifier.tflite",
+}
+
+
+def _synchronize(device):
+    if device.type == "mps":
+        torch.mps.synchronize()
+    elif device.type == "cuda":
+        torch.cuda.synchronize()
 
-def benchmark_inference(model, device):
-    """Measure average inference time over 50 runs."""
-    sample = torch.randn(1, 3, IMG_SIZE, IMG_SIZE).to(device)
-    with torch.no_grad():
-        _ = model(sample)  # warmup
 
+def benchmark_inference(model, device, runs=50, warmup=5):
+    """Measure average batch-1 inference time (ms) on a random input."""
+    sample = torch.randn(1, 3, IMG_SIZE, IMG_SIZE).to(device)
     times = []
-    with torch.no_grad():
-        for _ in range(50):
-            start = time.time()
-            _ = model(sample)
-            if device.type == "mps":
-                torch.mps.synchronize()
-            elif device.type == "cuda":
-                torch.cuda.synchronize()
-            times.append(time.time() - start)
-
-    return np.mean(times) * 1000
+    with torch.inference_mode():
+        for _ in range(warmup):
+            model(sample)
+        _synchronize(device)
+
+        for _ in range(runs):
+            start = time.perf_counter_ns()
+            model(sample)
+            _synchronize(device)
+            times.append(time.perf_counter_ns() - start)
+
+    return np.mean(times) / 1e6
+
+
+# ── Matrix: runs in a fresh process per configuration ──────────
+
+class _Skip(Exception):
+    """Configuration not runnable here (runtime missing, fixed batch size, ...)."""
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _torch_runner(model_path, threads, batch_size):
+    from src.models.classifier import load_checkpoint_model
+
+    torch.set_num_threads(threads)
+    model = load_checkpoint_model(model_path)
+
+    def run(batch):
+        with torch.inference_mode():
+            return model(torch.from_numpy(batch)).numpy()
+    return run
+
+
+def _onnx_runner(model_path, threads, batch_size):
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise _Skip("onnxruntime not installed")
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    if isinstance(model_input.shape[0], int) and model_input.shape[0] != batch_size:
+        raise _Skip(f"model has fixed batch size {model_input.shape[0]}")
+
+    def run(batch):
+        return session.run(None, {model_input.name: batch})[0]
+    return run
+
+
+def _tflite_runner(model_path, threads, batch_size):
+    try:
+        import tflite_runtime.interpreter as tflite
+    except ImportError:
+        try:
+            import tensorflow.lite as tflite
+        except ImportError:
+            raise _Skip("no TFLite runtime installed")
+    interpreter = tflite.Interpreter(model_path=str(model_path), num_threads=threads)
+    input_detail = interpreter.get_input_details()[0]
+    nhwc = input_detail["shape"][-1] == 3
+    if input_detail["shape"][0] != batch_size:
+        shape = [batch_size, IMG_SIZE, IMG_SIZE, 3] if nhwc else [batch_size, 3, IMG_SIZE, IMG_SIZE]
+        interpreter.resize_tensor_input(input_detail["index"], shape)
+    interpreter.allocate_tensors()
+    output_index = interpreter.get_output_details()[0]["index"]
+
+    def run(batch):
+        if nhwc:
+            batch = np.ascontiguousarray(batch.transpose(0, 2, 3, 1))
+        interpreter.set_tensor(input_detail["index"], batch)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+    return run
+
+
+_RUNNERS = {"torch": _torch_runner, "onnx": _onnx_runner, "tflite": _tflite_runner}
+
+
+def _jpeg_batches(jpegs, batch_size):
+    """Yield NCHW float32 batches decoded and preprocessed exactly like the predictor."""
+    from PIL import Image
+    from torchvision import transforms
+
+    preprocess = transforms.Compose([
+        transforms.Resize((IMG_SIZE, IMG_SIZE)),
+        transforms.ToTensor(),
+        transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
+    ])
+    for start in itertools.count(step=batch_size):
+        images = [
+            Image.open(io.BytesIO(jpegs[(start + i) % len(jpegs)])).convert("RGB")
+            for i in range(batch_size)
+        ]
+        yield torch.stack([preprocess(img) for img in images]).numpy()
+
+
+def _measure(cell, model_path, jpegs, warmup, iterations, launched_ns):
+    backend, batch_size, threads = cell["backend"], cell["batch_size"], cell["threads"]
+    load_start = time.perf_counter_ns()
+    run = _RUNNERS[backend](model_path, threads, batch_size)
+    load_ns = time.perf_counter_ns() - load_start
+
+    if cell["input"] == "jpeg":
+        batches = _jpeg_batches(jpegs, batch_size)
+    else:
+        synthetic = np.random.default_rng(0).standard_normal(
+            (batch_size, 3, IMG_SIZE, IMG_SIZE), dtype=np.float32
+        )
+        batches = itertools.repeat(synthetic)
+
+    first_start = time.perf_counter_ns()
+    run(next(batches))
+    first_done = time.perf_counter_ns()
+    for _ in range(warmup):
+        run(next(batches))
+
+    # Timed region covers input preparation too, so "jpeg" includes decode + preprocess
+    latencies = []
+    timed_start = time.perf_counter_ns()
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        run(next(batches))
+        latencies.append(time.perf_counter_ns() - start)
+    elapsed_s = (time.perf_counter_ns() - timed_start) / 1e9
+
+    latencies_ms = np.array(latencies) / 1e6
+    return {
+        **cell,
+        "status": "ok",
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "per_image_ms": float(latencies_ms.mean() / batch_size),
+        "throughput_ips": batch_size * iterations / elapsed_s,
+        "load_ms": load_ns / 1e6,
+        "first_inference_ms": (first_done - first_start) / 1e6,
+        # perf_counter is system-wide monotonic, so the parent's launch time is comparable
+        "cold_start_ms": (first_done - launched_ns) / 1e6,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_cell(cell, model_path, jpegs, warmup, iterations, launched_ns, queue):
+    try:
+        queue.put(_measure(cell, model_path, jpegs, warmup, iterations, launched_ns))
+    except _Skip as exc:
+        queue.put({**cell, "status": "skipped", "reason": str(exc)})
+    except Exception as exc:
+        queue.put({**cell, "status": "error", "reason": f"{type(exc).__name__}: {exc}"})
+
+
+def _wait_for_result(proc, queue, cell):
+    # A crashed or OOM-killed worker never reports back; don't wait forever
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                return {**cell, "status": "error", "reason": f"worker exited with code {proc.exitcode}"}
+
+
+def _sample_jpegs(image_dir, count=32, seed=42):
+    """Real JPEG bytes from ``image_dir`` (default: the processed dataset).
+
+    Falls back to synthetic photo-sized JPEGs when no dataset is available,
+    so decode cost is still represented.
+    """
+    from PIL import Image
+
+    image_dir = Path(image_dir or FILTERED_DIR)
+    rng = np.random.default_rng(seed)
+    paths = sorted(p for p in image_dir.rglob("*") if p.suffix.lower() in {".jpg", ".jpeg"}) \
+        if image_dir.exists() else []
+    if paths:
+        chosen = rng.choice(len(paths), size=min(count, len(paths)), replace=False)
+        return [paths[i].read_bytes() for i in sorted(chosen)], str(image_dir)
+
+    jpegs = []
+    for _ in range(count):
+        base = rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(base).resize((256, 256), Image.BICUBIC).save(buffer, format="JPEG", quality=90)
+        jpegs.append(buffer.getvalue())
+    return jpegs, "synthetic 256x256"
+
+
+def run_benchmark_matrix(backends=BACKENDS, batch_sizes=(1, 8, 32), threads=(1, 2, 4),
+                         inputs=INPUT_SOURCES, warmup=10, iterations=50,
+                         model_path=None, image_dir=None, output_path=BENCHMARK_PATH):
+    """Benchmark every backend x batch size x thread count x input source on CPU.
+
+    Each configuration runs in a freshly spawned process, so cold start
+    (spawn + imports + model load + first inference) and peak RSS are
+    measured per configuration rather than inherited from earlier runs.
+    Backends whose export or runtime is missing are recorded as skipped.
+    Writes the results to ``output_path`` and returns them.
+    """
+    model_paths = {"torch": Path(model_path or MODEL_PATH), **EXPORT_PATHS}
+    jpegs, jpeg_source = _sample_jpegs(image_dir) if "jpeg" in inputs else ([], None)
+    ctx = mp.get_context("spawn")
+
+    rows = []
+    for backend, batch_size, n_threads, source in itertools.product(
+        backends, batch_sizes, threads, inputs
+    ):
+        cell = {"backend": backend, "batch_size": batch_size, "threads": n_threads, "input": source}
+        if not model_paths[backend].exists():
+            row = {**cell, "status": "skipped", "reason": f"{model_paths[backend]} not found"}
+        else:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_cell, args=(
+                cell, model_paths[backend], jpegs, warmup, iterations,
+                time.perf_counter_ns(), queue,
+            ))
+            proc.start()
+            row = _wait_for_result(proc, queue, cell)
+            proc.join()
+        rows.append(row)
+
+        if row["status"] == "ok":
+            print(f"  {backend:<7} {source:<9} batch={batch_size:<3} threads={n_threads:<2} "
+                  f"p50={row['p50_ms']:7.1f} ms  p99={row['p99_ms']:7.1f} ms  "
+                  f"{row['throughput_ips']:7.1f} img/s  cold={row['cold_start_ms']:6.0f} ms  "
+                  f"rss={row['peak_rss_mb'] or 0:5.0f} MB")
+        else:
+            print(f"  {backend:<7} {source:<9} batch={batch_size:<3} threads={n_threads:<2} "
+                  f"{row['status']}: {row['reason']}")
+
+    report = {
+        "environment": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": mp.cpu_count(),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+        },
+        "settings": {"warmup": warmup, "iterations": iterations, "jpeg_source": jpeg_source},
+        "results": rows,
+    }
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved: {output_path}")
+    return report
@@ -6,13 +6,21 @@ import numpy as np
 import pandas as pd
 from sklearn.metrics import classification_report
 
-from src.config import MODEL_PATH, METRICS_DIR
-from src.evaluation.benchmark import benchmark_inference
+from src.config import BENCHMARK_PATH, MODEL_PATH, METRICS_DIR
+from src.evaluation.benchmark import benchmark_inference, run_benchmark_matrix
+from src.evaluation.perf_history import append_runs
 
 
 def save_results(accuracy, model, class_names, history, per_class_acc,
-                 total_params, total_images, best_val_acc, y_true, y_pred, device):
-    """Save class_names.json, results.json, and model_performance_summary.csv."""
+                 total_params, total_images, best_val_acc, y_true, y_pred, device,
+                 benchmark=False):
+    """Save class_names.json, results.json, and model_performance_summary.csv.
+
+    Only the single-number benchmark runs by default. With ``benchmark``
+    the CPU backend matrix is also run (several minutes, one process per
+    configuration), written to benchmark_matrix.json for the dashboard and
+    appended to the benchmark history.
+    """
     # Class names
     with open(METRICS_DIR / "class_names.json", "w") as f:
         json.dump(class_names, f, indent=2)
@@ -28,6 +36,11 @@ def save_results(accuracy, model, class_names, history, per_class_acc,
     print(f"  Avg Inference:    {avg_ms:.1f} ms/image")
     print(f"  Val Accuracy:     {accuracy:.4f}")
 
+    if benchmark:
+        print("\nINFERENCE BENCHMARK MATRIX (CPU)")
+        report = run_benchmark_matrix(batch_sizes=(1, 8), threads=(1, 4), output_path=BENCHMARK_PATH)
+        append_runs([report], label="train")
+
     # Results JSON
     num_classes = len(class_names)
     results = {
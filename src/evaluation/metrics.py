@@ -6,14 +6,22 @@ from sklearn.metrics import classification_report
 from src.data.transforms import inv_normalize
 
 
-def collect_predictions(model, val_loader, device):
-    """Run the model on the validation set and collect predictions."""
+def collect_predictions(model, val_loader, device, batch_transform=None):
+    """Run the model on the validation set and collect predictions.
+
+    ``val_loader`` may be a DataLoader or a ``CachedTensorLoader`` from
+    ``src.data.val_cache``; ``batch_transform`` (``BatchAugment(augment=False)``)
+    normalizes loaders that yield uint8 batches.
+    """
     model.eval()
     y_true, y_pred, y_probs, images_viz = [], [], [], []
 
     with torch.no_grad():
         for images, labels in val_loader:
-            outputs = model(images.to(device))
+            images = images.to(device)
+            if batch_transform is not None:
+                images = batch_transform(images)
+            outputs = model(images)
             probs = torch.softmax(outputs, dim=1)
             max_probs, predicted = probs.max(1)
 
@@ -21,7 +29,7 @@ def collect_predictions(model, val_loader, device):
             y_pred.extend(predicted.cpu().numpy())
             y_probs.extend(max_probs.cpu().numpy())
 
-            for img in images:
+            for img in images.cpu():
                 img_viz = inv_normalize(img).permute(1, 2, 0).numpy()
                 img_viz = np.clip(img_viz, 0, 1)
                 images_viz.append(img_viz)
@@ -0,0 +1,222 @@
+"""Benchmark history store and statistical regression checks across runs."""
+import hashlib
+import json
+import math
+import platform
+import subprocess
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+from src.config import BENCHMARK_HISTORY_PATH, MODEL_PATH, PROJECT_ROOT
+
+# Metric -> True when larger is better
+METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "throughput_ips": True,
+    "peak_rss_mb": False,
+    "cold_start_ms": False,
+}
+CELL_KEYS = ("backend", "input", "batch_size", "threads")
+
+
+# ── Provenance ───────────────────────────────────────────────────
+
+def git_commit():
+    """Return (commit sha, dirty flag), or (None, None) outside a git checkout."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip() != ""
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cpu_model():
+    try:
+        for line in Path("/proc/cpuinfo").read_text().splitlines():
+            if line.startswith("model name"):
+                return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def environment():
+    """Everything outside the repo that moves inference numbers."""
+    import torch
+
+    from src.inference.runtime import plan_cpu_config
+
+    env = {
+        "platform": platform.platform(),
+        "cpu_model": _cpu_model(),
+        "cpu_budget": plan_cpu_config().cpu_budget,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+    }
+    for module in ("onnxruntime", "tflite_runtime", "tensorflow"):
+        try:
+            env[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            pass
+    return env
+
+
+def fingerprint(env):
+    return hashlib.sha256(json.dumps(env, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# ── Store ────────────────────────────────────────────────────────
+
+def append_runs(reports, label=None, model_path=None, history_path=BENCHMARK_HISTORY_PATH):
+    """Append benchmark matrix reports (one per repeat) to the JSONL history.
+
+    All reports passed together share a ``run_id``; each line is keyed by git
+    commit, checkpoint hash and environment fingerprint.
+    """
+    model_path = Path(model_path or MODEL_PATH)
+    commit, dirty = git_commit()
+    env = environment()
+    base = {
+        "run_id": uuid.uuid4().hex[:12],
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "git_commit": commit,
+        "git_dirty": dirty,
+        "checkpoint_sha256": file_sha256(model_path) if model_path.exists() else None,
+        "env_fingerprint": fingerprint(env),
+        "environment": env,
+    }
+
+    history_path = Path(history_path)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a") as f:
+        for repeat, report in enumerate(reports):
+            record = {
+                **base,
+                "repeat": repeat,
+                "settings": report["settings"],
+                "results": [r for r in report["results"] if r["status"] == "ok"],
+            }
+            f.write(json.dumps(record) + "\n")
+    print(f"Appended {len(reports)} run(s) to {history_path} (run_id={base['run_id']})")
+    return base["run_id"]
+
+
+def load_history(history_path=BENCHMARK_HISTORY_PATH):
+    history_path = Path(history_path)
+    if not history_path.exists():
+        return []
+    with open(history_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def select(records, ref):
+    """Records matching ``ref``: a run_id, label, or commit / checkpoint hash prefix."""
+    return [
+        r for r in records
+        if ref in (r["run_id"], r["label"])
+        or (r["git_commit"] or "").startswith(ref)
+        or (r["checkpoint_sha256"] or "").startswith(ref)
+    ]
+
+
+# ── Comparison ───────────────────────────────────────────────────
+
+def _samples(records):
+    """{cell: {metric: [one value per repeated run]}}."""
+    samples = defaultdict(lambda: defaultdict(list))
+    for record in records:
+        for row in record["results"]:
+            cell = tuple(row[k] for k in CELL_KEYS)
+            for metric in METRICS:
+                if row.get(metric) is not None:
+                    samples[cell][metric].append(row[metric])
+    return samples
+
+
+def ratio_ci(baseline, candidate, confidence=0.95):
+    """Confidence interval for mean(candidate) / mean(baseline).
+
+    Welch's t interval on log values: run-to-run noise is multiplicative,
+    and the unequal-variance form does not assume both sides are equally
+    noisy. Returns (ratio, low, high), or None with fewer than 2 runs a side.
+    """
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    b, c = np.log(baseline), np.log(candidate)
+    var_b, var_c = b.var(ddof=1) / len(b), c.var(ddof=1) / len(c)
+    diff = c.mean() - b.mean()
+    se = math.sqrt(var_b + var_c)
+    if se == 0:
+        return math.exp(diff), math.exp(diff), math.exp(diff)
+    dof = (var_b + var_c) ** 2 / (var_b ** 2 / (len(b) - 1) + var_c ** 2 / (len(c) - 1))
+    half = stats.t.ppf(0.5 + confidence / 2, dof) * se
+    return math.exp(diff), math.exp(diff - half), math.exp(diff + half)
+
+
+def compare(baseline_records, candidate_records, threshold=0.05, confidence=0.95):
+    """Compare every shared cell and metric between two sets of runs.
+
+    A change is a regression only when the whole confidence interval lies
+    beyond ``threshold`` in the bad direction (e.g. latency CI entirely above
+    +5%); likewise for improvements. Everything else is "unchanged" or, when
+    the interval is too wide to decide, "inconclusive".
+    """
+    base, cand = _samples(baseline_records), _samples(candidate_records)
+    rows = []
+    for cell in sorted(set(base) & set(cand), key=str):
+        for metric, higher_is_better in METRICS.items():
+            b, c = base[cell].get(metric, []), cand[cell].get(metric, [])
+            if not b and not c:
+                continue
+            ci = ratio_ci(b, c, confidence)
+            row = {
+                **dict(zip(CELL_KEYS, cell)), "metric": metric,
+                "baseline_mean": float(np.mean(b)) if b else None,
+                "candidate_mean": float(np.mean(c)) if c else None,
+                "runs": [len(b), len(c)],
+            }
+            if ci is None:
+                rows.append({**row, "verdict": "insufficient runs"})
+                continue
+
+            ratio, low, high = ci
+            # Express as "how much worse": >1 is worse for every metric
+            worse_low, worse_high = (1 / high, 1 / low) if higher_is_better else (low, high)
+            if worse_low > 1 + threshold:
+                verdict = "regression"
+            elif worse_high < 1 - threshold:
+                verdict = "improvement"
+            elif worse_low >= 1 - threshold and worse_high <= 1 + threshold:
+                verdict = "unchanged"
+            else:
+                verdict = "inconclusive"
+            rows.append({
+                **row,
+                "change_pct": (ratio - 1) * 100,
+                "ci_pct": [(low - 1) * 100, (high - 1) * 100],
+                "verdict": verdict,
+            })
+    return rows
@@ -1,12 +1,13 @@
 """Inference predictor for the Streamlit app."""
 import json
 
+import numpy as np
 import torch
-import torch.nn as nn
-from torchvision import transforms, models
+from torchvision import transforms
 from PIL import Image
 
 from src.config import IMG_SIZE, MODEL_PATH, METRICS_DIR, IMAGENET_MEAN, IMAGENET_STD
+from src.models.classifier import load_checkpoint_model
 
 DISEASE_INFO = {
     "Corn: Common Rust": "Apply fungicide (e.g., azoxystrobin). Remove severely affected leaves.",
@@ -46,21 +47,13 @@ class DiseasePredictor:
             transforms.ToTensor(),
             transforms.Normalize(IMAGENET_MEAN, IMAGENET_STD),
         ])
+        # Normalisation constants for the raw-pixel path, shaped for NCHW broadcasting
+        self._mean = torch.tensor(IMAGENET_MEAN, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(IMAGENET_STD, device=self.device).view(1, 3, 1, 1)
 
     def _load_model(self):
-        model = models.mobilenet_v2(weights=None)
-        model.classifier = nn.Sequential(
-            nn.Dropout(0.3),
-            nn.Linear(model.last_channel, 128),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(128, self.num_classes),
-        )
-        model.load_state_dict(
-            torch.load(self.model_path, map_location=self.device, weights_only=True)
-        )
-        model.eval()
-        return model.to(self.device)
+        # Teacher (MobileNetV2) or distilled student: the architecture comes from the checkpoint
+        return load_checkpoint_model(self.model_path, self.device)
 
     def predict(self, image: Image.Image, top_k: int = 5):
         """Run prediction on a PIL Image.
@@ -68,7 +61,26 @@ class DiseasePredictor:
         Returns dict with keys: top_class, confidence, top_k_probs, recommendation.
         """
         input_tensor = self.preprocess(image).unsqueeze(0).to(self.device)
+        return self._predict_tensor(input_tensor, top_k)
 
+    def predict_pixels(self, pixels: np.ndarray, top_k: int = 5):
+        """Run prediction on an already-resized uint8 RGB array.
+
+        ``pixels`` must have shape (IMG_SIZE, IMG_SIZE, 3). Skips PIL decoding
+        and resizing entirely; only normalisation is applied.
+        Returns the same dict as :meth:`predict`.
+        """
+        if pixels.dtype != np.uint8 or pixels.shape != (IMG_SIZE, IMG_SIZE, 3):
+            raise ValueError(
+                f"Expected uint8 array of shape ({IMG_SIZE}, {IMG_SIZE}, 3), "
+                f"got {pixels.dtype} {pixels.shape}"
+            )
+        input_tensor = torch.from_numpy(pixels).to(self.device)
+        input_tensor = input_tensor.permute(2, 0, 1).unsqueeze(0).float().div_(255.0)
+        input_tensor = (input_tensor - self._mean) / self._std
+        return self._predict_tensor(input_tensor, top_k)
+
+    def _predict_tensor(self, input_tensor: torch.Tensor, top_k: int):
         with torch.no_grad():
             outputs = self.model(input_tensor)
             probs = torch.softmax(outputs, dim=1)[0]
@@ -0,0 +1,137 @@
+"""CPU topology detection and PyTorch thread configuration for inference processes.
+
+PyTorch defaults its intra-op pool to every core on the host. With several
+server workers on one machine that oversubscribes the CPU, so each process
+should size its pools to its share of the container's CPU budget.
+"""
+import logging
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import torch
+
+logger = logging.getLogger("src.inference.runtime")
+
+_CGROUP_V2_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+_CGROUP_V1_QUOTA = Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+_CGROUP_V1_PERIOD = Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+
+_applied_config = None
+
+
+@dataclass
+class CpuConfig:
+    """Resolved thread/core layout for one inference process."""
+
+    host_cpus: int
+    affinity_cpus: int
+    cgroup_quota_cpus: float | None
+    cpu_budget: int
+    workers: int
+    intra_op_threads: int
+    inter_op_threads: int
+    pinned_cpus: list[int] | None = None
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def cgroup_cpu_quota():
+    """Return the container CPU quota in CPUs, or None when unlimited/unknown."""
+    try:
+        quota, period = _CGROUP_V2_CPU_MAX.read_text().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(_CGROUP_V1_QUOTA.read_text())
+        period = int(_CGROUP_V1_PERIOD.read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    """CPU ids this process may run on (respects taskset/cpuset)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpu_config(workers=1, threads=None, interop_threads=None,
+                    pin=False, worker_index=None):
+    """Split the CPU budget evenly across ``workers`` processes.
+
+    The budget is the smaller of the affinity mask and the cgroup quota
+    (rounded down, minimum 1). ``threads``/``interop_threads`` override the
+    computed values. With ``pin`` and a ``worker_index``, the worker gets a
+    disjoint slice of the allowed CPUs, if there are enough to go round.
+    """
+    cpus = available_cpus()
+    quota = cgroup_cpu_quota()
+    budget = len(cpus) if quota is None else max(1, min(len(cpus), math.floor(quota)))
+    workers = max(1, workers)
+
+    intra = threads or max(1, budget // workers)
+    inter = interop_threads or 1
+
+    pinned = None
+    if pin and worker_index is not None and len(cpus) >= workers * intra:
+        start = (worker_index % workers) * intra
+        pinned = cpus[start:start + intra]
+
+    return CpuConfig(
+        host_cpus=os.cpu_count() or len(cpus),
+        affinity_cpus=len(cpus),
+        cgroup_quota_cpus=quota,
+        cpu_budget=budget,
+        workers=workers,
+        intra_op_threads=intra,
+        inter_op_threads=inter,
+        pinned_cpus=pinned,
+    )
+
+
+def apply_cpu_config(config):
+    """Apply a CpuConfig to this process's PyTorch thread pools and affinity."""
+    global _applied_config
+
+    torch.set_num_threads(config.intra_op_threads)
+    try:
+        torch.set_num_interop_threads(config.inter_op_threads)
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work in the process
+        logger.warning("Inter-op thread pool already started; keeping %d threads",
+                       torch.get_num_interop_threads())
+        config.inter_op_threads = torch.get_num_interop_threads()
+    if config.pinned_cpus:
+        os.sched_setaffinity(0, config.pinned_cpus)
+
+    logger.info(
+        "CPU config: budget=%d (host=%d, affinity=%d, quota=%s), workers=%d, "
+        "intra-op=%d, inter-op=%d, pinned=%s",
+        config.cpu_budget, config.host_cpus, config.affinity_cpus,
+        config.cgroup_quota_cpus, config.workers, config.intra_op_threads,
+        config.inter_op_threads, config.pinned_cpus,
+    )
+    _applied_config = config
+    return config
+
+
+def configure_cpu(workers=1, threads=None, interop_threads=None,
+                  pin=False, worker_index=None):
+    """Plan and apply the thread layout for this process. Returns the CpuConfig."""
+    return apply_cpu_config(plan_cpu_config(
+        workers, threads, interop_threads, pin, worker_index,
+    ))
+
+
+def current_cpu_config():
+    """The CpuConfig applied in this process, or None if not configured yet."""
+    return _applied_config
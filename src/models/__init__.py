@@ -1 +1 @@
-from src.models.classifier import build_model, unfreeze_top_layers
+from src.models.classifier import build_model, load_checkpoint_model, unfreeze_top_layers
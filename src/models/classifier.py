@@ -1,28 +1,49 @@
-"""Model architecture: MobileNetV2 with custom classification head."""
+"""Model architecture: MobileNet backbones with custom classification head."""
+import torch
 import torch.nn as nn
 from torchvision import models
 
 from src.config import UNFREEZE_LAST_N_BLOCKS
 
+# name -> (torchvision constructor, constructor kwargs, ImageNet weights or None)
+ARCHITECTURES = {
+    "mobilenet_v2": (models.mobilenet_v2, {}, "IMAGENET1K_V1"),
+    "mobilenet_v2_050": (models.mobilenet_v2, {"width_mult": 0.5}, None),
+    "mobilenet_v3_small": (models.mobilenet_v3_small, {}, "IMAGENET1K_V1"),
+}
 
-def build_model(num_classes, device, pretrained=True):
-    """Build MobileNetV2 with frozen base and custom classifier.
 
+def build_model(num_classes, device, pretrained=True, dropout=(0.3, 0.2), arch="mobilenet_v2",
+                verbose=True):
+    """Build a backbone from ``ARCHITECTURES`` with frozen base and custom classifier.
+
+    ``dropout`` is the (before hidden layer, before output) dropout pair.
+    Every architecture gets the same head, so checkpoints differ only in
+    their ``features`` weights. Architectures without ImageNet weights
+    (``mobilenet_v2_050``) start from random init even when ``pretrained``.
+    ``verbose`` prints the parameter counts and the random-init notice;
+    checkpoint loading turns it off.
     Returns (model, total_params, trainable_params).
     """
-    weights = "IMAGENET1K_V1" if pretrained else None
-    base_model = models.mobilenet_v2(weights=weights)
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture {arch!r}; choose from {sorted(ARCHITECTURES)}")
+    builder, kwargs, imagenet_weights = ARCHITECTURES[arch]
+    if verbose and pretrained and imagenet_weights is None:
+        print(f"No ImageNet weights for {arch}; using random init")
+    weights = imagenet_weights if pretrained else None
+    base_model = builder(weights=weights, **kwargs)
 
     # Freeze all base layers
     for param in base_model.parameters():
         param.requires_grad = False
 
-    # Custom classification head
+    # Custom classification head, fed by the pooled backbone output
+    in_features = next(m for m in base_model.classifier if isinstance(m, nn.Linear)).in_features
     base_model.classifier = nn.Sequential(
-        nn.Dropout(0.3),
-        nn.Linear(base_model.last_channel, 128),
+        nn.Dropout(dropout[0]),
+        nn.Linear(in_features, 128),
         nn.ReLU(),
-        nn.Dropout(0.2),
+        nn.Dropout(dropout[1]),
         nn.Linear(128, num_classes),
     )
 
@@ -30,14 +51,46 @@ def build_model(num_classes, device, pretrained=True):
     total_params = sum(p.numel() for p in model.parameters())
     trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
 
-    print(f"Total parameters:     {total_params:,}")
-    print(f"Trainable parameters: {trainable_params:,}")
+    if verbose:
+        print(f"Total parameters:     {total_params:,}")
+        print(f"Trainable parameters: {trainable_params:,}")
     return model, total_params, trainable_params
 
 
-def unfreeze_top_layers(model):
+def infer_arch(state_dict):
+    """The ``ARCHITECTURES`` name a checkpoint's state dict was saved from."""
+    if any(".block." in key for key in state_dict):  # MobileNetV3 inverted residuals
+        return "mobilenet_v3_small"
+    stem_channels = state_dict["features.0.0.weight"].shape[0]
+    return "mobilenet_v2" if stem_channels == 32 else "mobilenet_v2_050"
+
+
+def load_checkpoint_model(model_path, device=None):
+    """Load any checkpoint written by training or distillation, in eval mode.
+
+    The architecture, class count and (for channel-pruned MobileNetV2) the
+    hidden width of every block are read from the state dict itself, so
+    teacher, student and pruned checkpoints load the same way.
+    """
+    device = device or torch.device("cpu")
+    state_dict = torch.load(model_path, map_location=device, weights_only=True)
+    num_classes = state_dict["classifier.4.weight"].shape[0]
+    arch = infer_arch(state_dict)
+    model, _, _ = build_model(num_classes, device, pretrained=False, arch=arch, verbose=False)
+    if arch.startswith("mobilenet_v2"):
+        from src.models.pruning import apply_hidden_channels, prunable_blocks
+
+        widths = [state_dict[f"features.{i}.conv.0.0.weight"].shape[0]
+                  for i, _ in prunable_blocks(model)]
+        model = apply_hidden_channels(model, widths).to(device)
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def unfreeze_top_layers(model, n_blocks=UNFREEZE_LAST_N_BLOCKS):
     """Unfreeze the last N feature blocks for fine-tuning."""
-    for param in model.features[-UNFREEZE_LAST_N_BLOCKS:].parameters():
+    for param in model.features[-n_blocks:].parameters():
         param.requires_grad = True
 
     trainable = sum(p.numel() for p in model.parameters() if p.requires_grad)
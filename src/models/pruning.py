@@ -0,0 +1,158 @@
+"""Structured channel pruning of MobileNetV2 inverted-residual blocks."""
+import json
+import math
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torchvision.models.mobilenetv2 import InvertedResidual
+
+from src.config import IMG_SIZE
+from src.models.classifier import build_model, infer_arch
+
+
+def prunable_blocks(model):
+    """(index, block) for every ``features`` block with an expansion layer.
+
+    Only the expanded (hidden) channels are pruned: they live entirely
+    inside the block, so block inputs, outputs and residual connections
+    keep their shapes. The first block (expand ratio 1) has none.
+    """
+    if not any(isinstance(block, InvertedResidual) for block in model.features):
+        raise ValueError("Channel pruning supports MobileNetV2 backbones only")
+    return [(i, block) for i, block in enumerate(model.features)
+            if isinstance(block, InvertedResidual) and len(block.conv) == 4]
+
+
+def hidden_channels(model):
+    """Hidden width of every prunable block, in ``features`` order."""
+    return [block.conv[1][0].out_channels for _, block in prunable_blocks(model)]
+
+
+def _select(module, index, dim=0):
+    """Copy of a Conv2d/BatchNorm2d keeping ``index`` along ``dim`` of its weights."""
+    if isinstance(module, nn.BatchNorm2d):
+        new = nn.BatchNorm2d(len(index), eps=module.eps, momentum=module.momentum)
+        for name in ("weight", "bias", "running_mean", "running_var"):
+            getattr(new, name).data.copy_(getattr(module, name).data[index])
+        return new.train(module.training)
+    in_channels = len(index) if dim == 1 or module.groups > 1 else module.in_channels
+    out_channels = len(index) if dim == 0 else module.out_channels
+    new = nn.Conv2d(in_channels, out_channels, module.kernel_size, module.stride, module.padding,
+                    groups=len(index) if module.groups > 1 else 1, bias=False)
+    new.weight.data.copy_(module.weight.data.index_select(dim, index))
+    return new
+
+
+def _shrink_block(block, keep):
+    """Keep hidden channels ``keep`` (sorted indices) of an inverted-residual block."""
+    expand, depthwise, project, project_bn = block.conv
+    keep = keep.to(project.weight.device)
+    dropped = torch.ones(depthwise[1].num_features, dtype=torch.bool, device=keep.device)
+    dropped[keep] = False
+    # A removed channel still fed relu6(beta) into the projection on average; fold it into the BN
+    residue = F.relu6(depthwise[1].bias.data[dropped])
+    project_bn.running_mean.data -= project.weight.data[:, dropped, 0, 0] @ residue
+
+    expand[0], expand[1] = _select(expand[0], keep), _select(expand[1], keep)
+    depthwise[0], depthwise[1] = _select(depthwise[0], keep), _select(depthwise[1], keep)
+    block.conv[2] = _select(project, keep, dim=1)
+
+
+def channel_scores(model):
+    """Importance of each block's hidden channels: |depthwise BN gamma| / layer mean.
+
+    Normalizing by the layer mean makes scores comparable across blocks,
+    so one global threshold does not empty out the layers whose BN scales
+    happen to be small.
+    """
+    scores = {}
+    for i, block in prunable_blocks(model):
+        gamma = block.conv[1][1].weight.detach().abs()
+        scores[i] = gamma / gamma.mean().clamp_min(1e-12)
+    return scores
+
+
+def prune_step(model, ratio, min_channels=8, round_to=8):
+    """Remove the lowest-scoring ``ratio`` of all prunable hidden channels, in place.
+
+    Each block keeps at least ``min_channels`` channels, rounded up to a
+    multiple of ``round_to`` (friendlier to SIMD kernels and mobile
+    delegates). Returns the number of channels removed.
+    """
+    scores = channel_scores(model)
+    flat = torch.cat(list(scores.values())).cpu()
+    n_remove = int(len(flat) * ratio)
+    if n_remove == 0:
+        return 0
+    # Global ranking: count how many of the n_remove lowest scores fall in each block
+    sizes = torch.tensor([len(score) for score in scores.values()])
+    block_of = torch.repeat_interleave(torch.arange(len(sizes)), sizes)
+    lowest = torch.argsort(flat, stable=True)[:n_remove]
+    drops = torch.bincount(block_of[lowest], minlength=len(sizes)).tolist()
+    removed = 0
+    for (i, block), n_drop in zip(prunable_blocks(model), drops):
+        score = scores[i]
+        n_keep = len(score) - n_drop
+        n_keep = min(len(score), max(min_channels, math.ceil(n_keep / round_to) * round_to))
+        if n_keep == len(score):
+            continue
+        keep = score.topk(n_keep).indices.sort().values
+        _shrink_block(block, keep)
+        removed += len(score) - n_keep
+    model.to(next(model.parameters()).device)
+    return removed
+
+
+def apply_hidden_channels(model, widths):
+    """Narrow a freshly built model to ``widths`` so a pruned state dict loads into it."""
+    for (_, block), width in zip(prunable_blocks(model), widths):
+        if width != block.conv[1][0].out_channels:
+            _shrink_block(block, torch.arange(width))
+    return model
+
+
+def count_flops(model, img_size=IMG_SIZE):
+    """Multiply-accumulate count of one forward pass at ``img_size`` (convs and linears)."""
+    total = 0
+
+    def hook(module, inputs, output):
+        nonlocal total
+        if isinstance(module, nn.Conv2d):
+            kernel = module.kernel_size[0] * module.kernel_size[1]
+            total += output.numel() * kernel * module.in_channels // module.groups
+        else:
+            total += output.numel() * module.in_features
+
+    handles = [m.register_forward_hook(hook) for m in model.modules()
+               if isinstance(m, (nn.Conv2d, nn.Linear))]
+    device = next(model.parameters()).device
+    was_training = model.training
+    model.eval()
+    with torch.no_grad():
+        model(torch.zeros(1, 3, img_size, img_size, device=device))
+    model.train(was_training)
+    for handle in handles:
+        handle.remove()
+    return total
+
+
+def pruned_config(model):
+    """JSON-serialisable description that rebuilds a pruned model's shapes."""
+    return {
+        "arch": infer_arch(model.state_dict()),
+        "num_classes": model.classifier[-1].out_features,
+        "hidden_channels": hidden_channels(model),
+    }
+
+
+def save_pruned_config(model, path):
+    Path(path).write_text(json.dumps(pruned_config(model), indent=2))
+
+
+def build_pruned_model(config, device):
+    """Rebuild the (untrained) pruned architecture described by ``config``."""
+    model, _, _ = build_model(config["num_classes"], device, pretrained=False, arch=config["arch"],
+                              verbose=False)
+    return apply_hidden_channels(model, config["hidden_channels"]).to(device)
@@ -1 +1,2 @@
-from src.training.trainer import train_one_epoch, evaluate, train_model
+from src.training.trainer import train_one_epoch, evaluate, train_model, run_phase, new_history
+from src.training.feature_cache import FeatureCache, build_feature_loaders
@@ -0,0 +1,72 @@
+"""Asynchronous, atomic checkpoint writes and resumable training state."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+
+
+def snapshot(obj):
+    """Deep copy of ``obj`` with every tensor detached and copied to CPU.
+
+    Taken on the training thread, so the background write sees the weights
+    as they were at save time even while the next epoch updates them.
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return type(obj)((k, snapshot(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(v) for v in obj)
+    return obj
+
+
+def atomic_save(obj, path):
+    """``torch.save`` to a temp file in the same directory, fsync, then rename.
+
+    ``os.replace`` is atomic, so ``path`` always holds either the previous
+    complete checkpoint or the new one, never a partial write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AsyncCheckpointer:
+    """Write checkpoints on one background thread, in submission order.
+
+    ``save`` blocks only for the CPU snapshot. Writes complete in order, so
+    a state file saved after a best-model file never points at a best model
+    that is not on disk yet. ``wait`` blocks until everything submitted is
+    written and re-raises any write error.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = []
+
+    def save(self, obj, path):
+        self._pending = [f for f in self._pending if not f.done() or f.exception()]
+        self._pending.append(self._pool.submit(atomic_save, snapshot(obj), path))
+
+    def wait(self):
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.wait()
+        self._pool.shutdown()
+
+
+def load_training_state(path):
+    """The last complete training state at ``path``, or None if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return torch.load(path, map_location="cpu")
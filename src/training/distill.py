@@ -0,0 +1,73 @@
+"""Knowledge distillation: train a smaller student on a frozen teacher's soft targets."""
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from src.config import DISTILL_ALPHA, DISTILL_TEMPERATURE
+from src.training.trainer import train_model
+
+
+class DistillationLoss:
+    """``alpha`` x soft-target KL at ``temperature`` + (1 - ``alpha``) x hard-label cross-entropy.
+
+    The teacher needs the student's input images, which the training loop
+    only passes to the student, so ``attach(student)`` adds a forward
+    pre-hook that runs the frozen teacher on every training batch. In eval
+    mode no teacher logits are recorded and the loss is plain
+    cross-entropy, so validation loss stays comparable to normal training.
+    The soft term is scaled by ``temperature ** 2`` to keep its gradients
+    on the same scale as the hard term (Hinton et al., 2015).
+    """
+
+    def __init__(self, teacher, temperature=DISTILL_TEMPERATURE, alpha=DISTILL_ALPHA, weight=None):
+        self.teacher = teacher.eval()
+        for param in self.teacher.parameters():
+            param.requires_grad = False
+        self.temperature = temperature
+        self.alpha = alpha
+        self.hard_loss = nn.CrossEntropyLoss(weight=weight)
+        self._teacher_logits = None
+
+    def attach(self, student):
+        """Run the teacher on each batch ``student`` trains on. Returns the hook handle."""
+        return student.register_forward_pre_hook(self._run_teacher)
+
+    def _run_teacher(self, module, args):
+        if module.training:
+            with torch.no_grad():
+                self._teacher_logits = self.teacher(args[0])
+
+    def __call__(self, outputs, labels):
+        hard = self.hard_loss(outputs, labels)
+        teacher_logits, self._teacher_logits = self._teacher_logits, None
+        if teacher_logits is None:
+            return hard
+        t = self.temperature
+        soft = F.kl_div(F.log_softmax(outputs.float() / t, dim=1),
+                        F.log_softmax(teacher_logits.float() / t, dim=1),
+                        reduction="batchmean", log_target=True) * t * t
+        return self.alpha * soft + (1 - self.alpha) * hard
+
+
+def distill(student, teacher, train_loader, val_loader, class_weights_tensor, device,
+            temperature=DISTILL_TEMPERATURE, alpha=DISTILL_ALPHA, **train_kwargs):
+    """Train ``student`` with ``train_model`` against a frozen ``teacher``.
+
+    Both models see the same augmented batches, and the teacher runs under
+    the same autocast and memory format as the student. Phase 1 always runs
+    the full student rather than the feature cache, because the teacher
+    needs images. Other keyword arguments go to ``train_model``, e.g.
+    ``hparams={"unfreeze_blocks": len(student.features)}`` to fine-tune
+    a student that has no pretrained weights from end to end.
+    Returns (history dict, best_val_acc, phase1_epochs).
+    """
+    teacher = teacher.to(device)
+    if train_kwargs.get("channels_last"):
+        teacher = teacher.to(memory_format=torch.channels_last)
+    criterion = DistillationLoss(teacher, temperature, alpha, weight=class_weights_tensor)
+    hook = criterion.attach(student)
+    try:
+        return train_model(student, train_loader, val_loader, class_weights_tensor, device,
+                           feature_cache=False, criterion=criterion, **train_kwargs)
+    finally:
+        hook.remove()
@@ -0,0 +1,249 @@
+"""Opt-in multi-process CPU data-parallel training (DistributedDataParallel, gloo)."""
+import contextlib
+import json
+import os
+import pickle
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, IterableDataset, Sampler
+
+from src.config import BATCH_SIZE, MODEL_PATH, SEED
+from src.models.classifier import build_model, unfreeze_top_layers
+from src.training.profiler import StepProfiler
+from src.training.trainer import train_model, train_one_epoch
+
+
+class DistributedWeightedSampler(Sampler):
+    """``WeightedRandomSampler`` split across ranks.
+
+    Every rank draws the same global weighted sample for the epoch (seeded
+    with ``seed + epoch``) and keeps every ``num_replicas``-th index, so
+    together the ranks see what one process would. The sample is rounded
+    up to a multiple of ``num_replicas``: every rank gets the same number of
+    batches, otherwise DDP's gradient all-reduce deadlocks on the last one.
+    """
+
+    def __init__(self, weights, num_samples=None, num_replicas=None, rank=None, seed=SEED):
+        self.weights = torch.as_tensor(weights, dtype=torch.double)
+        self.num_replicas = num_replicas if num_replicas is not None else dist.get_world_size()
+        requested = num_samples or len(self.weights)
+        self.num_samples = -(-requested // self.num_replicas)  # per rank, rounded up
+        self.rank = rank if rank is not None else dist.get_rank()
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __iter__(self):
+        generator = torch.Generator().manual_seed(self.seed + self.epoch)
+        total = self.num_samples * self.num_replicas
+        indices = torch.multinomial(self.weights, total, replacement=True, generator=generator)
+        return iter(indices[self.rank::self.num_replicas].tolist())
+
+    def __len__(self):
+        return self.num_samples
+
+
+class _StridedSampler(Sampler):
+    """Every ``num_replicas``-th index without padding, so evaluation counts each sample once."""
+
+    def __init__(self, length, num_replicas, rank):
+        self.indices = range(rank, length, num_replicas)
+
+    def __iter__(self):
+        return iter(self.indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+
+def distributed_loaders(train_dataset, val_dataset, batch_size=BATCH_SIZE, sample_weights=None,
+                        num_workers=0, seed=SEED):
+    """Per-rank train/val loaders for the current process group.
+
+    The per-rank batch is ``batch_size // world_size``, so the global batch
+    and learning rates match single-process training. ``sample_weights``
+    enables class-balanced sampling, as ``WeightedRandomSampler`` does.
+    Iterable datasets (``TarShardDataset``) split themselves across ranks
+    and take no sampler; build the validation one with ``equalize=False``.
+    """
+    world_size, rank = dist.get_world_size(), dist.get_rank()
+    for dataset in (train_dataset, val_dataset):
+        if hasattr(dataset, "set_rank"):
+            dataset.set_rank(world_size, rank)
+    per_rank = max(1, batch_size // world_size)
+    if isinstance(train_dataset, IterableDataset):
+        if sample_weights is not None:
+            raise ValueError("sample_weights do not apply to an iterable dataset")
+        train_sampler = None
+    elif sample_weights is not None:
+        train_sampler = DistributedWeightedSampler(sample_weights, seed=seed)
+    else:
+        train_sampler = DistributedSampler(train_dataset, shuffle=True, seed=seed)
+    train_loader = DataLoader(train_dataset, batch_size=per_rank, sampler=train_sampler,
+                              num_workers=num_workers)
+    val_sampler = None if isinstance(val_dataset, IterableDataset) \
+        else _StridedSampler(len(val_dataset), world_size, rank)
+    val_loader = DataLoader(val_dataset, batch_size=per_rank, sampler=val_sampler,
+                            num_workers=num_workers)
+    return train_loader, val_loader
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _init_process(rank, world_size, port, threads):
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    # Split the cores between ranks instead of each rank claiming all of them
+    torch.set_num_threads(threads or max(1, (os.cpu_count() or 1) // world_size))
+    dist.init_process_group("gloo", rank=rank, world_size=world_size)
+    torch.manual_seed(SEED)  # identical initial weights on every rank
+
+
+@contextlib.contextmanager
+def _rank0_stdout(rank):
+    """Discard stdout on every rank but 0, so training logs are printed once."""
+    if rank == 0:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _ddp(model):
+    return DistributedDataParallel(model)
+
+
+def _train_worker(rank, world_size, port, threads, make_datasets, num_classes, batch_size,
+                  num_workers, result_path, train_kwargs):
+    _init_process(rank, world_size, port, threads)
+    train_kwargs = pickle.loads(train_kwargs)
+    with _rank0_stdout(rank):
+        try:
+            train_dataset, val_dataset, sample_weights = make_datasets()
+            train_loader, val_loader = distributed_loaders(
+                train_dataset, val_dataset, batch_size, sample_weights, num_workers,
+            )
+            model, _, _ = build_model(num_classes, torch.device("cpu"),
+                                      pretrained=train_kwargs.pop("pretrained"))
+            history, best_val_acc, phase1_epochs = train_model(
+                model, train_loader, val_loader, train_kwargs.pop("class_weights"), torch.device("cpu"),
+                wrap_model=_ddp, **train_kwargs,
+            )
+            if rank == 0:
+                Path(result_path).write_text(json.dumps({
+                    "history": history, "best_val_acc": best_val_acc, "phase1_epochs": phase1_epochs,
+                }))
+        finally:
+            dist.destroy_process_group()
+
+
+def train_data_parallel(world_size, make_datasets, num_classes, batch_size=BATCH_SIZE,
+                        class_weights=None, pretrained=True, threads=None, num_workers=0,
+                        checkpoint_path=MODEL_PATH, **train_kwargs):
+    """Run ``train_model`` in ``world_size`` local processes with DDP on gloo.
+
+    ``make_datasets`` is a picklable callable returning ``(train_dataset,
+    val_dataset, sample_weights_or_None)``; each rank calls it and reads its
+    own shard. Gradients are averaged across ranks every step, validation
+    metrics are all-reduced so every rank takes the same early-stopping and
+    checkpoint decisions, and rank 0 writes the checkpoints. Each rank gets
+    ``threads`` intra-op threads (default: cores / world_size). Other
+    keyword arguments go to ``train_model`` (``feature_cache`` and
+    ``val_cache`` are not supported here). Returns (history dict, best_val_acc, phase1_epochs).
+    """
+    if train_kwargs.get("feature_cache"):
+        raise ValueError("feature_cache is not supported with data-parallel training")
+    if train_kwargs.get("val_cache"):
+        raise ValueError("val_cache is not supported with data-parallel training")
+    train_kwargs.update(class_weights=class_weights, pretrained=pretrained,
+                        checkpoint_path=checkpoint_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = Path(tmp) / "result.json"
+        mp.spawn(_train_worker, nprocs=world_size, args=(
+            world_size, _free_port(), threads, make_datasets, num_classes, batch_size,
+            num_workers, str(result_path),
+            # Plain pickle copies tensors inline (e.g. BatchAugment's generator state);
+            # torch's shared-memory handles are not valid for every spawned rank
+            pickle.dumps(train_kwargs),
+        ))
+        result = json.loads(result_path.read_text())
+    return result["history"], result["best_val_acc"], result["phase1_epochs"]
+
+
+def _scaling_worker(rank, world_size, port, threads, make_datasets, num_classes, batch_size,
+                    epochs, result_path):
+    _init_process(rank, world_size, port, threads)
+    with _rank0_stdout(rank):
+        try:
+            train_dataset, val_dataset, sample_weights = make_datasets()
+            train_loader, _ = distributed_loaders(train_dataset, val_dataset, batch_size, sample_weights)
+            model, _, _ = build_model(num_classes, torch.device("cpu"), pretrained=False)
+            unfreeze_top_layers(model)  # Phase 2 is where the training time goes
+            ddp_model = _ddp(model)
+            optimizer = torch.optim.Adam(filter(lambda p: p.requires_grad, model.parameters()), lr=1e-4)
+            criterion = torch.nn.CrossEntropyLoss()
+            profiler = StepProfiler("cpu")
+
+            # One untimed epoch warms up allocator, thread pools and gloo buffers
+            train_one_epoch(ddp_model, train_loader, optimizer, criterion, "cpu", profiler=profiler)
+            dist.barrier()
+            start = time.perf_counter()
+            samples = 0
+            for epoch in range(epochs):
+                for owner in (train_loader.sampler, train_loader.dataset):
+                    if hasattr(owner, "set_epoch"):  # DistributedSampler, or streaming tar shards
+                        owner.set_epoch(epoch + 1)
+                train_one_epoch(ddp_model, train_loader, optimizer, criterion, "cpu", profiler=profiler)
+                samples += profiler.end_epoch()["samples"]
+            dist.barrier()
+            elapsed = time.perf_counter() - start
+            totals = torch.tensor([float(samples)])
+            dist.all_reduce(totals)
+            if rank == 0:
+                Path(result_path).write_text(json.dumps({
+                    "samples": totals.item(), "seconds": elapsed,
+                }))
+        finally:
+            dist.destroy_process_group()
+
+
+def measure_scaling(make_datasets, num_classes, world_sizes=(1, 2, 4, 8), batch_size=BATCH_SIZE,
+                    epochs=1, threads=None):
+    """Training throughput and scaling efficiency for each process count.
+
+    Each size trains the fine-tuning configuration for ``epochs`` timed
+    epochs after one warm-up epoch. Efficiency is throughput / (N x the
+    1-process throughput), or against the smallest size measured.
+    """
+    results = []
+    for world_size in world_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            result_path = Path(tmp) / "result.json"
+            mp.spawn(_scaling_worker, nprocs=world_size, args=(
+                world_size, _free_port(), threads, make_datasets, num_classes, batch_size,
+                epochs, str(result_path),
+            ))
+            run = json.loads(result_path.read_text())
+        throughput = run["samples"] / run["seconds"]
+        results.append({"processes": world_size, "images_per_sec": throughput,
+                        "epoch_seconds": run["seconds"] / epochs})
+        print(f"  {world_size} process(es): {throughput:.1f} img/s")
+
+    base = results[0]
+    for r in results:
+        r["speedup"] = r["images_per_sec"] / base["images_per_sec"]
+        r["efficiency"] = r["speedup"] * base["processes"] / r["processes"]
+    return results
@@ -0,0 +1,197 @@
+"""Frozen-backbone feature cache: train the Phase 1 head without re-running MobileNetV2."""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, WeightedRandomSampler
+
+from src.config import FEATURE_CACHE_DIR, SEED
+
+FEATURE_DIM = 1280  # MobileNetV2 last_channel; other backbones record theirs in meta.json
+
+
+def pooled_features(model, images):
+    """Backbone output exactly as MobileNetV2/V3.forward feeds it to the classifier."""
+    x = model.features(images)
+    x = F.adaptive_avg_pool2d(x, (1, 1))
+    return torch.flatten(x, 1)
+
+
+def backbone_features(model, images, cut=None):
+    """Pooled backbone features, or with ``cut`` the output of ``model.features[:cut]``."""
+    if cut is None:
+        return pooled_features(model, images)
+    return model.features[:cut](images)
+
+
+def _fingerprint(model, dataset, num_views, seed, batch_transform=None, cut=None):
+    """Cache key: backbone weights, dataset contents and transforms, views, seed and cut."""
+    digest = hashlib.sha1()
+    for tensor in model.features.state_dict().values():
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+
+    base, indices = dataset, None
+    if hasattr(dataset, "indices"):  # torch.utils.data.Subset
+        base, indices = dataset.dataset, list(dataset.indices)
+    samples = getattr(base, "samples", None)
+    if samples is not None:
+        chosen = samples if indices is None else [samples[i] for i in indices]
+        digest.update(json.dumps([[str(p), int(t)] for p, t in chosen]).encode())
+    transform = getattr(dataset, "transform", None) or getattr(base, "transform", None)
+    batch_params = vars(batch_transform) if batch_transform is not None else None
+    batch_params = {k: v for k, v in (batch_params or {}).items() if k != "generator"}
+    digest.update(f"{len(dataset)}|{transform!r}|{batch_params}|{num_views}|{seed}|{cut}".encode())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """Backbone features on disk: ``features[view, index]`` as float16 memmap."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.num_views = self.meta["num_views"]
+        self.num_images = self.meta["num_images"]
+        feature_shape = self.meta.get("feature_shape", [self.meta.get("feature_dim", FEATURE_DIM)])
+        self.features = np.memmap(
+            self.cache_dir / "features.f16", dtype=np.float16, mode="r",
+            shape=(self.num_views, self.num_images, *feature_shape),
+        )
+        self.labels = np.load(self.cache_dir / "labels.npy")
+
+    @classmethod
+    def build(cls, model, dataset, device, cache_dir, num_views=1, seed=SEED,
+              batch_size=64, num_workers=0, batch_transform=None, cut=None):
+        """Extract (or reuse) pooled features for every image in ``dataset``.
+
+        View ``v`` runs the dataset's own transform (and ``batch_transform``,
+        if given) under seed ``seed + v``, so with augmenting transforms each
+        view is a different, reproducible augmentation of every image. The
+        backbone runs in eval mode, the same way validation sees it.
+
+        With ``cut`` the cache holds the unpooled activations entering
+        ``model.features[cut]`` instead, for training the blocks after it.
+        """
+        cache_dir = Path(cache_dir)
+        key = _fingerprint(model, dataset, num_views, seed, batch_transform, cut)
+        meta_path = cache_dir / "meta.json"
+        if meta_path.exists() and json.loads(meta_path.read_text()).get("key") == key:
+            print(f"  Feature cache hit: {cache_dir}")
+            return cls(cache_dir)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path.unlink(missing_ok=True)  # invalid until fully written
+        num_images = len(dataset)
+        features, feature_shape = None, None
+        labels = np.empty(num_images, dtype=np.int64)
+        loader = DataLoader(dataset, batch_size=batch_size, shuffle=False, num_workers=num_workers)
+
+        was_training = model.training
+        model.eval()
+        start = time.perf_counter()
+        with torch.no_grad():
+            for view in range(num_views):
+                # Worker and main-process augmentation RNGs derive from this seed
+                torch.manual_seed(seed + view)
+                if hasattr(batch_transform, "reset"):
+                    batch_transform.reset(seed + view)
+                offset = 0
+                for images, targets in loader:
+                    n = images.size(0)
+                    images = images.to(device)
+                    if batch_transform is not None:
+                        images = batch_transform(images)
+                    feats = backbone_features(model, images, cut)
+                    if features is None:
+                        feature_shape = list(feats.shape[1:])
+                        features = np.memmap(
+                            cache_dir / "features.f16", dtype=np.float16, mode="w+",
+                            shape=(num_views, num_images, *feature_shape),
+                        )
+                    features[view, offset:offset + n] = feats.cpu().numpy().astype(np.float16)
+                    labels[offset:offset + n] = targets.numpy()
+                    offset += n
+                print(f"  Cached view {view + 1}/{num_views}: {num_images} images "
+                      f"({time.perf_counter() - start:.0f}s)")
+        model.train(was_training)
+
+        features.flush()
+        del features
+        np.save(cache_dir / "labels.npy", labels)
+        meta_path.write_text(json.dumps({
+            "key": key, "num_images": num_images, "num_views": num_views, "seed": seed,
+            "feature_shape": feature_shape,
+        }, indent=2))
+        return cls(cache_dir)
+
+    def loader(self, batch_size, sampler=None, shuffle=True, seed=SEED):
+        return CachedFeatureLoader(self, batch_size, sampler, shuffle, seed)
+
+
+class CachedFeatureLoader:
+    """Loader-compatible iterable of ``(features, labels)`` batches from a cache.
+
+    Drop-in for a DataLoader in ``train_one_epoch`` / ``evaluate`` when the
+    model passed is ``model.classifier``. Each epoch draws one cached view
+    per sample. ``sampler`` (e.g. the training loader's
+    ``WeightedRandomSampler``) keeps class balancing identical to the
+    image pipeline; without it samples are shuffled or read in order.
+    """
+
+    def __init__(self, cache, batch_size, sampler=None, shuffle=True, seed=SEED):
+        self.cache = cache
+        self.batch_size = batch_size
+        self.sampler = sampler
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def _indices(self):
+        if self.sampler is not None:
+            return np.fromiter(iter(self.sampler), dtype=np.int64)
+        if self.shuffle:
+            return self.rng.permutation(self.cache.num_images)
+        return np.arange(self.cache.num_images)
+
+    def __len__(self):
+        n = len(self.sampler) if self.sampler is not None else self.cache.num_images
+        return (n + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        indices = self._indices()
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            views = self.rng.integers(self.cache.num_views, size=len(batch))
+            feats = torch.from_numpy(self.cache.features[views, batch].astype(np.float32))
+            yield feats, torch.from_numpy(self.cache.labels[batch])
+
+
+def build_feature_loaders(model, train_loader, val_loader, device,
+                          cache_dir=FEATURE_CACHE_DIR, num_views=1,
+                          train_batch_transform=None, val_batch_transform=None):
+    """Cache train/val features and return loaders that mirror the image loaders.
+
+    The training loader reuses ``train_loader``'s ``WeightedRandomSampler``
+    when it has one, so Phase 1 sees the same class balance.
+    """
+    cache_dir = Path(cache_dir)
+    workers = train_loader.num_workers
+    train_cache = FeatureCache.build(
+        model, train_loader.dataset, device, cache_dir / "train",
+        num_views=num_views, batch_size=train_loader.batch_size or 64, num_workers=workers,
+        batch_transform=train_batch_transform,
+    )
+    val_cache = FeatureCache.build(
+        model, val_loader.dataset, device, cache_dir / "val",
+        num_views=1, batch_size=val_loader.batch_size or 64, num_workers=val_loader.num_workers,
+        batch_transform=val_batch_transform,
+    )
+    sampler = train_loader.sampler if isinstance(train_loader.sampler, WeightedRandomSampler) else None
+    return (
+        train_cache.loader(train_loader.batch_size or 64, sampler=sampler),
+        val_cache.loader(val_loader.batch_size or 64, shuffle=False),
+    )
@@ -0,0 +1,213 @@
+"""Incremental updates: fine-tune the head on newly labeled images plus a feature replay buffer."""
+import copy
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import ConcatDataset, DataLoader, Subset, TensorDataset, WeightedRandomSampler
+
+from src.config import (
+    BATCH_SIZE, INCREMENTAL_CACHE_DIR, INCREMENTAL_EPOCHS, LEARNING_RATE_PHASE2,
+    MAX_CLASS_REGRESSION, MAX_VAL_REGRESSION, MODEL_PATH, REPLAY_PER_CLASS, SEED,
+)
+from src.data.val_cache import base_dataset
+from src.training.checkpoint import atomic_save
+from src.training.feature_cache import FeatureCache
+
+
+def trainable_head(model, train_blocks=0):
+    """(head, cut): the part of ``model`` an update trains, and where features are cached.
+
+    With ``train_blocks=0`` the head is ``model.classifier`` on pooled
+    features (``cut=None``). Otherwise the last ``train_blocks`` blocks of
+    ``model.features``, pooling and the classifier form the head, fed the
+    cached activations entering ``model.features[cut]``. The head shares its
+    modules with ``model``, so training it updates ``model`` in place.
+    """
+    if train_blocks == 0:
+        return model.classifier, None
+    cut = len(model.features) - train_blocks
+    head = nn.Sequential(model.features[cut:], nn.AdaptiveAvgPool2d(1), nn.Flatten(1),
+                         model.classifier)
+    return head, cut
+
+
+def replay_indices(dataset, per_class=REPLAY_PER_CLASS, seed=SEED):
+    """Seeded sample of up to ``per_class`` indices of every class in ``dataset``."""
+    base, indices = base_dataset(dataset)
+    targets = base.targets if indices is None else [base.targets[i] for i in indices]
+    generator = torch.Generator().manual_seed(seed)
+    by_class = {}
+    for index, target in enumerate(targets):
+        by_class.setdefault(target, []).append(index)
+    chosen = []
+    for target in sorted(by_class):
+        members = by_class[target]
+        order = torch.randperm(len(members), generator=generator)[:per_class].tolist()
+        chosen += [members[i] for i in order]
+    return sorted(chosen)
+
+
+def _tensors(cache, indices=None):
+    """A cache's view-0 features (float32) and labels as a TensorDataset."""
+    features, labels = cache.features[0], cache.labels
+    if indices is not None:
+        features, labels = features[indices], labels[indices]
+    return TensorDataset(torch.from_numpy(np.asarray(features, dtype=np.float32)),
+                         torch.from_numpy(np.asarray(labels)))
+
+
+def _predict(head, dataset, device, batch_size=256):
+    head.eval()
+    preds, labels = [], []
+    with torch.no_grad():
+        for features, targets in DataLoader(dataset, batch_size=batch_size):
+            preds.append(head(features.to(device)).argmax(1).cpu())
+            labels.append(targets)
+    return torch.cat(labels).numpy(), torch.cat(preds).numpy()
+
+
+def _accuracy(y_true, y_pred, num_classes):
+    """Overall accuracy and per-class accuracy (NaN for classes absent from ``y_true``)."""
+    per_class = np.full(num_classes, np.nan)
+    for c in range(num_classes):
+        mask = y_true == c
+        if mask.any():
+            per_class[c] = float((y_pred[mask] == c).mean())
+    return float((y_true == y_pred).mean()) if len(y_true) else float("nan"), per_class
+
+
+def _freeze_batchnorm(module):
+    """Keep BatchNorm running statistics fixed: the update sees far fewer images than training."""
+    for m in module.modules():
+        if isinstance(m, nn.BatchNorm2d):
+            m.eval()
+
+
+def incremental_update(model, new_dataset, replay_dataset, val_dataset, device, train_blocks=0,
+                       epochs=INCREMENTAL_EPOCHS, lr=LEARNING_RATE_PHASE2,
+                       replay_per_class=REPLAY_PER_CLASS, new_fraction=0.5, new_val_fraction=0.2,
+                       max_regression=MAX_VAL_REGRESSION, max_class_regression=MAX_CLASS_REGRESSION,
+                       checkpoint_path=MODEL_PATH, cache_dir=INCREMENTAL_CACHE_DIR,
+                       batch_size=BATCH_SIZE, num_workers=0, seed=SEED):
+    """Fine-tune a trained model's head on ``new_dataset`` without re-running the pipeline.
+
+    Backbone features (pooled, or the activations entering the trained
+    blocks, see ``trainable_head``) are cached for the new images, for a
+    ``replay_per_class`` replay sample of ``replay_dataset`` (the old
+    training set) and for ``val_dataset`` (the existing validation set).
+    Replay and validation caches are keyed by the backbone weights, so
+    they are computed once per deployed model and reused by later updates
+    that leave the backbone unchanged. The head then trains on new plus
+    replay features, with new images drawn as ``new_fraction`` of every
+    epoch and BatchNorm statistics frozen; ``new_val_fraction`` of the new
+    images is held out to measure the gain on them.
+
+    Regression guard: the update is accepted only if accuracy on the
+    existing validation set drops by at most ``max_regression`` and no
+    class drops by more than ``max_class_regression``. Accepted weights
+    are written atomically to ``checkpoint_path``, after copying the
+    previous checkpoint to ``<name>.prev.pth`` for rollback (nothing is
+    written with ``checkpoint_path=None``); a rejected update restores
+    ``model`` and writes nothing. Returns a report dict.
+    """
+    if len(new_dataset) == 0:
+        raise ValueError("No new images to train on")
+    start = time.perf_counter()
+    cache_dir = Path(cache_dir)
+    num_classes = model.classifier[-1].out_features
+    head, cut = trainable_head(model, train_blocks)
+    model.eval()
+
+    def cached(name, dataset):
+        # Separate directories per cut point, so head-only and block updates don't evict each other
+        subdir = cache_dir / ("pooled" if cut is None else f"cut{cut}") / name
+        return FeatureCache.build(model, dataset, device, subdir, batch_size=batch_size,
+                                  num_workers=num_workers, cut=cut)
+
+    replay = Subset(replay_dataset, replay_indices(replay_dataset, replay_per_class, seed))
+    replay_set = _tensors(cached("replay", replay))
+    val_set = _tensors(cached("val", val_dataset))
+    new_cache = cached("new", new_dataset)
+    order = np.random.default_rng(seed).permutation(new_cache.num_images)
+    n_holdout = int(new_cache.num_images * new_val_fraction)
+    new_train = _tensors(new_cache, np.sort(order[n_holdout:]))
+    new_holdout = _tensors(new_cache, np.sort(order[:n_holdout])) if n_holdout else None
+
+    val_before, class_before = _accuracy(*_predict(head, val_set, device), num_classes)
+    new_before = (_accuracy(*_predict(head, new_holdout, device), num_classes)[0]
+                  if new_holdout is not None else None)
+    original_state = copy.deepcopy(model.state_dict())
+    requires_grad = [param.requires_grad for param in model.parameters()]
+
+    # New images make up ``new_fraction`` of each epoch, however small the batch of them is
+    train_set = ConcatDataset([new_train, replay_set])
+    n_new, n_replay = len(new_train), len(replay_set)
+    weights = [new_fraction / n_new] * n_new + [(1 - new_fraction) / n_replay] * n_replay
+    sampler = WeightedRandomSampler(weights, num_samples=len(train_set), replacement=True,
+                                    generator=torch.Generator().manual_seed(seed))
+    loader = DataLoader(train_set, batch_size=batch_size, sampler=sampler)
+    for param in model.parameters():
+        param.requires_grad = False
+    for param in head.parameters():
+        param.requires_grad = True
+    optimizer = optim.Adam(head.parameters(), lr=lr)
+    criterion = nn.CrossEntropyLoss()
+
+    print(f"\nIncremental update: {n_new} new + {n_replay} replay images, "
+          f"{'head only' if cut is None else f'last {train_blocks} block(s) + head'}")
+    for epoch in range(epochs):
+        head.train()
+        _freeze_batchnorm(head)
+        running_loss, correct, total = 0.0, 0, 0
+        for features, labels in loader:
+            features, labels = features.to(device), labels.to(device)
+            optimizer.zero_grad()
+            outputs = head(features)
+            loss = criterion(outputs, labels)
+            loss.backward()
+            optimizer.step()
+            running_loss += loss.item() * labels.size(0)
+            correct += (outputs.argmax(1) == labels).sum().item()
+            total += labels.size(0)
+        val_acc = _accuracy(*_predict(head, val_set, device), num_classes)[0]
+        print(f"  Epoch {epoch + 1}/{epochs} — Train: {correct / total:.4f} "
+              f"(loss {running_loss / total:.4f}), Val: {val_acc:.4f}")
+
+    val_after, class_after = _accuracy(*_predict(head, val_set, device), num_classes)
+    new_after = (_accuracy(*_predict(head, new_holdout, device), num_classes)[0]
+                 if new_holdout is not None else None)
+    class_drop = np.nan_to_num(class_before - class_after, nan=0.0)
+    accepted = (val_before - val_after <= max_regression
+                and float(class_drop.max()) <= max_class_regression)
+
+    model.eval()
+    for param, flag in zip(model.parameters(), requires_grad):
+        param.requires_grad = flag
+    if accepted and checkpoint_path is not None:
+        checkpoint_path = Path(checkpoint_path)
+        if checkpoint_path.exists():
+            shutil.copy2(checkpoint_path, checkpoint_path.with_suffix(".prev.pth"))
+        atomic_save(model.state_dict(), checkpoint_path)
+        print(f"Update accepted: Val {val_before:.4f} -> {val_after:.4f}, saved {checkpoint_path}")
+    elif accepted:
+        print(f"Update accepted: Val {val_before:.4f} -> {val_after:.4f} (not saved)")
+    else:
+        model.load_state_dict(original_state)
+        print(f"Update rejected (regression guard): Val {val_before:.4f} -> {val_after:.4f}, "
+              f"worst class drop {class_drop.max():.4f}; {checkpoint_path} unchanged")
+
+    return {
+        "accepted": accepted, "train_blocks": train_blocks, "epochs": epochs,
+        "new_images": new_cache.num_images, "new_holdout": n_holdout, "replay_images": n_replay,
+        "val_acc_before": val_before, "val_acc_after": val_after,
+        "new_acc_before": new_before, "new_acc_after": new_after,
+        "worst_class_drop": float(class_drop.max()), "worst_class": int(class_drop.argmax()),
+        "max_regression": max_regression, "max_class_regression": max_class_regression,
+        "checkpoint": str(checkpoint_path) if accepted and checkpoint_path is not None else None,
+        "seconds": time.perf_counter() - start,
+    }
@@ -0,0 +1,82 @@
+"""Device and shard-cache data setup shared by the training and comparison scripts."""
+import os
+
+import torch
+from torch.utils.data import DataLoader, Subset, random_split
+
+from src.config import BATCH_SIZE, MANIFEST_PATH, SEED, SHARD_CACHE_DIR
+from src.data.manifest import load_manifest, stratified_split
+from src.data.shard_cache import ShardDataset
+
+
+def pick_device():
+    """CUDA if available, then Apple MPS, else CPU."""
+    if torch.cuda.is_available():
+        return torch.device("cuda")
+    if torch.backends.mps.is_available():
+        return torch.device("mps")
+    return torch.device("cpu")
+
+
+def held_out_split(dataset, manifest_path=MANIFEST_PATH, seed=SEED):
+    """The training pipeline's stratified (train_indices, val_indices) of ``dataset``.
+
+    That split applies only if ``dataset`` lists exactly the manifest's
+    files, in manifest order and with the same labels (a shard cache built
+    with ``--from-manifest`` or from a ``data/processed`` copy of the same
+    classes). Returns None otherwise, or when there is no manifest.
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        return None
+    listed = [(s["path"], s["target"]) for s in manifest["samples"]]
+    cached = [(os.path.relpath(path, dataset.root), target) for path, target in dataset.samples]
+    if listed != cached:
+        return None
+    return stratified_split(manifest, seed=seed)
+
+
+def shard_splits(cache_dir=SHARD_CACHE_DIR, samples=0, seed=SEED, held_out=False,
+                 manifest_path=MANIFEST_PATH):
+    """(classes, train_set, val_set) over the pre-decoded shard cache.
+
+    Images come as uint8 tensors (``ShardDataset(output="tensor")``) for
+    ``BatchAugment``. With ``samples`` a seeded subset of that many images
+    is used; it is split 80/20 with a seeded ``random_split``.
+
+    With ``held_out`` the split is the one the trained model was validated
+    on (``held_out_split``), so scripts that start from ``best_model.pth``
+    validate on images it never trained on; ``samples`` then subsamples
+    both sides. Without a matching manifest it falls back to the random
+    split and says so.
+    """
+    dataset = ShardDataset(cache_dir, output="tensor")
+    classes = dataset.classes
+    split = held_out_split(dataset, manifest_path, seed) if held_out else None
+    if held_out and split is None:
+        print(f"Shard cache does not match {manifest_path}; validating on a random 20%, "
+              "which the model may have trained on")
+    if split is not None:
+        keep = None
+        if samples:
+            order = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(seed))
+            keep = set(order[:samples].tolist())
+        train_indices, val_indices = ([i for i in indices if keep is None or i in keep]
+                                      for indices in split)
+        return classes, Subset(dataset, train_indices), Subset(dataset, val_indices)
+    if samples:
+        order = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(seed))
+        dataset = Subset(dataset, order[:samples].tolist())
+    n_val = len(dataset) // 5
+    train_set, val_set = random_split(dataset, [len(dataset) - n_val, n_val],
+                                      generator=torch.Generator().manual_seed(seed))
+    return classes, train_set, val_set
+
+
+def split_loaders(train_set, val_set, device, batch_size=BATCH_SIZE, seed=SEED):
+    """(train_loader, val_loader): seeded shuffling for training, pinned memory on CUDA."""
+    pin = device.type == "cuda"
+    train_loader = DataLoader(train_set, batch_size=batch_size, shuffle=True, pin_memory=pin,
+                              generator=torch.Generator().manual_seed(seed))
+    val_loader = DataLoader(val_set, batch_size=batch_size, pin_memory=pin)
+    return train_loader, val_loader
@@ -0,0 +1,82 @@
+"""Opt-in mixed precision (autocast + grad scaling) and channels-last training."""
+from contextlib import nullcontext
+
+import torch
+
+PRECISIONS = ("fp32", "bf16", "fp16")
+
+
+def resolve_precision(device, precision):
+    """Pick the autocast dtype the device can actually run for ``precision``.
+
+    CPU autocast is only fast in bf16, so ``fp16`` falls back to it there;
+    GPUs without bf16 support fall back to fp16. Returns the effective name.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+    device_type = torch.device(device).type
+    if precision == "fp16" and device_type == "cpu":
+        print("  fp16 autocast is slow on CPU; using bf16")
+        return "bf16"
+    if precision == "bf16" and device_type == "cuda" and not torch.cuda.is_bf16_supported():
+        print("  GPU has no bf16 support; using fp16")
+        return "fp16"
+    if precision == "bf16" and device_type == "mps":
+        print("  MPS autocast supports fp16 only; using fp16")
+        return "fp16"
+    return precision
+
+
+class MixedPrecision:
+    """Precision policy shared by ``train_one_epoch`` and ``evaluate``.
+
+    ``autocast()`` wraps the forward pass and loss, ``step()`` replaces
+    ``loss.backward(); optimizer.step()`` (with a ``GradScaler`` for fp16 on
+    CUDA, where small gradients would otherwise underflow), and
+    ``prepare_model`` / ``prepare_inputs`` switch to the channels-last
+    memory format. The default ``fp32`` without channels-last is a no-op.
+    """
+
+    def __init__(self, device, precision="fp32", channels_last=False):
+        self.device_type = torch.device(device).type
+        self.precision = resolve_precision(device, precision)
+        self.channels_last = channels_last
+        self.dtype = {"bf16": torch.bfloat16, "fp16": torch.float16}.get(self.precision)
+        use_scaler = self.precision == "fp16" and self.device_type == "cuda"
+        self.scaler = torch.amp.GradScaler("cuda") if use_scaler else None
+
+    def autocast(self):
+        if self.dtype is None:
+            return nullcontext()
+        return torch.autocast(device_type=self.device_type, dtype=self.dtype)
+
+    def prepare_model(self, model):
+        if self.channels_last:
+            model.to(memory_format=torch.channels_last)
+        return model
+
+    def prepare_inputs(self, images):
+        # Cached-feature batches are 2-D; only image batches change layout
+        if self.channels_last and images.dim() == 4:
+            return images.contiguous(memory_format=torch.channels_last)
+        return images
+
+    def backward(self, loss):
+        if self.scaler is None:
+            loss.backward()
+        else:
+            self.scaler.scale(loss).backward()
+
+    def optimizer_step(self, optimizer):
+        if self.scaler is None:
+            optimizer.step()
+        else:
+            self.scaler.step(optimizer)
+            self.scaler.update()
+
+    def step(self, loss, optimizer):
+        self.backward(loss)
+        self.optimizer_step(optimizer)
+
+    def describe(self):
+        return {"precision": self.precision, "channels_last": self.channels_last}
@@ -0,0 +1,115 @@
+"""Low-overhead step-time profiler for the training loop, with optional torch.profiler traces."""
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import torch
+
+from src.config import PROFILE_SYNC_EVERY, PROFILE_TRACE_WINDOW, PROFILER_DIR
+
+STEP_PHASES = ("forward", "backward", "optimizer")
+
+
+def _synchronize(device):
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+    elif device.type == "mps":
+        torch.mps.synchronize()
+
+
+class StepProfiler:
+    """Per-step timings for ``train_one_epoch``, summarised per epoch.
+
+    The loop calls ``mark(phase)`` after the data fetch and after forward,
+    backward and optimizer work, and ``step(batch_size)`` at the end of each
+    step. Data wait is timed on every step from host timestamps. Forward,
+    backward and optimizer times need a device sync to be accurate on
+    GPU/MPS, so there they are measured only on every ``sync_every``-th step
+    and averaged; on CPU every step is measured, as syncing is free.
+
+    With ``trace=True`` a ``torch.profiler`` trace of ``PROFILE_TRACE_WINDOW``
+    (steps to skip, steps to record) is written to ``trace_dir`` for
+    TensorBoard or Perfetto. Call ``close()`` when training ends.
+    """
+
+    def __init__(self, device, sync_every=PROFILE_SYNC_EVERY, trace=False,
+                 trace_window=PROFILE_TRACE_WINDOW, trace_dir=PROFILER_DIR):
+        self.device = torch.device(device)
+        self.sync_every = 1 if self.device.type == "cpu" else max(1, sync_every)
+        self.trace = None
+        self.trace_dir = Path(trace_dir)
+        if trace:
+            skip, active = trace_window
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if self.device.type == "cuda":
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self.trace = torch.profiler.profile(
+                activities=activities,
+                schedule=torch.profiler.schedule(wait=max(0, skip - 1), warmup=1, active=active, repeat=1),
+                on_trace_ready=torch.profiler.tensorboard_trace_handler(str(self.trace_dir)),
+                record_shapes=True,
+            )
+            self.trace.start()
+        self.global_step = 0
+        self.start_epoch()
+
+    def start_epoch(self):
+        self._epoch_start = self._last = time.perf_counter()
+        self._data_wait = 0.0
+        self._phase_totals = dict.fromkeys(STEP_PHASES, 0.0)
+        self._sampled_steps = 0
+        self._samples = 0
+        self._steps = 0
+        self._sampled = True  # always time the first step of an epoch
+        self.checkpoint_s = 0.0
+
+    def mark(self, phase):
+        """Attribute the time since the previous mark to ``phase``."""
+        if phase == "data":
+            now = time.perf_counter()
+            self._data_wait += now - self._last
+        elif self._sampled:
+            _synchronize(self.device)
+            now = time.perf_counter()
+            self._phase_totals[phase] += now - self._last
+        else:
+            now = time.perf_counter()
+        self._last = now
+
+    def step(self, batch_size):
+        self._samples += batch_size
+        self._steps += 1
+        self._sampled_steps += self._sampled
+        self.global_step += 1
+        self._sampled = self._steps % self.sync_every == 0
+        if self.trace is not None:
+            self.trace.step()
+        self._last = time.perf_counter()
+
+    @contextmanager
+    def time_checkpoint(self):
+        start = time.perf_counter()
+        yield
+        self.checkpoint_s += time.perf_counter() - start
+
+    def end_epoch(self):
+        """Summary of the epoch's training steps (checkpoint time is added later)."""
+        _synchronize(self.device)
+        elapsed = time.perf_counter() - self._epoch_start
+        sampled = max(self._sampled_steps, 1)
+        summary = {
+            "samples": self._samples,
+            "train_images_per_sec": self._samples / elapsed if elapsed else 0.0,
+            "data_wait_s": self._data_wait,
+            "compute_s": elapsed - self._data_wait,
+        }
+        for phase in STEP_PHASES:
+            summary[f"{phase}_ms"] = 1000 * self._phase_totals[phase] / sampled
+        return summary
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.stop()
+            print(f"Profiler trace saved under {self.trace_dir}")
+            self.trace = None
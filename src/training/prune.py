@@ -0,0 +1,101 @@
+"""Iterative channel pruning with short recovery fine-tunes, down to a FLOP or latency budget."""
+import copy
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+from src.config import LEARNING_RATE_PHASE2, PRUNE_FINETUNE_EPOCHS, PRUNE_STEP_RATIO, PRUNED_MODEL_PATH
+from src.evaluation.benchmark import benchmark_inference
+from src.models.pruning import count_flops, hidden_channels, prune_step, save_pruned_config
+from src.training.checkpoint import atomic_save
+from src.training.trainer import evaluate, new_history, run_phase
+
+
+def _measure(model, step, val_acc, latency_threads):
+    """FLOPs, params and batch-1 CPU latency of the current model."""
+    cpu_model = copy.deepcopy(model).to("cpu").eval()
+    previous = torch.get_num_threads()
+    torch.set_num_threads(latency_threads)
+    latency_ms = float(benchmark_inference(cpu_model, torch.device("cpu")))
+    torch.set_num_threads(previous)
+    return {
+        "step": step, "val_acc": val_acc, "flops": count_flops(model),
+        "params": sum(p.numel() for p in model.parameters()), "cpu_latency_ms": latency_ms,
+        "hidden_channels": sum(hidden_channels(model)),
+    }
+
+
+def prune_to_budget(model, train_loader, val_loader, device, target_flops=None,
+                    target_latency_ms=None, step_ratio=PRUNE_STEP_RATIO,
+                    finetune_epochs=PRUNE_FINETUNE_EPOCHS, lr=LEARNING_RATE_PHASE2,
+                    class_weights_tensor=None, train_batch_transform=None, val_batch_transform=None,
+                    checkpoint_path=PRUNED_MODEL_PATH, max_steps=20, latency_threads=1):
+    """Prune ``model`` in place until it fits the budget, fine-tuning after every step.
+
+    ``target_flops`` is an absolute multiply-accumulate count, or a fraction
+    (<= 1) of the unpruned model's; ``target_latency_ms`` is batch-1 CPU
+    latency at ``latency_threads`` threads. Pruning stops when every given
+    target is met. Each step removes ``step_ratio`` of the prunable hidden
+    channels (``prune_step``), then the whole network is fine-tuned for
+    ``finetune_epochs`` through ``run_phase`` and the best epoch's weights
+    (kept in memory) are restored.
+
+    The final weights are written to ``checkpoint_path``, next to a
+    ``.json`` config that rebuilds the architecture (``build_pruned_model``);
+    ``load_checkpoint_model`` also loads the checkpoint without it.
+    Returns one dict per step (step 0 is the unpruned model).
+    """
+    if target_flops is None and target_latency_ms is None:
+        raise ValueError("Give target_flops and/or target_latency_ms")
+    checkpoint_path = Path(checkpoint_path)
+    criterion = nn.CrossEntropyLoss(weight=class_weights_tensor)
+    _, val_acc = evaluate(model, val_loader, criterion, device, val_batch_transform)
+    rows = [_measure(model, 0, val_acc, latency_threads)]
+    if target_flops is not None and target_flops <= 1:
+        target_flops *= rows[0]["flops"]
+    history = new_history()
+
+    def within_budget(row):
+        return ((target_flops is None or row["flops"] <= target_flops)
+                and (target_latency_ms is None or row["cpu_latency_ms"] <= target_latency_ms))
+
+    for step in range(1, max_steps + 1):
+        if within_budget(rows[-1]):
+            break
+        removed = prune_step(model, step_ratio)
+        if removed == 0:
+            print("Every block is at its minimum width; stopping")
+            break
+        print(f"\nPruning step {step}: removed {removed} channels, "
+              f"{count_flops(model) / rows[0]['flops']:.0%} of the original FLOPs")
+        for param in model.parameters():
+            param.requires_grad = True
+        optimizer = optim.Adam(model.parameters(), lr=lr)
+        scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode="max", factor=0.5, patience=2)
+        best = {}
+
+        def keep_best(phase, history):
+            # In memory: run_phase writes nothing for this width if no epoch beats 0.0
+            if not best or history["val_acc"][-1] > best["val_acc"]:
+                best.update(val_acc=history["val_acc"][-1], state=copy.deepcopy(model.state_dict()))
+
+        run_phase(model, train_loader, val_loader, optimizer, scheduler, criterion,
+                  device, finetune_epochs, history, 0.0, f"Pruning step {step}",
+                  train_batch_transform=train_batch_transform,
+                  val_batch_transform=val_batch_transform, checkpoint_path=checkpoint_path,
+                  patience=finetune_epochs, epoch_callback=keep_best)
+        if best:
+            model.load_state_dict(best["state"])
+            val_acc = best["val_acc"]
+        else:  # finetune_epochs=0
+            _, val_acc = evaluate(model, val_loader, criterion, device, val_batch_transform)
+        rows.append(_measure(model, step, val_acc, latency_threads))
+    else:
+        if not within_budget(rows[-1]):
+            print(f"Budget not reached after {max_steps} steps")
+
+    atomic_save(model.state_dict(), checkpoint_path)
+    save_pruned_config(model, checkpoint_path.with_suffix(".json"))
+    return rows
@@ -0,0 +1,70 @@
+"""Progressive-resolution schedules: smaller images (and larger batches) in early epochs."""
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, IterableDataset
+
+from src.config import IMG_SIZE
+
+
+def epoch_resolutions(schedule, num_epochs):
+    """Image size for each of ``num_epochs`` epochs.
+
+    ``schedule`` (e.g. ``(128, 176, 224)``) is spread over the epochs in
+    consecutive stages of as equal length as possible. The final epoch
+    always uses the last (largest) size, even with fewer epochs than
+    stages, so the model ends on the resolution it is evaluated at.
+    ``None`` means every epoch at ``IMG_SIZE``.
+    """
+    if not schedule:
+        return [IMG_SIZE] * num_epochs
+    sizes = [schedule[epoch * len(schedule) // num_epochs] for epoch in range(num_epochs)]
+    if sizes:
+        sizes[-1] = schedule[-1]
+    return sizes
+
+
+def scaled_batch_size(batch_size, size, base_size=IMG_SIZE):
+    """Batch size at ``size`` that keeps activation memory about equal to ``batch_size`` at ``base_size``.
+
+    Activations grow with the pixel count, so the batch scales with
+    ``(base_size / size) ** 2``. It is rounded down to a multiple of 8 and
+    never falls below ``batch_size``.
+    """
+    scaled = int(batch_size * (base_size / size) ** 2) // 8 * 8
+    return max(batch_size, scaled)
+
+
+def with_batch_size(loader, batch_size):
+    """A copy of ``loader`` yielding batches of ``batch_size`` from the same dataset and sampler."""
+    if batch_size == loader.batch_size:
+        return loader
+    # Iterable datasets (e.g. TarShardDataset) take no sampler
+    sampler = None if isinstance(loader.dataset, IterableDataset) else loader.sampler
+    return DataLoader(
+        loader.dataset, batch_size=batch_size, sampler=sampler,
+        num_workers=loader.num_workers, collate_fn=loader.collate_fn,
+        pin_memory=loader.pin_memory, drop_last=loader.drop_last,
+        persistent_workers=loader.persistent_workers,
+        prefetch_factor=loader.prefetch_factor if loader.num_workers else None,
+    )
+
+
+def resize_batch(images, size):
+    """Resize a ``(B, C, H, W)`` float batch to ``size`` x ``size`` (no-op if already there)."""
+    if images.shape[-2:] == (size, size):
+        return images
+    return F.interpolate(images, size=(size, size), mode="bilinear", align_corners=False,
+                         antialias=True)
+
+
+def time_to_accuracy(history, target):
+    """Cumulative wall-clock seconds until ``val_acc`` first reaches ``target``, or None.
+
+    Uses the per-epoch ``epoch_s`` (training plus validation) that
+    ``train_model`` records in ``history``.
+    """
+    elapsed = 0.0
+    for val_acc, seconds in zip(history["val_acc"], history["epoch_s"]):
+        elapsed += seconds
+        if val_acc >= target:
+            return elapsed
+    return None
@@ -0,0 +1,201 @@
+"""Parallel hyperparameter sweeps with median pruning on per-epoch validation accuracy."""
+import itertools
+import math
+import os
+import pickle
+import random
+import statistics
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing import Manager, get_context
+from pathlib import Path
+
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, WeightedRandomSampler
+
+from src.config import BATCH_SIZE, CHECKPOINTS_DIR, FEATURE_CACHE_VIEWS, SEED, SWEEP_RESULTS_PATH
+from src.models.classifier import build_model
+from src.training.feature_cache import build_feature_loaders
+from src.training.trainer import DEFAULT_HPARAMS, train_model
+
+# Lists are sampled uniformly; tuples are ("loguniform" | "uniform" | "int", low, high)
+SEARCH_SPACE = {
+    "lr_phase1": ("loguniform", 3e-4, 3e-3),
+    "lr_phase2": ("loguniform", 3e-5, 3e-4),
+    "unfreeze_blocks": [3, 5, 7],
+    "batch_size": [16, 32, 64],
+    "dropout": [[0.3, 0.2], [0.5, 0.3], [0.2, 0.1]],
+}
+
+
+class TrialPruned(Exception):
+    """Raised from the epoch callback to stop a trial that is losing."""
+
+
+def _sample(spec, rng):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    kind, low, high = spec
+    if kind == "loguniform":
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if kind == "uniform":
+        return rng.uniform(low, high)
+    if kind == "int":
+        return rng.randint(low, high)
+    raise ValueError(f"Unknown search space kind {kind!r}")
+
+
+def sample_trials(space=SEARCH_SPACE, n_trials=None, seed=SEED):
+    """Parameter dicts for each trial: the full grid, or ``n_trials`` random draws.
+
+    The grid (``n_trials=None``) needs every entry to be a list of choices.
+    """
+    if n_trials is None:
+        if not all(isinstance(spec, list) for spec in space.values()):
+            raise ValueError("Grid search needs a list of choices for every parameter")
+        return [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    rng = random.Random(seed)
+    return [{name: _sample(spec, rng) for name, spec in space.items()} for _ in range(n_trials)]
+
+
+class MedianPruner:
+    """Stop a trial whose best validation accuracy so far is below the median.
+
+    After ``warmup_epochs``, a trial at epoch ``e`` is compared with every
+    other trial that has reached epoch ``e`` (at least ``min_trials`` of
+    them); ``curves`` is a ``Manager().dict()`` shared by all workers.
+    """
+
+    def __init__(self, curves, warmup_epochs=3, min_trials=3):
+        self.curves = curves
+        self.warmup_epochs = warmup_epochs
+        self.min_trials = min_trials
+
+    def report(self, trial_id, history):
+        curve = list(itertools.accumulate(history["val_acc"], max))
+        self.curves[trial_id] = curve
+        epoch = len(curve)
+        if epoch <= self.warmup_epochs:
+            return
+        others = [c[epoch - 1] for tid, c in self.curves.items()
+                  if tid != trial_id and len(c) >= epoch]
+        if len(others) < self.min_trials:
+            return
+        median = statistics.median(others)
+        if curve[-1] < median:
+            raise TrialPruned(f"epoch {epoch}: {curve[-1]:.4f} < median {median:.4f}")
+
+
+def _loaders(make_datasets, batch_size):
+    train_dataset, val_dataset, sample_weights = make_datasets()
+    sampler = None
+    if sample_weights is not None:
+        sampler = WeightedRandomSampler(sample_weights, len(sample_weights), replacement=True,
+                                        generator=torch.Generator().manual_seed(SEED))
+    train_loader = DataLoader(train_dataset, batch_size=batch_size, sampler=sampler,
+                              shuffle=sampler is None)
+    return train_loader, DataLoader(val_dataset, batch_size=batch_size)
+
+
+def _run_trial(trial_id, params, make_datasets, num_classes, threads, pruner, sweep_dir,
+               train_kwargs):
+    torch.set_num_threads(threads)
+    torch.manual_seed(SEED)
+    train_kwargs = pickle.loads(train_kwargs)
+    class_weights = train_kwargs.pop("class_weights", None)
+    pretrained = train_kwargs.pop("pretrained", True)
+    row = {"trial": trial_id,
+           **{k: str(v) if isinstance(v, list) else v for k, v in params.items()}}
+    start = time.perf_counter()
+    try:
+        model, _, _ = build_model(num_classes, torch.device("cpu"), pretrained=pretrained,
+                                  dropout=params.get("dropout", (0.3, 0.2)))
+        train_loader, val_loader = _loaders(make_datasets, params.get("batch_size", BATCH_SIZE))
+        checkpoint = Path(sweep_dir) / f"trial_{trial_id:03d}.pth"
+        _, best_val_acc, _ = train_model(
+            model, train_loader, val_loader, class_weights, torch.device("cpu"),
+            hparams={k: v for k, v in params.items() if k in DEFAULT_HPARAMS},
+            epoch_callback=lambda phase, history: pruner.report(trial_id, history),
+            checkpoint_path=checkpoint, state_path=None, **train_kwargs,
+        )
+        row.update(status="complete", best_val_acc=best_val_acc, checkpoint=str(checkpoint))
+    except TrialPruned as exc:
+        row.update(status="pruned", best_val_acc=max(pruner.curves.get(trial_id, [0.0])),
+                   note=str(exc))
+    except Exception as exc:
+        traceback.print_exc()
+        row.update(status="failed", best_val_acc=None, note=repr(exc))
+    row.update(epochs=len(pruner.curves.get(trial_id, [])), seconds=time.perf_counter() - start)
+    return row
+
+
+def _warm_feature_cache(make_datasets, num_classes, pretrained, train_kwargs):
+    """Build the frozen-backbone feature cache once so every trial gets a cache hit."""
+    torch.manual_seed(SEED)  # same initial backbone as the trials when not pretrained
+    model, _, _ = build_model(num_classes, torch.device("cpu"), pretrained=pretrained)
+    train_loader, val_loader = _loaders(make_datasets, BATCH_SIZE)
+    build_feature_loaders(
+        model, train_loader, val_loader, torch.device("cpu"),
+        num_views=train_kwargs.get("feature_cache_views", FEATURE_CACHE_VIEWS),
+        train_batch_transform=train_kwargs.get("train_batch_transform"),
+        val_batch_transform=train_kwargs.get("val_batch_transform"),
+    )
+
+
+def _append_results(rows, results_path):
+    results_path = Path(results_path)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    table = pd.DataFrame(rows)
+    if results_path.exists():
+        table = pd.concat([pd.read_csv(results_path), table], ignore_index=True)
+    table.to_csv(results_path, index=False)
+
+
+def run_sweep(make_datasets, num_classes, trials, parallel=2, threads_per_trial=None,
+              pruner_warmup=3, results_path=SWEEP_RESULTS_PATH, sweep_dir=None, **train_kwargs):
+    """Train every parameter dict in ``trials`` in parallel worker processes.
+
+    ``make_datasets`` is a picklable callable returning ``(train_dataset,
+    val_dataset, sample_weights_or_None)``. Trial keys in
+    ``DEFAULT_HPARAMS`` go to ``train_model(hparams=...)``; ``batch_size``
+    and ``dropout`` shape the loaders and model. Each worker gets
+    ``threads_per_trial`` threads (default: cores / parallel). Losing trials
+    are pruned by ``MedianPruner`` from their per-epoch history. With
+    ``feature_cache=True`` the backbone features are cached once, before
+    any trial starts. Each finished trial is appended to the results CSV
+    straight away. Returns this sweep's rows, best first.
+    """
+    sweep_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    sweep_dir = Path(sweep_dir or CHECKPOINTS_DIR / "sweeps" / sweep_id)
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    threads = threads_per_trial or max(1, (os.cpu_count() or 1) // parallel)
+    if train_kwargs.get("feature_cache"):
+        print("Warming the feature cache shared by all trials...")
+        _warm_feature_cache(make_datasets, num_classes, train_kwargs.get("pretrained", True), train_kwargs)
+
+    print(f"Sweep {sweep_id}: {len(trials)} trials, {parallel} in parallel, {threads} thread(s) each")
+    rows = []
+    with Manager() as manager:
+        pruner = MedianPruner(manager.dict(), warmup_epochs=pruner_warmup)
+        # Plain pickle copies tensors inline; shared-memory handles don't survive the pool
+        payload = pickle.dumps(train_kwargs)
+        with ProcessPoolExecutor(max_workers=parallel, mp_context=get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_run_trial, trial_id, params, make_datasets, num_classes, threads,
+                            pruner, str(sweep_dir), payload)
+                for trial_id, params in enumerate(trials)
+            ]
+            for future in as_completed(futures):
+                row = {"sweep": sweep_id, **future.result()}
+                rows.append(row)
+                _append_results([row], results_path)
+                print(f"  Trial {row['trial']}: {row['status']} "
+                      f"(best val acc {row['best_val_acc'] or 0:.4f}, {row['epochs']} epochs, "
+                      f"{row['seconds']:.0f}s)")
+
+    rows.sort(key=lambda r: r["best_val_acc"] or 0, reverse=True)
+    print(f"Results appended to {results_path}")
+    return rows
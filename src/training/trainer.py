@@ -1,105 +1,412 @@
 """Training logic: two-phase transfer learning with early stopping."""
+import time
+
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.optim as optim
 
 from src.config import (
     NUM_EPOCHS_PHASE1, NUM_EPOCHS_PHASE2,
     LEARNING_RATE_PHASE1, LEARNING_RATE_PHASE2,
-    PATIENCE, MODEL_PATH,
+    PATIENCE, UNFREEZE_LAST_N_BLOCKS, MODEL_PATH, FEATURE_CACHE_VIEWS, TRAIN_PRECISION,
+    CHANNELS_LAST, TRAINING_STATE_PATH, IMG_SIZE, RESOLUTION_SCHEDULE,
 )
+from src.data.val_cache import cached_val_loader
 from src.models.classifier import unfreeze_top_layers
+from src.training.checkpoint import AsyncCheckpointer, load_training_state
+from src.training.feature_cache import build_feature_loaders
+from src.training.precision import MixedPrecision
+from src.training.prefetch import DevicePrefetcher
+from src.training.profiler import StepProfiler
+from src.training.resolution import epoch_resolutions, resize_batch, scaled_batch_size, with_batch_size
+
+# Per-epoch profiling summaries stored in ``history`` next to accuracy/loss
+PROFILE_KEYS = ("train_images_per_sec", "data_wait_s", "compute_s",
+                "forward_ms", "backward_ms", "optimizer_ms", "checkpoint_s")
+
+# Training hyperparameters ``train_model(hparams=...)`` can override
+DEFAULT_HPARAMS = {
+    "lr_phase1": LEARNING_RATE_PHASE1, "lr_phase2": LEARNING_RATE_PHASE2,
+    "epochs_phase1": NUM_EPOCHS_PHASE1, "epochs_phase2": NUM_EPOCHS_PHASE2,
+    "patience": PATIENCE, "unfreeze_blocks": UNFREEZE_LAST_N_BLOCKS,
+}
+
+
+def _distributed():
+    return dist.is_available() and dist.is_initialized()
+
 
+def _epoch_metrics(running_loss, correct, total):
+    """(avg_loss, accuracy) from on-device sums, in one host sync.
 
-def train_one_epoch(model, loader, optimizer, criterion, device):
-    """Train for one epoch. Returns (avg_loss, accuracy)."""
+    Under data-parallel training the sums are all-reduced first, so every
+    rank sees the same metrics for the whole dataset and makes the same
+    early-stopping, scheduler and checkpoint decisions.
+    """
+    sums = torch.stack([running_loss.float(), correct.float(),
+                        torch.tensor(float(total), device=running_loss.device)])
+    if _distributed():
+        dist.all_reduce(sums)
+    loss_sum, correct_sum, count = sums.tolist()
+    return loss_sum / count, correct_sum / count
+
+
+def train_one_epoch(model, loader, optimizer, criterion, device, batch_transform=None, amp=None,
+                    profiler=None, resolution=None):
+    """Train for one epoch. Returns (avg_loss, accuracy).
+
+    ``batch_transform`` (e.g. ``BatchAugment``) runs on each collated batch
+    after it is moved to ``device``; with ``resolution`` the result is then
+    resized to that square size. ``amp`` is an optional ``MixedPrecision``
+    policy; without it training runs in fp32.
+
+    Loss and correct counts accumulate on the device and are read once at
+    the end, so the loop never blocks on the GPU mid-epoch. ``profiler``
+    (a ``StepProfiler``) times data wait and forward/backward/optimizer
+    work; read its summary with ``profiler.end_epoch()`` afterwards.
+    """
+    amp = amp or MixedPrecision(device)
+    profiler = profiler or StepProfiler(device)
     model.train()
-    running_loss, correct, total = 0.0, 0, 0
-    for images, labels in loader:
-        images, labels = images.to(device), labels.to(device)
+    running_loss = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    total = 0
+    profiler.start_epoch()
+    for images, labels in DevicePrefetcher(loader, device):
+        if batch_transform is not None:
+            images = batch_transform(images)
+        if resolution is not None:
+            images = resize_batch(images, resolution)
+        images = amp.prepare_inputs(images)
+        profiler.mark("data")
         optimizer.zero_grad()
-        outputs = model(images)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-        running_loss += loss.item() * images.size(0)
-        _, predicted = outputs.max(1)
+        with amp.autocast():
+            outputs = model(images)
+            loss = criterion(outputs, labels)
+        profiler.mark("forward")
+        amp.backward(loss)
+        profiler.mark("backward")
+        amp.optimizer_step(optimizer)
+        profiler.mark("optimizer")
+        running_loss += loss.detach().float() * images.size(0)
+        correct += outputs.argmax(1).eq(labels).sum()
         total += labels.size(0)
-        correct += predicted.eq(labels).sum().item()
-    return running_loss / total, correct / total
+        profiler.step(labels.size(0))
+    return _epoch_metrics(running_loss, correct, total)
 
 
-def evaluate(model, loader, criterion, device):
+def evaluate(model, loader, criterion, device, batch_transform=None, amp=None):
     """Evaluate on a data loader. Returns (avg_loss, accuracy)."""
+    amp = amp or MixedPrecision(device)
     model.eval()
-    running_loss, correct, total = 0.0, 0, 0
+    running_loss = torch.zeros((), device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    total = 0
     with torch.no_grad():
-        for images, labels in loader:
-            images, labels = images.to(device), labels.to(device)
-            outputs = model(images)
-            loss = criterion(outputs, labels)
-            running_loss += loss.item() * images.size(0)
-            _, predicted = outputs.max(1)
+        for images, labels in DevicePrefetcher(loader, device):
+            if batch_transform is not None:
+                images = batch_transform(images)
+            images = amp.prepare_inputs(images)
+            with amp.autocast():
+                outputs = model(images)
+                loss = criterion(outputs, labels)
+            running_loss += loss.float() * images.size(0)
+            correct += outputs.argmax(1).eq(labels).sum()
             total += labels.size(0)
-            correct += predicted.eq(labels).sum().item()
-    return running_loss / total, correct / total
+    return _epoch_metrics(running_loss, correct, total)
 
 
-def _run_phase(model, train_loader, val_loader, optimizer, scheduler,
-               criterion, device, num_epochs, history, best_val_acc, phase_name):
-    """Generic training loop for one phase."""
-    patience_counter = 0
+def _training_state(model, optimizer, scheduler, amp, history, best_val_acc, phase, epoch,
+                    patience_counter, phase1_epochs):
+    """Everything needed to continue a run after its last completed epoch."""
+    return {
+        "phase": phase, "epoch": epoch, "patience_counter": patience_counter,
+        "phase1_epochs": phase1_epochs, "best_val_acc": best_val_acc, "history": history,
+        "model": model.state_dict(), "optimizer": optimizer.state_dict(),
+        "scheduler": scheduler.state_dict(),
+        "scaler": amp.scaler.state_dict() if amp.scaler is not None else None,
+        "rng": torch.get_rng_state(),
+        "cuda_rng": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+    }
 
-    for epoch in range(num_epochs):
-        train_loss, train_acc = train_one_epoch(model, train_loader, optimizer, criterion, device)
-        val_loss, val_acc = evaluate(model, val_loader, criterion, device)
 
-        history["train_acc"].append(train_acc)
-        history["val_acc"].append(val_acc)
-        history["train_loss"].append(train_loss)
-        history["val_loss"].append(val_loss)
-        scheduler.step(val_acc)
+def new_history(amp=None):
+    """Empty per-epoch ``history`` dict that ``run_phase`` appends to.
 
-        print(f"  Epoch {epoch + 1}/{num_epochs} — "
-              f"Train: {train_acc:.4f}, Val: {val_acc:.4f}")
+    Holds accuracy/loss, the ``PROFILE_KEYS`` summaries, resolution and
+    epoch time, plus ``amp.describe()`` (precision, channels-last) if given.
+    """
+    return {"train_acc": [], "val_acc": [], "train_loss": [], "val_loss": [],
+            **{key: [] for key in PROFILE_KEYS}, "resolution": [], "epoch_s": [],
+            **(amp.describe() if amp is not None else {})}
 
-        if val_acc > best_val_acc:
-            best_val_acc = val_acc
-            torch.save(model.state_dict(), MODEL_PATH)
-            patience_counter = 0
-        else:
-            patience_counter += 1
-            if patience_counter >= PATIENCE:
-                print(f"  Early stopping at epoch {epoch + 1}")
+
+def _restore_optimizers(state, optimizer, scheduler, amp):
+    optimizer.load_state_dict(state["optimizer"])
+    scheduler.load_state_dict(state["scheduler"])
+    if amp.scaler is not None and state["scaler"] is not None:
+        amp.scaler.load_state_dict(state["scaler"])
+
+
+def run_phase(model, train_loader, val_loader, optimizer, scheduler,
+              criterion, device, num_epochs, history, best_val_acc, phase_name,
+              checkpoint_model=None, train_batch_transform=None, val_batch_transform=None,
+              amp=None, profiler=None, checkpoint_path=MODEL_PATH,
+              checkpointer=None, state_path=None, phase=1, phase1_epochs=None, resume_from=None,
+              patience=PATIENCE, epoch_callback=None, resolution_schedule=None, scale_batch=False):
+    """Generic training loop for one phase, appending to ``history`` (see ``new_history``).
+
+    ``checkpoint_model`` is saved on improvement instead of ``model`` when
+    only part of the network is being trained (the head, from cached features).
+    Each epoch's ``StepProfiler`` summary and checkpoint save time are
+    appended to ``history`` under the keys in ``PROFILE_KEYS``.
+
+    Checkpoints go through ``checkpointer`` (an ``AsyncCheckpointer``), so
+    the loop only waits for a CPU snapshot. With ``state_path`` the full
+    training state is saved after every epoch; ``resume_from`` (a loaded
+    state for this phase) continues after its last completed epoch. Under
+    data-parallel training only rank 0 writes.
+
+    ``epoch_callback(phase, history)`` runs after every epoch; it may raise
+    (e.g. to prune a sweep trial) to abort training.
+
+    ``resolution_schedule`` (e.g. ``(128, 176, 224)``) trains the phase's
+    epochs in equal stages at each image size; validation stays at
+    ``IMG_SIZE``. A ``train_batch_transform`` with an ``out_size``
+    (``BatchAugment``) samples straight to the stage size, anything else is
+    resized after it. ``scale_batch`` grows the batch at smaller sizes to
+    keep activation memory constant (``scaled_batch_size``); learning rates
+    are left unchanged. Each epoch's size and wall time go to ``history``
+    (``resolution``, ``epoch_s``).
+    """
+    amp = amp or MixedPrecision(device)
+    profiler = profiler or StepProfiler(device)
+    own_checkpointer = checkpointer is None
+    checkpointer = checkpointer or AsyncCheckpointer()
+    saved_model = checkpoint_model or model
+    is_main = not _distributed() or dist.get_rank() == 0
+    start_epoch, patience_counter = 0, 0
+    if resume_from is not None:
+        start_epoch, patience_counter = resume_from["epoch"], resume_from["patience_counter"]
+    resolutions = epoch_resolutions(resolution_schedule, num_epochs)
+    stage_loaders = {}
+    start = time.perf_counter()
+
+    try:
+        for epoch in range(start_epoch, num_epochs):
+            if patience_counter >= patience:  # a resumed phase that had already stopped early
                 break
+            epoch_start = time.perf_counter()
+            size = resolutions[epoch]
+            loader = train_loader
+            if scale_batch and size != IMG_SIZE and train_loader.batch_size:
+                if size not in stage_loaders:
+                    stage_loaders[size] = with_batch_size(
+                        train_loader, scaled_batch_size(train_loader.batch_size, size))
+                loader = stage_loaders[size]
+            for owner in (getattr(loader, "sampler", None), getattr(loader, "dataset", None)):
+                if hasattr(owner, "set_epoch"):
+                    owner.set_epoch(epoch)  # distributed samplers / streaming shards reshuffle per epoch
+            base_size = getattr(train_batch_transform, "out_size", None)
+            if resolution_schedule and base_size is not None:
+                train_batch_transform.out_size = size  # one resample instead of augment-then-resize
+            try:
+                train_loss, train_acc = train_one_epoch(
+                    model, loader, optimizer, criterion, device, train_batch_transform, amp, profiler,
+                    resolution=size if resolution_schedule else None,
+                )
+            finally:
+                if base_size is not None:
+                    train_batch_transform.out_size = base_size
+            stats = profiler.end_epoch()
+            val_loss, val_acc = evaluate(model, val_loader, criterion, device, val_batch_transform, amp)
+
+            history["train_acc"].append(train_acc)
+            history["val_acc"].append(val_acc)
+            history["train_loss"].append(train_loss)
+            history["val_loss"].append(val_loss)
+            scheduler.step(val_acc)
+
+            if val_acc > best_val_acc:
+                best_val_acc = val_acc
+                if is_main:
+                    with profiler.time_checkpoint():
+                        checkpointer.save(saved_model.state_dict(), checkpoint_path)
+                patience_counter = 0
+            else:
+                patience_counter += 1
+            stats["checkpoint_s"] = profiler.checkpoint_s
+            for key in PROFILE_KEYS:
+                history[key].append(stats[key])
+            history["resolution"].append(size)
+            history["epoch_s"].append(time.perf_counter() - epoch_start)
 
-    print(f"{phase_name} complete. Best Val Acc: {best_val_acc:.4f}")
+            if state_path is not None and is_main:
+                checkpointer.save(_training_state(
+                    saved_model, optimizer, scheduler, amp, history, best_val_acc, phase,
+                    epoch + 1, patience_counter, phase1_epochs,
+                ), state_path)
+
+            wait_share = stats["data_wait_s"] / max(stats["data_wait_s"] + stats["compute_s"], 1e-9)
+            stage = f"{size}px, batch {loader.batch_size}, " if resolution_schedule else ""
+            print(f"  Epoch {epoch + 1}/{num_epochs} — "
+                  f"Train: {train_acc:.4f}, Val: {val_acc:.4f} ({stage}"
+                  f"{stats['train_images_per_sec']:.0f} img/s, data wait {wait_share:.0%}, "
+                  f"fwd/bwd/opt {stats['forward_ms']:.0f}/{stats['backward_ms']:.0f}/"
+                  f"{stats['optimizer_ms']:.0f} ms)")
+
+            if epoch_callback is not None:
+                epoch_callback(phase, history)
+            if patience_counter >= patience:
+                print(f"  Early stopping at epoch {epoch + 1}")
+                break
+    finally:
+        # Owned here only when called outside train_model: flush queued writes even on error
+        if own_checkpointer:
+            checkpointer.close()
+    print(f"{phase_name} complete. Best Val Acc: {best_val_acc:.4f} "
+          f"({time.perf_counter() - start:.0f}s)")
     return best_val_acc
 
 
-def train_model(model, train_loader, val_loader, class_weights_tensor, device):
+def train_model(model, train_loader, val_loader, class_weights_tensor, device,
+                feature_cache=False, feature_cache_views=FEATURE_CACHE_VIEWS,
+                train_batch_transform=None, val_batch_transform=None,
+                precision=TRAIN_PRECISION, channels_last=CHANNELS_LAST, checkpoint_path=MODEL_PATH,
+                profile_trace=False, resume=False, state_path=TRAINING_STATE_PATH, wrap_model=None,
+                hparams=None, epoch_callback=None, resolution_schedule=RESOLUTION_SCHEDULE,
+                scale_batch=False, criterion=None, val_cache=False):
     """Run the full two-phase training pipeline.
 
+    With ``feature_cache`` Phase 1 trains the head on pooled backbone
+    features extracted once into an on-disk cache (``feature_cache_views``
+    augmented passes per training image) instead of re-running the frozen
+    backbone every epoch. The backbone's BatchNorm statistics then stay at
+    their ImageNet values until Phase 2.
+
+    ``train_batch_transform`` / ``val_batch_transform`` (``BatchAugment``)
+    augment and normalize collated uint8 batches on ``device``, for loaders
+    that yield raw pixels such as ``ShardDataset(output="tensor")``.
+
+    ``precision`` ("fp32", "bf16" or "fp16") enables autocast, with grad
+    scaling for fp16 on CUDA; ``channels_last`` switches model and inputs to
+    NHWC. Both are recorded in ``history``.
+
+    Every epoch also appends a ``StepProfiler`` summary to ``history``
+    (``PROFILE_KEYS``: training images/sec, data-wait vs compute seconds,
+    mean forward/backward/optimizer ms per step and checkpoint save time).
+    ``profile_trace`` additionally records a ``torch.profiler`` trace of
+    ``PROFILE_TRACE_WINDOW`` steps under ``outputs/profiler/``.
+
+    The best model and, after every epoch, the full training state (model,
+    optimizer, scheduler, history, best accuracy, phase/epoch, RNG) are
+    written atomically on a background thread. With ``resume`` training
+    continues from the last complete state at ``state_path``, in Phase 1 or
+    mid-way through Phase 2.
+
+    ``wrap_model`` (e.g. ``DistributedDataParallel`` construction, see
+    ``src.training.distributed``) is applied to the model trained in each
+    phase; it runs again after unfreezing, since the set of trained
+    parameters changes. Checkpoints always hold the unwrapped model.
+
+    ``hparams`` overrides entries of ``DEFAULT_HPARAMS`` (learning rates,
+    epochs and patience per phase, blocks to unfreeze) for this run only,
+    and ``epoch_callback`` is passed through to ``run_phase``.
+
+    ``resolution_schedule`` (e.g. ``(128, 176, 224)``) trains Phase 2 at
+    progressively larger image sizes, with the batch grown at smaller sizes
+    when ``scale_batch`` is set; see ``run_phase``. Phase 1 and validation
+    always use ``IMG_SIZE``.
+
+    ``criterion`` replaces the class-weighted cross-entropy loss, e.g. a
+    ``DistillationLoss`` from ``src.training.distill``.
+
+    With ``val_cache`` the validation set is decoded and preprocessed once
+    into a uint8 tensor cache (``src.data.val_cache``) that every
+    validation pass reads instead of ``val_loader``'s images.
+
     Returns (history dict, best_val_acc, phase1_epochs).
     """
-    criterion = nn.CrossEntropyLoss(weight=class_weights_tensor)
-    history = {"train_acc": [], "val_acc": [], "train_loss": [], "val_loss": []}
+    hp = {**DEFAULT_HPARAMS, **(hparams or {})}
+    criterion = criterion or nn.CrossEntropyLoss(weight=class_weights_tensor)
+    amp = MixedPrecision(device, precision, channels_last)
+    amp.prepare_model(model)
+    profiler = StepProfiler(device, trace=profile_trace)
+    checkpointer = AsyncCheckpointer()
+    history = new_history(amp)
     best_val_acc = 0.0
+    image_val_loader = cached_val_loader(val_loader) if val_cache else val_loader
+
+    try:
+        state = load_training_state(state_path) if resume else None
+        if state is not None:
+            model.load_state_dict(state["model"])
+            history, best_val_acc = state["history"], state["best_val_acc"]
+            torch.set_rng_state(state["rng"])
+            if state["cuda_rng"] is not None and torch.cuda.is_available():
+                torch.cuda.set_rng_state_all(state["cuda_rng"])
+            print(f"\nResuming from {state_path}: Phase {state['phase']}, "
+                  f"{state['epoch']} epoch(s) done, best Val Acc {best_val_acc:.4f}")
+        elif resume:
+            print(f"\nNo training state at {state_path}; starting from scratch")
+
+        # Phase 1: Train classifier head only
+        if state is None or state["phase"] == 1:
+            if feature_cache:
+                print("\nPhase 1: Training classifier head from cached backbone features...")
+                head_train_loader, head_val_loader = build_feature_loaders(
+                    model, train_loader, val_loader, device, num_views=feature_cache_views,
+                    train_batch_transform=train_batch_transform, val_batch_transform=val_batch_transform,
+                )
+                phase1_model, phase1_train, phase1_val = model.classifier, head_train_loader, head_val_loader
+                phase1_transforms = (None, None)  # already applied when the features were cached
+            else:
+                print("\nPhase 1: Training classifier head (base frozen)...")
+                phase1_model = wrap_model(model) if wrap_model else model
+                phase1_train, phase1_val = train_loader, image_val_loader
+                phase1_transforms = (train_batch_transform, val_batch_transform)
+            optimizer = optim.Adam(model.classifier.parameters(), lr=hp["lr_phase1"])
+            scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode="max", factor=0.5, patience=2)
+            if state is not None:
+                _restore_optimizers(state, optimizer, scheduler, amp)
+            best_val_acc = run_phase(phase1_model, phase1_train, phase1_val, optimizer, scheduler,
+                                     criterion, device, hp["epochs_phase1"], history, best_val_acc,
+                                     "Phase 1",
+                                     checkpoint_model=model, train_batch_transform=phase1_transforms[0],
+                                     val_batch_transform=phase1_transforms[1], amp=amp,
+                                     profiler=profiler, checkpoint_path=checkpoint_path,
+                                     checkpointer=checkpointer, state_path=state_path, phase=1,
+                                     resume_from=state, patience=hp["patience"],
+                                     epoch_callback=epoch_callback)
+            phase1_epochs = len(history["train_acc"])
+            state = None
+        else:
+            phase1_epochs = state["phase1_epochs"]
+            print(f"\nPhase 1: already complete ({phase1_epochs} epochs)")
 
-    # Phase 1: Train classifier head only
-    print("\nPhase 1: Training classifier head (base frozen)...")
-    optimizer = optim.Adam(model.classifier.parameters(), lr=LEARNING_RATE_PHASE1)
-    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode="max", factor=0.5, patience=2)
-    best_val_acc = _run_phase(model, train_loader, val_loader, optimizer, scheduler,
-                              criterion, device, NUM_EPOCHS_PHASE1, history, best_val_acc, "Phase 1")
-    phase1_epochs = len(history["train_acc"])
-
-    # Phase 2: Fine-tune top layers
-    print("\nPhase 2: Fine-tuning top layers...")
-    unfreeze_top_layers(model)
-    optimizer_ft = optim.Adam(filter(lambda p: p.requires_grad, model.parameters()), lr=LEARNING_RATE_PHASE2)
-    scheduler_ft = optim.lr_scheduler.ReduceLROnPlateau(optimizer_ft, mode="max", factor=0.5, patience=2)
-    best_val_acc = _run_phase(model, train_loader, val_loader, optimizer_ft, scheduler_ft,
-                              criterion, device, NUM_EPOCHS_PHASE2, history, best_val_acc, "Phase 2")
+        # Phase 2: Fine-tune top layers
+        print("\nPhase 2: Fine-tuning top layers...")
+        unfreeze_top_layers(model, hp["unfreeze_blocks"])
+        optimizer_ft = optim.Adam(filter(lambda p: p.requires_grad, model.parameters()),
+                                  lr=hp["lr_phase2"])
+        scheduler_ft = optim.lr_scheduler.ReduceLROnPlateau(optimizer_ft, mode="max", factor=0.5, patience=2)
+        if state is not None:
+            _restore_optimizers(state, optimizer_ft, scheduler_ft, amp)
+        phase2_model = wrap_model(model) if wrap_model else model
+        best_val_acc = run_phase(phase2_model, train_loader, image_val_loader, optimizer_ft,
+                                 scheduler_ft, criterion, device, hp["epochs_phase2"], history,
+                                 best_val_acc, "Phase 2",
+                                 checkpoint_model=model, train_batch_transform=train_batch_transform,
+                                 val_batch_transform=val_batch_transform, amp=amp,
+                                 profiler=profiler, checkpoint_path=checkpoint_path,
+                                 checkpointer=checkpointer, state_path=state_path, phase=2,
+                                 phase1_epochs=phase1_epochs, resume_from=state,
+                                 patience=hp["patience"], epoch_callback=epoch_callback,
+                                 resolution_schedule=resolution_schedule, scale_batch=scale_batch)
+    finally:
+        # Flush queued writes even if training is interrupted: each is a complete snapshot
+        checkpointer.close()
+        profiler.close()
 
     return history, best_val_acc, phase1_epochs
@@ -4,9 +4,11 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
-from torchvision import datasets
+from PIL import Image
+from torchvision import transforms
 
-from src.config import DATA_DIR, FILTERED_DIR, SELECTED_CLASSES, DISPLAY_NAMES, PLOTS_DIR
+from src.config import SELECTED_CLASSES, DISPLAY_NAMES, PLOTS_DIR
+from src.data.manifest import class_samples, ensure_manifest
 from src.data.transforms import aug_visual_transform
 
 
@@ -49,8 +51,9 @@ def plot_class_distribution(class_counts):
     print(f"Saved: {path}")
 
 
-def plot_sample_images():
-    """Grid of 5 classes x 4 sample images."""
+def plot_sample_images(manifest=None):
+    """Grid of 5 classes x 4 sample images, picked from the manifest."""
+    manifest = manifest or ensure_manifest()
     sample_classes = [
         "Tomato___Bacterial_spot",
         "Tomato___Late_blight",
@@ -62,8 +65,7 @@ def plot_sample_images():
     fig.suptitle("Sample Images from 5 Disease Classes", fontsize=16, fontweight="bold", y=1.01)
 
     for row, cls in enumerate(sample_classes):
-        class_dir = DATA_DIR / cls
-        images_list = sorted(class_dir.glob("*"))[:4]
+        images_list = class_samples(manifest, cls)[:4]
         for col, img_path in enumerate(images_list):
             img = plt.imread(str(img_path))
             axes[row, col].imshow(img)
@@ -78,10 +80,20 @@ def plot_sample_images():
     print(f"Saved: {path}")
 
 
-def plot_augmentation_examples():
-    """Visualise augmentation on a single sample image."""
-    full_dataset_raw = datasets.ImageFolder(str(FILTERED_DIR))
-    raw_img, _ = full_dataset_raw[0]
+def plot_augmentation_examples(batch_augment=None, manifest=None):
+    """Visualise augmentation on a single sample image.
+
+    The image is the first one in the manifest (the same one
+    ``ImageFolder(data/processed)[0]`` would load). With ``batch_augment``
+    (a ``BatchAugment``) the nine variants come from one batched call on
+    the uint8 tensor instead of per-image PIL transforms.
+    """
+    manifest = manifest or ensure_manifest()
+    with Image.open(class_samples(manifest, manifest["classes"][0])[0]) as img:
+        raw_img = img.convert("RGB")
+    if batch_augment is not None:
+        batch = transforms.functional.pil_to_tensor(raw_img).unsqueeze(0).repeat(9, 1, 1, 1)
+        batch_images = batch_augment.augment(batch).permute(0, 2, 3, 1).cpu().numpy()
 
     fig, axes = plt.subplots(2, 5, figsize=(15, 6))
     fig.suptitle("Data Augmentation Examples", fontsize=14, fontweight="bold")
@@ -92,7 +104,7 @@ def plot_augmentation_examples():
 
     for i in range(1, 10):
         row, col = divmod(i, 5)
-        aug_img = aug_visual_transform(raw_img)
+        aug_img = batch_images[i - 1] if batch_augment is not None else aug_visual_transform(raw_img)
         axes[row, col].imshow(aug_img)
         axes[row, col].set_title(f"Augmented #{i}")
         axes[row, col].axis("off")
@@ -104,7 +116,7 @@ def plot_augmentation_examples():
     print(f"Saved: {path}")
 
 
-def print_insights(class_counts):
+def print_insights(class_counts, manifest=None):
     """Print 3 key dataset insights."""
     max_count = max(class_counts.values())
     min_count = min(class_counts.values())
@@ -121,7 +133,6 @@ def print_insights(class_counts):
     print("INSIGHT 2: Crop distribution — "
           + ", ".join(f"{c}: {t:,}" for c, t in sorted(crop_totals.items(), key=lambda x: -x[1])))
 
-    sample_dir = DATA_DIR / SELECTED_CLASSES[0]
-    sample_img_path = next(sample_dir.glob("*"))
+    sample_img_path = class_samples(manifest or ensure_manifest(), SELECTED_CLASSES[0])[0]
     sample_img = plt.imread(str(sample_img_path))
     print(f"INSIGHT 3: Images are {sample_img.shape[0]}x{sample_img.shape[1]} RGB, dtype={sample_img.dtype}")
@@ -7,8 +7,10 @@ from src.config import PLOTS_DIR
 
 
 def plot_training_history(history, phase1_epochs):
-    """Save accuracy and loss curves."""
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+    """Save accuracy and loss curves, plus throughput when the history has it."""
+    show_throughput = bool(history.get("train_images_per_sec"))
+    fig, axes = plt.subplots(1, 3 if show_throughput else 2, figsize=(21 if show_throughput else 14, 5))
+    ax1, ax2 = axes[:2]
     epochs_range = range(1, len(history["train_acc"]) + 1)
 
     ax1.plot(epochs_range, history["train_acc"], label="Train Accuracy", linewidth=2)
@@ -23,6 +25,22 @@ def plot_training_history(history, phase1_epochs):
     ax2.set_xlabel("Epoch"); ax2.set_ylabel("Loss")
     ax2.set_title("Model Loss", fontweight="bold"); ax2.legend(); ax2.grid(True, alpha=0.3)
 
+    if show_throughput:
+        ax3 = axes[2]
+        ax3.plot(epochs_range, history["train_images_per_sec"], color="tab:green",
+                 label="Train images/sec", linewidth=2)
+        ax3.axvline(x=phase1_epochs, color="gray", linestyle="--", alpha=0.5, label="Fine-tuning starts")
+        ax3.set_xlabel("Epoch"); ax3.set_ylabel("Images / sec")
+        ax3.set_title("Training Throughput", fontweight="bold"); ax3.grid(True, alpha=0.3)
+        wait = [w / max(w + c, 1e-9) * 100 for w, c in zip(history["data_wait_s"], history["compute_s"])]
+        ax3b = ax3.twinx()
+        ax3b.bar(epochs_range, wait, color="tab:orange", alpha=0.3, label="Data wait (%)")
+        ax3b.set_ylabel("Data wait (% of epoch)"); ax3b.set_ylim(0, 100)
+        ax3.set_zorder(ax3b.get_zorder() + 1); ax3.patch.set_visible(False)  # line above bars
+        lines, labels = ax3.get_legend_handles_labels()
+        bars, bar_labels = ax3b.get_legend_handles_labels()
+        ax3.legend(lines + bars, labels + bar_labels, loc="upper right")
+
     plt.tight_layout()
     path = PLOTS_DIR / "training_history.png"
     plt.savefig(path, dpi=150, bbox_inches="tight")
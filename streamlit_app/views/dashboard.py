@@ -4,7 +4,7 @@ import json
 import pandas as pd
 import streamlit as st
 
-from src.config import PLOTS_DIR, RESULTS_PATH
+from src.config import BENCHMARK_PATH, PLOTS_DIR, RESULTS_PATH
 from components import page_header, section_header, divider, metric_card
 
 
@@ -14,6 +14,14 @@ def _load_results():
         return json.load(f)
 
 
+@st.cache_data
+def _load_benchmark():
+    if not BENCHMARK_PATH.exists():
+        return None
+    with open(BENCHMARK_PATH) as f:
+        return json.load(f)
+
+
 def show():
     page_header(
         "Model Performance",
@@ -70,3 +78,35 @@ def show():
         for k, v in sorted(pca.items(), key=lambda x: -x[1])
     ])
     st.dataframe(df, hide_index=True)
+
+    # ── Inference benchmark matrix ──
+    benchmark = _load_benchmark()
+    if benchmark:
+        divider()
+        section_header("Inference Benchmark (CPU)")
+        env = benchmark["environment"]
+        st.caption(
+            f"{env['processor']} · {env['cpu_count']} CPUs · torch {env['torch']} · "
+            f"{benchmark['settings']['iterations']} timed runs after "
+            f"{benchmark['settings']['warmup']} warm-up"
+        )
+        rows = [r for r in benchmark["results"] if r["status"] == "ok"]
+        bdf = pd.DataFrame([
+            {
+                "Backend": r["backend"],
+                "Input": r["input"],
+                "Batch": r["batch_size"],
+                "Threads": r["threads"],
+                "p50 (ms)": round(r["p50_ms"], 1),
+                "p95 (ms)": round(r["p95_ms"], 1),
+                "p99 (ms)": round(r["p99_ms"], 1),
+                "Images/s": round(r["throughput_ips"], 1),
+                "Cold start (ms)": round(r["cold_start_ms"]),
+                "Peak RSS (MB)": round(r["peak_rss_mb"]) if r["peak_rss_mb"] else None,
+            }
+            for r in rows
+        ])
+        st.dataframe(bdf, hide_index=True)
+        skipped = {r["backend"]: r["reason"] for r in benchmark["results"] if r["status"] != "ok"}
+        for backend, reason in skipped.items():
+            st.caption(f"{backend}: {reason}")
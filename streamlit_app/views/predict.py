@@ -13,6 +13,7 @@ import streamlit as st
 from PIL import Image
 
 from src.inference.predictor import DiseasePredictor
+from src.inference.runtime import configure_cpu
 from components import (
     page_header, section_header, divider,
     confidence_bar, severity_badge,
@@ -37,6 +38,8 @@ MODE_META = {
 
 @st.cache_resource
 def _load_predictor():
+    # One Streamlit process owns the whole CPU budget
+    configure_cpu(workers=1)
     return DiseasePredictor()
 
 